@@ -1,6 +1,19 @@
+from .headers import Headers
 from .http_request import HTTPRequest
+from .prepared_request import RequestTemplate, PreparedRequest
 from .http_response import HTTPResponse
 from .http_client import HTTPClient
+from .metrics import MetricsAggregator, RequestTimings
+from .retry import RetryBudget, RetryPolicy
+from .rate_limit import RateLimiter
+from .async_http_client import AsyncHTTPClient
+from .request_body import FileBody, IterableBody
+from .multipart import MultipartForm
+from .cookie_jar import CookieJar, StoredCookie
+from .http_cache import HTTPCache, MemoryCacheStorage, FileCacheStorage
+from .redirect_cache import RedirectCache
+from .download import DownloadResult
+from .exceptions import *
 from .constants import *
 from .validation import *
 from .utils import *
@@ -0,0 +1,325 @@
+import asyncio
+import io
+import ssl
+import time
+from typing import Iterable
+
+from .constants import *
+from .cookie_jar import CookieJar
+from .exceptions import EmptyResponseError
+from .http_client import BaseHTTPClient, RedirectManager
+from .http_request import HTTPRequest
+from .http_response import HTTPResponse
+from .redirect_cache import RedirectCache
+from .request_body import BaseRequestBody
+from .resolver import BaseResolver, CachingResolver
+from .response_stream import ContentDecodingStream
+from .tls import create_ssl_context
+
+
+class AsyncHTTPConnection:
+    def __init__(self, protocol: str, hostname: str, port: int,
+                 reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.protocol = protocol
+        self.hostname = hostname
+        self.port = port
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+        self.requests_count = 0
+        self.closed = False
+
+    @property
+    def key(self) -> tuple[str, str, int]:
+        return self.protocol, self.hostname, self.port
+
+    @property
+    def reused(self) -> bool:
+        return self.requests_count > 0
+
+    def is_stale(self, idle_timeout: float, now: float) -> bool:
+        return (self.closed
+                or now - self.last_used >= idle_timeout
+                or self.reader.at_eof()
+                or self.writer.is_closing())
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+
+class AsyncConnectionPool:
+    def __init__(self, max_connections: int = 1000, max_connections_per_host: int = 10,
+                 idle_timeout: float = 60.0, ssl_context: ssl.SSLContext | None = None,
+                 resolver: BaseResolver | None = None):
+        if max_connections < 1 or max_connections_per_host < 1:
+            raise ValueError("Connections limits must be greater than 0")
+
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.idle_timeout = idle_timeout
+        self._idle_connections: dict[tuple[str, str, int], list[AsyncHTTPConnection]] = {}
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self._hosts_semaphores: dict[tuple[str, str, int], asyncio.Semaphore] = {}
+        self.ssl_context = ssl_context if ssl_context else create_ssl_context()
+        self.resolver = resolver if resolver else CachingResolver()
+
+    def _get_host_semaphore(self, key: tuple[str, str, int]) -> asyncio.Semaphore:
+        if key not in self._hosts_semaphores:
+            self._hosts_semaphores[key] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._hosts_semaphores[key]
+
+    async def _open_connection(self, key: tuple[str, str, int]) -> AsyncHTTPConnection:
+        protocol, hostname, port = key
+        loop = asyncio.get_running_loop()
+        addresses = await loop.run_in_executor(None, self.resolver.resolve, hostname, port)
+
+        ssl_kwargs = {}
+        if protocol == HTTPProtocols.HTTPS:
+            ssl_kwargs = {"ssl": self.ssl_context, "server_hostname": hostname}
+
+        error = None
+        for family, _, _, _, sockaddr in addresses:
+            try:
+                reader, writer = await asyncio.open_connection(sockaddr[0], sockaddr[1], family=family, **ssl_kwargs)
+                return AsyncHTTPConnection(protocol, hostname, port, reader, writer)
+            except OSError as connect_error:
+                error = connect_error
+
+        raise error if error else OSError("Hostname resolved to no addresses")
+
+    async def get_connection(self, protocol: str, hostname: str, port: int) -> AsyncHTTPConnection:
+        key = (protocol, hostname, port)
+        host_semaphore = self._get_host_semaphore(key)
+        await host_semaphore.acquire()
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            host_semaphore.release()
+            raise
+
+        try:
+            now = time.monotonic()
+            idle_connections = self._idle_connections.get(key, [])
+            while idle_connections:
+                connection = idle_connections.pop()
+                if not connection.is_stale(self.idle_timeout, now):
+                    return connection
+                connection.close()
+
+            return await self._open_connection(key)
+        except BaseException:
+            self._semaphore.release()
+            host_semaphore.release()
+            raise
+
+    def release_connection(self, connection: AsyncHTTPConnection, reusable: bool = True):
+        if reusable and not connection.closed:
+            connection.last_used = time.monotonic()
+            self._idle_connections.setdefault(connection.key, []).append(connection)
+        else:
+            connection.close()
+
+        self._semaphore.release()
+        self._get_host_semaphore(connection.key).release()
+
+    def close(self):
+        for connections in self._idle_connections.values():
+            for connection in connections:
+                connection.close()
+        self._idle_connections.clear()
+
+
+class AsyncHTTPClient(BaseHTTPClient):
+    def __init__(self, redirect_allow: bool = True, max_redirects_count: int = 5, *,
+                 keep_alive: bool = True,
+                 max_connections: int = 1000,
+                 max_connections_per_host: int = 10,
+                 idle_timeout: float = 60.0,
+                 ssl_context: ssl.SSLContext | None = None,
+                 ca_file: str | None = None,
+                 cert_file: str | None = None,
+                 key_file: str | None = None,
+                 alpn_protocols: list[str] | None = None,
+                 minimum_tls_version: str | ssl.TLSVersion | None = None,
+                 resolver: BaseResolver | None = None,
+                 decode_content: bool = True,
+                 max_decompressed_size: int | None = 1024 * 1024 * 1024,
+                 cookie_jar: CookieJar | None = None,
+                 redirect_cache: RedirectCache | None = None):
+        super().__init__(redirect_allow, max_redirects_count, keep_alive, cookie_jar, decode_content,
+                         max_decompressed_size)
+        self.redirect_cache = redirect_cache
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.idle_timeout = idle_timeout
+        if ssl_context is None:
+            ssl_context = create_ssl_context(ca_file=ca_file, cert_file=cert_file, key_file=key_file,
+                                             alpn_protocols=alpn_protocols, minimum_version=minimum_tls_version)
+        self.ssl_context = ssl_context
+        self.resolver = resolver if resolver else CachingResolver()
+        self._connection_pool: AsyncConnectionPool | None = None
+
+    @property
+    def connection_pool(self) -> AsyncConnectionPool:
+        # Created lazily because asyncio primitives must belong to the running event loop.
+        if self._connection_pool is None:
+            self._connection_pool = AsyncConnectionPool(self.max_connections,
+                                                        self.max_connections_per_host,
+                                                        self.idle_timeout,
+                                                        self.ssl_context,
+                                                        self.resolver)
+        return self._connection_pool
+
+    @staticmethod
+    async def _read_chunked_body(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            chunk_size_line = await reader.readuntil(INDENT_BYTES)
+            chunk_size = int(chunk_size_line.split(b";", 1)[0], 16)
+            if chunk_size == 0:
+                break
+
+            chunks.append(await reader.readexactly(chunk_size))
+            await reader.readuntil(INDENT_BYTES)
+
+        # Skip trailer fields up to the empty line which terminates the message.
+        while await reader.readuntil(INDENT_BYTES) != INDENT_BYTES:
+            pass
+
+        return b"".join(chunks)
+
+    def _decode_content(self, content: bytes, content_encoding: str) -> bytes:
+        with ContentDecodingStream(io.BytesIO(content), content_encoding, self.max_decompressed_size) as stream:
+            return stream.read()
+
+    async def _read_response_body(self, reader: asyncio.StreamReader, http_response: HTTPResponse) -> bytes:
+        content = await self._read_response_framed_body(reader, http_response)
+        content_encoding = self._get_content_encoding(http_response)
+        if content_encoding is None or not content:
+            return content
+        # Decompression is CPU bound, so it runs in the default executor instead of on the event loop.
+        return await asyncio.get_running_loop().run_in_executor(None, self._decode_content, content,
+                                                                content_encoding)
+
+    async def _read_response_framed_body(self, reader: asyncio.StreamReader, http_response: HTTPResponse) \
+            -> bytes:
+        content_length = http_response.headers.get(HTTPHeaders.CONTENT_LENGTH)
+        transfer_encoding_value = http_response.headers.get(HTTPHeaders.TRANSFER_ENCODING)
+
+        if transfer_encoding_value and transfer_encoding_value.lower() == TransferEncodingValues.CHUNKED:
+            return await self._read_chunked_body(reader)
+        elif content_length:
+            return await reader.readexactly(int(content_length))
+        elif http_response.status_code in self._bodiless_status_codes:
+            return b""
+
+        return await reader.read()
+
+    @staticmethod
+    async def _send_body_stream(connection: AsyncHTTPConnection, body_stream: BaseRequestBody):
+        # File reads and user iterables may block, so every chunk is produced in the default executor.
+        loop = asyncio.get_running_loop()
+        chunks = body_stream.iter_encoded_chunks()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                connection.writer.write(chunk)
+                await connection.writer.drain()
+        finally:
+            chunks.close()
+
+    async def _send_request_and_get_response(self, connection: AsyncHTTPConnection, http_request: HTTPRequest) \
+            -> HTTPResponse:
+        self._add_accept_encoding(http_request)
+        connection.writer.writelines((http_request.head, http_request.body_bytes))
+        await connection.writer.drain()
+        if http_request.body_stream:
+            await self._send_body_stream(connection, http_request.body_stream)
+
+        try:
+            response_headers = await connection.reader.readuntil(DOUBLE_INDENT_BYTES)
+        except asyncio.IncompleteReadError:
+            raise EmptyResponseError("Empty Response")
+
+        http_response = HTTPResponse(hand_init=True)
+        http_response.initialize_headers(response_headers[:-len(DOUBLE_INDENT_BYTES)].decode("iso-8859-1"))
+        if http_request.method == HTTPMethods.HEAD:
+            http_response.content = b""
+        else:
+            http_response.content = await self._read_response_body(connection.reader, http_response)
+        http_response.initialize_cookies()
+        return http_response
+
+    async def _get_response(self, http_request: HTTPRequest) -> HTTPResponse:
+        while True:
+            connection = await self.connection_pool.get_connection(http_request.protocol,
+                                                                   http_request.hostname,
+                                                                   http_request.port)
+            try:
+                response = await self._send_request_and_get_response(connection, http_request)
+            except Exception:
+                self.connection_pool.release_connection(connection, reusable=False)
+                # The server may have dropped a kept-alive connection while it was idle. It may also have
+                # processed the request before closing, so only idempotent methods are sent again.
+                body_stream = http_request.body_stream
+                if connection.reused and http_request.method in IDEMPOTENT_METHODS_TUPLE \
+                        and (not body_stream or body_stream.rewind()):
+                    continue
+                raise
+            except BaseException:
+                self.connection_pool.release_connection(connection, reusable=False)
+                raise
+
+            connection.requests_count += 1
+            self.connection_pool.release_connection(connection, self._is_connection_reusable(http_request, response))
+            return response
+
+    async def request(self, http_request: HTTPRequest, stream: bool = False) -> HTTPResponse:
+        if stream:
+            raise ValueError("Streaming responses are not supported by AsyncHTTPClient")
+
+        redirect_manager = RedirectManager(self.max_redirects_count, self.redirect_cache)
+
+        request = http_request
+
+        while True:
+            if self.redirect_allow:
+                cached_redirect_request = redirect_manager.create_cached_redirect_request(request)
+                while cached_redirect_request:
+                    request = cached_redirect_request
+                    cached_redirect_request = redirect_manager.create_cached_redirect_request(request)
+            self._add_session_cookies(request)
+            response = await self._get_response(request)
+            self._save_session_cookies(request, response)
+
+            if self.redirect_allow:
+                request_creating_result = redirect_manager.create_redirect_request(response, request)
+                if not request_creating_result:
+                    break
+
+                request = request_creating_result
+                continue
+            break
+
+        response.http_request = request
+        return response
+
+    async def request_many(self, http_requests: Iterable[HTTPRequest], return_exceptions: bool = True) \
+            -> list[HTTPResponse | BaseException]:
+        return await asyncio.gather(*(self.request(http_request) for http_request in http_requests),
+                                    return_exceptions=return_exceptions)
+
+    async def close(self):
+        if self._connection_pool is not None:
+            self._connection_pool.close()
+            self._connection_pool = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,264 @@
+import select
+import socket
+import ssl
+import threading
+import time
+
+from .constants import *
+from .exceptions import ConnectTimeoutError
+from .happy_eyeballs import HappyEyeballsConnector
+from .resolver import BaseResolver, CachingResolver
+from .socket_reader import BufferedSocketReader
+from .tls import TLSConnector
+
+
+class HTTPConnection:
+    def __init__(self, protocol: str, hostname: str, port: int, sock: socket.socket | ssl.SSLSocket):
+        self.protocol = protocol
+        self.hostname = hostname
+        self.port = port
+        self.sock = sock
+        self.reader = BufferedSocketReader(sock)
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.requests_count = 0
+        self.closed = False
+        # DNS, TCP connect and TLS handshake durations in nanoseconds, reported by the first request only.
+        self.connect_timings: tuple[int, int, int] | None = None
+
+    @property
+    def key(self) -> tuple[str, str, int]:
+        return self.protocol, self.hostname, self.port
+
+    @property
+    def reused(self) -> bool:
+        return self.requests_count > 0
+
+    def take_connect_timings(self) -> tuple[int, int, int] | None:
+        connect_timings, self.connect_timings = self.connect_timings, None
+        return connect_timings
+
+    def is_expired(self, idle_timeout: float, now: float | None = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        return now - self.last_used >= idle_timeout
+
+    def is_stale(self) -> bool:
+        if self.closed:
+            return True
+
+        if self.reader.buffered_size:
+            return True
+
+        if isinstance(self.sock, ssl.SSLSocket) and self.sock.pending():
+            return True
+
+        # An idle keep-alive socket must not be readable: readability means either
+        # the peer closed it (EOF) or it sent data we never asked for.
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+
+class ConnectionPool:
+    def __init__(self, max_connections_per_host: int = 10, idle_timeout: float = 60.0,
+                 tls_connector: TLSConnector | None = None, resolver: BaseResolver | None = None, *,
+                 tcp_connector: HappyEyeballsConnector | None = None,
+                 connect_timeout: float | None = None,
+                 read_timeout: float | None = None):
+        if max_connections_per_host < 1:
+            raise ValueError("Max connections per host must be greater than 0")
+
+        self.max_connections_per_host = max_connections_per_host
+        self.idle_timeout = idle_timeout
+        self.tls_connector = tls_connector if tls_connector else TLSConnector()
+        self.resolver = resolver if resolver else CachingResolver()
+        self.tcp_connector = tcp_connector if tcp_connector else HappyEyeballsConnector()
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._idle_connections: dict[tuple[str, str, int], list[HTTPConnection]] = {}
+        self._connections_count: dict[tuple[str, str, int], int] = {}
+        self._condition = threading.Condition()
+        self._waiting_count = 0
+        self._closed = False
+        self.opened_connections_count = 0
+
+    def _get_connect_deadline(self, deadline: float | None) -> float | None:
+        if self.connect_timeout is not None:
+            connect_deadline = time.monotonic() + self.connect_timeout
+            return connect_deadline if deadline is None else min(deadline, connect_deadline)
+        return deadline
+
+    def _open_socket(self, protocol: str, hostname: str, port: int, deadline: float | None = None) \
+            -> tuple[socket.socket | ssl.SSLSocket, tuple[int, int, int]]:
+        # The connect timeout covers the TCP connection and the TLS handshake, DNS resolution cannot be interrupted.
+        started_at = time.perf_counter_ns()
+        addresses = self.resolver.resolve(hostname, port)
+        resolved_at = time.perf_counter_ns()
+        deadline = self._get_connect_deadline(deadline)
+        sock = self.tcp_connector.connect(hostname, addresses,
+                                          deadline - time.monotonic() if deadline is not None else None)
+        connected_at = time.perf_counter_ns()
+        if protocol == HTTPProtocols.HTTP:
+            sock.settimeout(self.read_timeout)
+            return sock, (resolved_at - started_at, connected_at - resolved_at, 0)
+
+        try:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConnectTimeoutError(f"Timed out connecting to {hostname}")
+                sock.settimeout(remaining)
+            try:
+                sock = self.tls_connector.wrap_socket(sock, hostname, port)
+            except TimeoutError as error:
+                raise ConnectTimeoutError(f"TLS handshake with {hostname} timed out") from error
+        except Exception:
+            sock.close()
+            raise
+        sock.settimeout(self.read_timeout)
+        return sock, (resolved_at - started_at, connected_at - resolved_at, time.perf_counter_ns() - connected_at)
+
+    def _open_connection(self, key: tuple[str, str, int], deadline: float | None = None) -> HTTPConnection:
+        protocol, hostname, port = key
+        try:
+            sock, connect_timings = self._open_socket(protocol, hostname, port, deadline)
+        except Exception:
+            with self._condition:
+                self._forget_connection(key)
+            raise
+
+        connection = HTTPConnection(protocol, hostname, port, sock)
+        connection.connect_timings = connect_timings
+        with self._condition:
+            self.opened_connections_count += 1
+        return connection
+
+    def _forget_connection(self, key: tuple[str, str, int]):
+        self._connections_count[key] -= 1
+        if not self._connections_count[key]:
+            del self._connections_count[key]
+        self._condition.notify_all()
+
+    def _reap_idle_connections(self, now: float):
+        for key in list(self._idle_connections):
+            alive_connections = []
+            for connection in self._idle_connections[key]:
+                if connection.is_expired(self.idle_timeout, now):
+                    connection.close()
+                    self._forget_connection(key)
+                else:
+                    alive_connections.append(connection)
+
+            if alive_connections:
+                self._idle_connections[key] = alive_connections
+            else:
+                del self._idle_connections[key]
+
+    def reap_idle_connections(self):
+        with self._condition:
+            self._reap_idle_connections(time.monotonic())
+
+    def get_connection(self, protocol: str, hostname: str, port: int, deadline: float | None = None) \
+            -> HTTPConnection:
+        key = (protocol, hostname, port)
+        with self._condition:
+            self._reap_idle_connections(time.monotonic())
+            while True:
+                idle_connections = self._idle_connections.get(key)
+                while idle_connections:
+                    connection = idle_connections.pop()
+                    if not idle_connections:
+                        del self._idle_connections[key]
+                    if not connection.is_stale():
+                        return connection
+
+                    connection.close()
+                    self._forget_connection(key)
+                    idle_connections = self._idle_connections.get(key)
+
+                if self._connections_count.get(key, 0) < self.max_connections_per_host:
+                    self._connections_count[key] = self._connections_count.get(key, 0) + 1
+                    break
+
+                timeout = None
+                if deadline is not None:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        raise ConnectTimeoutError(f"Timed out waiting for a connection to {hostname}")
+                self._waiting_count += 1
+                try:
+                    self._condition.wait(timeout)
+                finally:
+                    self._waiting_count -= 1
+
+        return self._open_connection(key, deadline)
+
+    def release_connection(self, connection: HTTPConnection, reusable: bool = True):
+        if isinstance(connection.sock, ssl.SSLSocket) and not connection.closed:
+            self.tls_connector.save_session(connection.sock, connection.hostname, connection.port)
+
+        with self._condition:
+            # Connections still in use when the pool closed are dropped once they are released.
+            if reusable and not connection.closed and not self._closed:
+                connection.last_used = time.monotonic()
+                self._idle_connections.setdefault(connection.key, []).append(connection)
+                self._condition.notify_all()
+                return
+
+            connection.close()
+            self._forget_connection(connection.key)
+
+    def preconnect(self, protocol: str, hostname: str, port: int) -> bool:
+        key = (protocol, hostname, port)
+        with self._condition:
+            if self._connections_count.get(key, 0) >= self.max_connections_per_host:
+                return False
+            self._connections_count[key] = self._connections_count.get(key, 0) + 1
+
+        connection = self._open_connection(key)
+        # The time spent here is not part of any request.
+        connection.connect_timings = None
+        self.release_connection(connection)
+        return True
+
+    def idle_connections_count(self, protocol: str, hostname: str, port: int) -> int:
+        with self._condition:
+            return len(self._idle_connections.get((protocol, hostname, port), []))
+
+    @property
+    def stats(self) -> dict[str, int | dict[str, dict[str, int]]]:
+        with self._condition:
+            hosts = {f"{protocol}://{hostname}:{port}": {
+                         "connections": connections_count,
+                         "idle_connections": len(self._idle_connections.get((protocol, hostname, port), [])),
+                     } for (protocol, hostname, port), connections_count in self._connections_count.items()}
+            return {
+                "connections": sum(self._connections_count.values()),
+                "idle_connections": sum(len(connections) for connections in self._idle_connections.values()),
+                "waiting_requests": self._waiting_count,
+                "opened_connections": self.opened_connections_count,
+                "hosts": hosts,
+            }
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            for key, connections in self._idle_connections.items():
+                for connection in connections:
+                    connection.close()
+                    self._connections_count[key] -= 1
+                    if not self._connections_count[key]:
+                        del self._connections_count[key]
+            self._idle_connections.clear()
+            self._condition.notify_all()
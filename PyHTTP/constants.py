@@ -1,5 +1,7 @@
 INDENT = "\r\n"
 DOUBLE_INDENT = INDENT + INDENT
+INDENT_BYTES = INDENT.encode()
+DOUBLE_INDENT_BYTES = DOUBLE_INDENT.encode()
 
 
 class HTTPProtocols:
@@ -20,11 +22,42 @@ class HTTPHeaders:
     COOKIE = "Cookie"
     SET_COOKIE = "Set-Cookie"
     TRANSFER_ENCODING = "Transfer-Encoding"
+    CONNECTION = "Connection"
+    CACHE_CONTROL = "Cache-Control"
+    EXPIRES = "Expires"
+    DATE = "Date"
+    AGE = "Age"
+    ETAG = "ETag"
+    LAST_MODIFIED = "Last-Modified"
+    IF_NONE_MATCH = "If-None-Match"
+    IF_MODIFIED_SINCE = "If-Modified-Since"
+    VARY = "Vary"
+    ACCEPT_ENCODING = "Accept-Encoding"
+    CONTENT_ENCODING = "Content-Encoding"
+    CONTENT_DISPOSITION = "Content-Disposition"
+    RETRY_AFTER = "Retry-After"
+    AUTHORIZATION = "Authorization"
+    RANGE = "Range"
+    ACCEPT_RANGES = "Accept-Ranges"
+    CONTENT_RANGE = "Content-Range"
+    IF_RANGE = "If-Range"
 
 
 class HTTPStatusCodes:
     OK = 200
+    NO_CONTENT = 204
+    PARTIAL_CONTENT = 206
     MOVED_PERMANENTLY = 301
+    FOUND = 302
+    SEE_OTHER = 303
+    NOT_MODIFIED = 304
+    TEMPORARY_REDIRECT = 307
+    PERMANENT_REDIRECT = 308
+    TOO_MANY_REQUESTS = 429
+    INTERNAL_SERVER_ERROR = 500
+    BAD_GATEWAY = 502
+    SERVICE_UNAVAILABLE = 503
+    GATEWAY_TIMEOUT = 504
 
 
 class HTTPVersions:
@@ -38,21 +71,61 @@ class HTTPMethods:
     POST = "POST"
     PUT = "PUT"
     DELETE = "DELETE"
+    HEAD = "HEAD"
 
 
-HTTP_METHODS_TUPLE = (HTTPMethods.GET, HTTPMethods.POST, HTTPMethods.PUT, HTTPMethods.DELETE)
+HTTP_METHODS_TUPLE = (HTTPMethods.GET, HTTPMethods.POST, HTTPMethods.PUT, HTTPMethods.DELETE, HTTPMethods.HEAD)
+IDEMPOTENT_METHODS_TUPLE = (HTTPMethods.GET, HTTPMethods.PUT, HTTPMethods.DELETE, HTTPMethods.HEAD)
 
 
 class ContentTypes:
     JSON = "application/json"
     TEXT = "text/plain"
     FORM = "application/x-www-form-urlencoded"
+    OCTET_STREAM = "application/octet-stream"
+    MULTIPART_FORM = "multipart/form-data"
+
+
+class ContentEncodings:
+    GZIP = "gzip"
+    X_GZIP = "x-gzip"
+    DEFLATE = "deflate"
 
 
 class TransferEncodingValues:
     CHUNKED = "chunked"
 
 
+class ConnectionValues:
+    KEEP_ALIVE = "keep-alive"
+    CLOSE = "close"
+
+
+class CacheControlDirectives:
+    MAX_AGE = "max-age"
+    NO_CACHE = "no-cache"
+    NO_STORE = "no-store"
+
+
+class CacheStatuses:
+    HIT = "hit"
+    REVALIDATED = "revalidated"
+    MISS = "miss"
+
+
+class ClientEvents:
+    REQUEST_START = "request_start"
+    CONNECT = "connect"
+    HEADERS_RECEIVED = "headers_received"
+    BODY_COMPLETE = "body_complete"
+    REDIRECT = "redirect"
+    ERROR = "error"
+
+
+CLIENT_EVENTS_TUPLE = (ClientEvents.REQUEST_START, ClientEvents.CONNECT, ClientEvents.HEADERS_RECEIVED,
+                       ClientEvents.BODY_COMPLETE, ClientEvents.REDIRECT, ClientEvents.ERROR)
+
+
 class CookieSettings:
     SECURE = "Secure"
     MAX_AGE = "Max-Age"
@@ -60,3 +133,50 @@ class CookieSettings:
     DOMAIN = "Domain"
     PATH = "Path"
     SAME_SITE = "SameSite"
+
+
+class ALPNProtocols:
+    H2 = "h2"
+    HTTP1_1 = "http/1.1"
+
+
+class HTTP2FrameTypes:
+    DATA = 0x0
+    HEADERS = 0x1
+    PRIORITY = 0x2
+    RST_STREAM = 0x3
+    SETTINGS = 0x4
+    PUSH_PROMISE = 0x5
+    PING = 0x6
+    GOAWAY = 0x7
+    WINDOW_UPDATE = 0x8
+    CONTINUATION = 0x9
+
+
+class HTTP2Flags:
+    END_STREAM = 0x1
+    ACK = 0x1
+    END_HEADERS = 0x4
+    PADDED = 0x8
+    PRIORITY = 0x20
+
+
+class HTTP2Settings:
+    HEADER_TABLE_SIZE = 0x1
+    ENABLE_PUSH = 0x2
+    MAX_CONCURRENT_STREAMS = 0x3
+    INITIAL_WINDOW_SIZE = 0x4
+    MAX_FRAME_SIZE = 0x5
+    MAX_HEADER_LIST_SIZE = 0x6
+
+
+class HTTP2ErrorCodes:
+    NO_ERROR = 0x0
+    PROTOCOL_ERROR = 0x1
+    INTERNAL_ERROR = 0x2
+    FLOW_CONTROL_ERROR = 0x3
+    STREAM_CLOSED = 0x5
+    FRAME_SIZE_ERROR = 0x6
+    REFUSED_STREAM = 0x7
+    CANCEL = 0x8
+    COMPRESSION_ERROR = 0x9
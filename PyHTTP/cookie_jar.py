@@ -0,0 +1,308 @@
+import heapq
+import ipaddress
+import json
+import os
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Iterator
+
+from .constants import *
+from .http_request import HTTPRequest
+from .http_response import HTTPResponse, ResponseCookie
+
+
+MIN_EXPIRY_HEAP_SIZE = 64
+
+
+def is_ip_address(hostname: str) -> bool:
+    try:
+        ipaddress.ip_address(hostname.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+def get_registrable_domain(hostname: str) -> str:
+    # Without a public suffix list the last two labels approximate the registrable domain.
+    hostname = hostname.lower().rstrip(".")
+    if is_ip_address(hostname):
+        return hostname
+    return ".".join(hostname.rsplit(".", 2)[-2:])
+
+
+def domain_match(hostname: str, domain: str) -> bool:
+    return hostname == domain or (hostname.endswith("." + domain) and not is_ip_address(hostname))
+
+
+def path_match(request_path: str, cookie_path: str) -> bool:
+    if request_path == cookie_path:
+        return True
+    return request_path.startswith(cookie_path) and (cookie_path.endswith("/")
+                                                     or request_path[len(cookie_path)] == "/")
+
+
+def get_default_path(request_path: str) -> str:
+    request_path = request_path.split("?", 1)[0]
+    if not request_path.startswith("/") or request_path.count("/") == 1:
+        return "/"
+    return request_path[:request_path.rindex("/")]
+
+
+class StoredCookie:
+    __slots__ = ("name", "value", "domain", "path", "expires_at", "secure", "host_only", "created_at")
+
+    def __init__(self,
+                 name: str,
+                 value: str,
+                 domain: str,
+                 path: str = "/",
+                 *,
+                 expires_at: float | None = None,
+                 secure: bool = False,
+                 host_only: bool = True,
+                 created_at: float | None = None):
+        self.name = name
+        self.value = value
+        self.domain = domain.lower()
+        self.path = path
+        self.expires_at = expires_at
+        self.secure = secure
+        self.host_only = host_only
+        self.created_at = created_at if created_at is not None else time.time()
+
+    @classmethod
+    def from_response_cookie(cls, cookie: ResponseCookie, http_request: HTTPRequest,
+                             now: float | None = None) -> "StoredCookie | None":
+        now = now if now is not None else time.time()
+        hostname = http_request.hostname.lower()
+
+        domain = (cookie.domain or "").strip().lstrip(".").lower()
+        if domain:
+            # A bare top-level Domain such as "com" would send the cookie to every site under it.
+            if not domain_match(hostname, domain) or (domain != hostname and "." not in domain):
+                return None
+            host_only = False
+        else:
+            domain = hostname
+            host_only = True
+
+        path = cookie.path if cookie.path and cookie.path.startswith("/") else get_default_path(http_request.path)
+
+        # Expiry is resolved to an absolute timestamp once, Max-Age taking precedence over Expires.
+        expires_at = None
+        if cookie.max_age is not None:
+            expires_at = now + cookie.max_age
+        elif cookie.expires:
+            try:
+                expires_at = parsedate_to_datetime(cookie.expires).timestamp()
+            except (TypeError, ValueError):
+                expires_at = None
+
+        return cls(cookie.name, cookie.value, domain, path, expires_at=expires_at, secure=bool(cookie.secure),
+                   host_only=host_only, created_at=now)
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return self.domain, self.path, self.name
+
+    def is_expired(self, now: float | None = None) -> bool:
+        return self.expires_at is not None and self.expires_at <= (now if now is not None else time.time())
+
+    def matches(self, hostname: str, path: str, secure: bool) -> bool:
+        if self.secure and not secure:
+            return False
+        if self.host_only:
+            if hostname != self.domain:
+                return False
+        elif not domain_match(hostname, self.domain):
+            return False
+        return path_match(path, self.path)
+
+    def to_dict(self) -> dict:
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, cookie_dict: dict) -> "StoredCookie":
+        return cls(cookie_dict["name"], cookie_dict["value"], cookie_dict["domain"], cookie_dict["path"],
+                   expires_at=cookie_dict["expires_at"], secure=cookie_dict["secure"],
+                   host_only=cookie_dict["host_only"], created_at=cookie_dict["created_at"])
+
+    def __repr__(self):
+        return f"StoredCookie({self.name}={self.value}; domain={self.domain}; path={self.path})"
+
+
+class CookieJar:
+    def __init__(self, file_path: str | None = None):
+        self.file_path = file_path
+        # registrable domain -> path -> (domain, name) -> cookie
+        self._cookies: dict[str, dict[str, dict[tuple[str, str], StoredCookie]]] = {}
+        self._expiry_heap: list[tuple[float, tuple[str, str, str]]] = []
+        self._count = 0
+        self._lock = threading.RLock()
+
+        if file_path and os.path.exists(file_path):
+            self.load(file_path)
+
+    def _get_path_cookies(self, domain: str, path: str, create: bool = False) -> dict | None:
+        registrable_domain = get_registrable_domain(domain)
+        domain_cookies = self._cookies.get(registrable_domain)
+        if domain_cookies is None:
+            if not create:
+                return None
+            domain_cookies = self._cookies[registrable_domain] = {}
+
+        path_cookies = domain_cookies.get(path)
+        if path_cookies is None and create:
+            path_cookies = domain_cookies[path] = {}
+        return path_cookies
+
+    def _delete(self, key: tuple[str, str, str]) -> StoredCookie | None:
+        domain, path, name = key
+        path_cookies = self._get_path_cookies(domain, path)
+        if not path_cookies:
+            return None
+
+        cookie = path_cookies.pop((domain, name), None)
+        if cookie is None:
+            return None
+
+        self._count -= 1
+        if not path_cookies:
+            domain_cookies = self._cookies[get_registrable_domain(domain)]
+            del domain_cookies[path]
+            if not domain_cookies:
+                del self._cookies[get_registrable_domain(domain)]
+        return cookie
+
+    def set_cookie(self, cookie: StoredCookie):
+        with self._lock:
+            self._delete(cookie.key)
+            if cookie.is_expired():
+                # An already expired cookie is how servers delete a stored one.
+                return
+
+            self._get_path_cookies(cookie.domain, cookie.path, create=True)[(cookie.domain, cookie.name)] = cookie
+            self._count += 1
+            if cookie.expires_at is not None:
+                heapq.heappush(self._expiry_heap, (cookie.expires_at, cookie.key))
+                self._compact_expiry_heap()
+
+    def _compact_expiry_heap(self):
+        # Replaced cookies leave stale heap entries behind, which are dropped once they outnumber the live ones.
+        if len(self._expiry_heap) <= max(MIN_EXPIRY_HEAP_SIZE, 2 * self._count):
+            return
+        self._expiry_heap = [(cookie.expires_at, cookie.key) for cookie in self if cookie.expires_at is not None]
+        heapq.heapify(self._expiry_heap)
+
+    def get_cookie(self, domain: str, path: str, name: str) -> StoredCookie | None:
+        with self._lock:
+            path_cookies = self._get_path_cookies(domain.lower(), path)
+            return path_cookies.get((domain.lower(), name)) if path_cookies else None
+
+    def delete_cookie(self, domain: str, path: str, name: str):
+        with self._lock:
+            self._delete((domain.lower(), path, name))
+
+    def remove_expired(self, now: float | None = None) -> int:
+        now = now if now is not None else time.time()
+        removed_count = 0
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                expires_at, key = heapq.heappop(heap)
+                cookie = self.get_cookie(*key)
+                # Heap entries of replaced cookies are stale and skipped.
+                if cookie is not None and cookie.expires_at == expires_at:
+                    self._delete(key)
+                    removed_count += 1
+        return removed_count
+
+    def extract_cookies(self, http_request: HTTPRequest, http_response: HTTPResponse):
+        set_cookie_headers = http_response.headers.get_all(HTTPHeaders.SET_COOKIE)
+        if not set_cookie_headers:
+            return
+
+        now = time.time()
+        # Every header is parsed on its own, since cookies with one name may differ in domain or path.
+        for set_cookie_header in set_cookie_headers:
+            cookie = StoredCookie.from_response_cookie(ResponseCookie(set_cookie_header), http_request, now)
+            if cookie is not None:
+                self.set_cookie(cookie)
+
+    def get_cookies(self, http_request: HTTPRequest) -> dict[str, str]:
+        hostname = http_request.hostname.lower()
+        path = http_request.path.split("?", 1)[0]
+        secure = http_request.protocol == HTTPProtocols.HTTPS
+
+        with self._lock:
+            self.remove_expired()
+            domain_cookies = self._cookies.get(get_registrable_domain(hostname))
+            if not domain_cookies:
+                return {}
+
+            matched_cookies = [cookie
+                               for cookie_path, path_cookies in domain_cookies.items() if path_match(path, cookie_path)
+                               for cookie in path_cookies.values() if cookie.matches(hostname, path, secure)]
+
+        # Cookies with longer paths are listed first, then the oldest ones.
+        matched_cookies.sort(key=lambda cookie: (-len(cookie.path), cookie.created_at))
+        cookies = {}
+        for cookie in matched_cookies:
+            cookies.setdefault(cookie.name, cookie.value)
+        return cookies
+
+    def add_cookie_header(self, http_request: HTTPRequest):
+        cookies = self.get_cookies(http_request)
+        if cookies:
+            http_request.update_cookies(cookies)
+
+    def clear(self, domain: str | None = None):
+        with self._lock:
+            if domain is None:
+                self._cookies.clear()
+                self._expiry_heap.clear()
+                self._count = 0
+                return
+
+            for cookie in [cookie for cookie in self if cookie.domain == domain.lower()]:
+                self._delete(cookie.key)
+
+    def save(self, file_path: str | None = None):
+        file_path = file_path if file_path else self.file_path
+        if not file_path:
+            raise ValueError("File path is required to save cookies")
+
+        with self._lock:
+            self.remove_expired()
+            cookies = [cookie.to_dict() for cookie in self]
+
+        directory = os.path.dirname(os.path.abspath(file_path))
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(file_descriptor, "w") as file:
+                json.dump(cookies, file)
+            os.replace(temp_path, file_path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+    def load(self, file_path: str | None = None):
+        file_path = file_path if file_path else self.file_path
+        with open(file_path) as file:
+            cookies = json.load(file)
+
+        for cookie_dict in cookies:
+            self.set_cookie(StoredCookie.from_dict(cookie_dict))
+
+    def __iter__(self) -> Iterator[StoredCookie]:
+        with self._lock:
+            cookies = [cookie
+                       for domain_cookies in self._cookies.values()
+                       for path_cookies in domain_cookies.values()
+                       for cookie in path_cookies.values()]
+        return iter(cookies)
+
+    def __len__(self):
+        return self._count
@@ -0,0 +1,254 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .constants import *
+from .exceptions import DownloadError
+from .http_request import HTTPRequest
+from .http_response import HTTPResponse
+
+
+DOWNLOAD_BUFFER_SIZE = 256 * 1024
+PART_SUFFIX = ".part"
+PROGRESS_SUFFIX = ".progress"
+
+
+class DownloadSegment:
+    __slots__ = ("start", "end", "downloaded")
+
+    def __init__(self, start: int, end: int | None, downloaded: int = 0):
+        # The end offset is inclusive like in Range headers and None while the size is unknown.
+        self.start = start
+        self.end = end
+        self.downloaded = downloaded
+
+    @property
+    def position(self) -> int:
+        return self.start + self.downloaded
+
+    @property
+    def finished(self) -> bool:
+        return self.end is not None and self.position > self.end
+
+    def get_range(self) -> str:
+        return f"bytes={self.position}-{self.end if self.end is not None else ''}"
+
+
+class DownloadResult:
+    __slots__ = ("path", "size", "segments_count", "ranged", "resumed_size")
+
+    def __init__(self, path: str, size: int, segments_count: int, ranged: bool, resumed_size: int):
+        self.path = path
+        self.size = size
+        self.segments_count = segments_count
+        self.ranged = ranged
+        self.resumed_size = resumed_size
+
+    def __repr__(self):
+        return (f"DownloadResult(path={self.path!r}, size={self.size}, segments={self.segments_count}, "
+                f"ranged={self.ranged}, resumed={self.resumed_size})")
+
+
+class SegmentedDownload:
+    def __init__(self, client, url: str, path: str, *,
+                 segments: int = 4,
+                 request_headers: dict | None = None,
+                 min_segment_size: int = 1024 * 1024,
+                 progress_interval: int = 1024 * 1024):
+        if segments < 1:
+            raise ValueError("Segments count must be greater than 0")
+
+        self.client = client
+        self.url = url
+        self.path = path
+        self.part_path = path + PART_SUFFIX
+        self.progress_path = path + PROGRESS_SUFFIX
+        self.segments_count = segments
+        self.request_headers = dict(request_headers or {})
+        self.min_segment_size = min_segment_size
+        self.progress_interval = progress_interval
+        self.size: int | None = None
+        self.validator: str | None = None
+        self.ranged = False
+        self.resumable = False
+        self.segments: list[DownloadSegment] = []
+        self._fd: int | None = None
+        self._lock = threading.Lock()
+        self._progress_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _create_request(self, method: str = HTTPMethods.GET, segment: DownloadSegment | None = None) -> HTTPRequest:
+        # Ranges address the stored bytes, so the body must not be content-coded.
+        request_headers = {**self.request_headers, HTTPHeaders.ACCEPT_ENCODING: "identity"}
+        if segment is not None and (self.ranged or segment.downloaded):
+            request_headers[HTTPHeaders.RANGE] = segment.get_range()
+            if self.validator is not None:
+                request_headers[HTTPHeaders.IF_RANGE] = self.validator
+        return HTTPRequest(self.url, method=method, request_headers=request_headers)
+
+    def _probe(self):
+        response = self.client.request(self._create_request(HTTPMethods.HEAD))
+        if response.status_code != HTTPStatusCodes.OK:
+            # Servers refusing HEAD are downloaded with a single plain GET.
+            return
+
+        # Later requests go straight to the final URL of any redirects.
+        self.url = response.http_request.absolute_url
+        content_length = response.headers.get(HTTPHeaders.CONTENT_LENGTH)
+        self.size = int(content_length) if content_length and content_length.isdigit() else None
+        etag = response.headers.get(HTTPHeaders.ETAG)
+        # Only strong validators may be used with If-Range.
+        self.validator = etag if etag and not etag.startswith("W/") else \
+            response.headers.get(HTTPHeaders.LAST_MODIFIED)
+        accept_ranges = response.headers.get(HTTPHeaders.ACCEPT_RANGES, "")
+        self.ranged = (bool(self.size) and "bytes" in accept_ranges.lower()
+                       and HTTPHeaders.CONTENT_ENCODING not in response.headers)
+        # A single stream is resumed with If-Range even if ranges are not advertised, the server may still
+        # honour them and otherwise sends the whole body again. Without a validator it always starts over.
+        self.resumable = self.ranged or (self.validator is not None
+                                         and HTTPHeaders.CONTENT_ENCODING not in response.headers)
+
+    def _create_segments(self) -> list[DownloadSegment]:
+        if not self.ranged:
+            return [DownloadSegment(0, self.size - 1 if self.size else None)]
+
+        segments_count = max(1, min(self.segments_count, self.size // self.min_segment_size))
+        segment_size = -(-self.size // segments_count)
+        return [DownloadSegment(start, min(start + segment_size, self.size) - 1)
+                for start in range(0, self.size, segment_size)]
+
+    def _load_progress(self) -> list[DownloadSegment] | None:
+        if not self.resumable or not os.path.exists(self.part_path):
+            return None
+        try:
+            with open(self.progress_path) as file:
+                progress = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if (progress.get("url"), progress.get("size"), progress.get("validator")) != \
+                (self.url, self.size, self.validator):
+            return None
+        return [DownloadSegment(*segment) for segment in progress["segments"]]
+
+    def _save_progress(self):
+        if not self.resumable:
+            return
+
+        with self._lock:
+            progress = {
+                "url": self.url,
+                "size": self.size,
+                "validator": self.validator,
+                "segments": [[segment.start, segment.end, segment.downloaded] for segment in self.segments],
+            }
+        # The progress file is replaced atomically so an interruption never leaves it half written.
+        temporary_path = self.progress_path + ".tmp"
+        with self._progress_lock:
+            with open(temporary_path, "w") as file:
+                json.dump(progress, file)
+            os.replace(temporary_path, self.progress_path)
+
+    def _open_file(self, resumed: bool):
+        self._fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        if resumed:
+            return
+
+        os.ftruncate(self._fd, 0)
+        if self.size:
+            try:
+                os.posix_fallocate(self._fd, 0, self.size)
+            except (AttributeError, OSError):
+                os.ftruncate(self._fd, self.size)
+
+    def _write(self, data: memoryview, offset: int):
+        if hasattr(os, "pwrite"):
+            while data:
+                written = os.pwrite(self._fd, data, offset)
+                data, offset = data[written:], offset + written
+            return
+
+        with self._lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            while data:
+                data = data[os.write(self._fd, data):]
+
+    def _check_response(self, response: HTTPResponse, segment: DownloadSegment):
+        if response.status_code == HTTPStatusCodes.PARTIAL_CONTENT and (self.ranged or segment.downloaded):
+            content_range = response.headers.get(HTTPHeaders.CONTENT_RANGE, "")
+            if not content_range.startswith(f"bytes {segment.position}-"):
+                raise DownloadError(f"Unexpected Content-Range: {content_range!r}")
+        elif response.status_code == HTTPStatusCodes.OK and segment.start == 0 and len(self.segments) == 1:
+            # The whole body is coming, so a resumed single stream starts over.
+            content_length = response.headers.get(HTTPHeaders.CONTENT_LENGTH)
+            if HTTPHeaders.CONTENT_ENCODING in response.headers:
+                content_length = None
+            segment.downloaded = 0
+            segment.end = int(content_length) - 1 if content_length else None
+            self.size = segment.end + 1 if segment.end is not None else None
+        elif response.status_code == HTTPStatusCodes.OK:
+            raise DownloadError("Range request was answered with the whole resource, it may have changed")
+        else:
+            raise DownloadError(f"Unexpected status code: {response.status_code}")
+
+    def _download_segment(self, segment: DownloadSegment):
+        response = self.client.request(self._create_request(segment=segment), stream=True)
+        with response:
+            self._check_response(response, segment)
+            view = memoryview(bytearray(DOWNLOAD_BUFFER_SIZE))
+            unsaved_size = 0
+            while not segment.finished and not self._stopped.is_set():
+                size = view.nbytes if segment.end is None else min(view.nbytes, segment.end + 1 - segment.position)
+                received = response.raw.readinto(view[:size])
+                if not received:
+                    break
+                self._write(view[:received], segment.position)
+                with self._lock:
+                    segment.downloaded += received
+
+                unsaved_size += received
+                if unsaved_size >= self.progress_interval:
+                    self._save_progress()
+                    unsaved_size = 0
+
+        if segment.end is not None and not segment.finished and not self._stopped.is_set():
+            raise ConnectionError("Connection closed before the segment was received")
+
+    def _download_segments(self, segments: list[DownloadSegment]):
+        if len(segments) == 1:
+            self._download_segment(segments[0])
+            return
+
+        with ThreadPoolExecutor(max_workers=len(segments), thread_name_prefix="PyHTTP-download") as executor:
+            futures = [executor.submit(self._download_segment, segment) for segment in segments]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                # The other segments stop at their next chunk and keep their progress.
+                self._stopped.set()
+                raise
+
+    def run(self) -> DownloadResult:
+        self._probe()
+        segments = self._load_progress()
+        resumed = segments is not None
+        self.segments = segments if resumed else self._create_segments()
+        resumed_size = sum(segment.downloaded for segment in self.segments)
+
+        self._open_file(resumed)
+        try:
+            self._download_segments([segment for segment in self.segments if not segment.finished])
+            size = self.size if self.size is not None else self.segments[0].downloaded
+            os.ftruncate(self._fd, size)
+        except BaseException:
+            self._save_progress()
+            raise
+        finally:
+            os.close(self._fd)
+
+        os.replace(self.part_path, self.path)
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+        return DownloadResult(self.path, size, len(self.segments), self.ranged, resumed_size)
@@ -0,0 +1,62 @@
+class RequestError(Exception):
+    def __init__(self, http_request, exception: Exception):
+        super().__init__(f"{http_request.method} {http_request.url} failed: {exception!r}")
+        self.http_request = http_request
+        self.exception = exception
+
+
+class RetryError(Exception):
+    def __init__(self, http_request, attempts_count: int, exception: Exception):
+        super().__init__(f"{http_request.method} {http_request.url} failed after {attempts_count} attempts: "
+                         f"{exception!r}")
+        self.http_request = http_request
+        self.attempts_count = attempts_count
+        self.exception = exception
+
+
+class EmptyResponseError(ConnectionError):
+    # The server closed the connection without sending a response.
+    pass
+
+
+class TooManyRedirectsError(Exception):
+    pass
+
+
+class LineTooLongError(Exception):
+    # A status line, header block or chunk size line exceeded the reader's limit.
+    pass
+
+
+class DecompressedSizeError(Exception):
+    # The decoded body grew past max_decompressed_size, as a decompression bomb would.
+    pass
+
+
+class ConnectTimeoutError(TimeoutError):
+    # The connection was not established in time, so the request was never sent.
+    pass
+
+
+class DownloadError(Exception):
+    pass
+
+
+class HTTP2Error(Exception):
+    def __init__(self, message: str, error_code: int = 0x1):
+        super().__init__(message)
+        self.error_code = error_code
+
+
+class HTTP2StreamReset(HTTP2Error):
+    pass
+
+
+class HTTP2StreamRefused(HTTP2StreamReset):
+    # Raised for streams the server never processed, which are safe to send again.
+    pass
+
+
+class HPACKError(HTTP2Error):
+    def __init__(self, message: str):
+        super().__init__(message, 0x9)
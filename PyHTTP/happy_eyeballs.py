@@ -0,0 +1,144 @@
+import errno
+import os
+import selectors
+import socket
+import threading
+import time
+
+from .exceptions import ConnectTimeoutError
+from .resolver import AddressInfo
+
+
+IN_PROGRESS_ERRORS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY)
+
+
+def interleave_addresses(addresses: list[AddressInfo], preferred_family: int | None = None) -> list[AddressInfo]:
+    # RFC 8305 section 4: alternate address families, starting with the preferred one.
+    families: dict[int, list[AddressInfo]] = {}
+    for address in addresses:
+        families.setdefault(address[0], []).append(address)
+    if preferred_family is None:
+        preferred_family = socket.AF_INET6 if socket.AF_INET6 in families else addresses[0][0]
+
+    queues = sorted(families.values(), key=lambda queue: queue[0][0] != preferred_family)
+    interleaved = []
+    for index in range(max(map(len, queues), default=0)):
+        interleaved.extend(queue[index] for queue in queues if index < len(queue))
+    return interleaved
+
+
+class HappyEyeballsConnector:
+    def __init__(self, attempt_delay: float = 0.25, family_ttl: float = 600.0):
+        if attempt_delay < 0:
+            raise ValueError("Attempt delay must be non-negative")
+
+        self.attempt_delay = attempt_delay
+        self.family_ttl = family_ttl
+        self._families: dict[str, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self.connections_count = 0
+        self.attempts_count = 0
+        self.fallbacks_count = 0
+
+    def get_preferred_family(self, hostname: str) -> int | None:
+        with self._lock:
+            family, expires_at = self._families.get(hostname, (None, 0.0))
+            return family if time.monotonic() < expires_at else None
+
+    def _remember_family(self, hostname: str, family: int):
+        with self._lock:
+            self._families[hostname] = (family, time.monotonic() + self.family_ttl)
+
+    @staticmethod
+    def _start_attempt(address: AddressInfo) -> tuple[socket.socket, int]:
+        family, sock_type, proto, _, sockaddr = address
+        sock = socket.socket(family, sock_type, proto)
+        sock.setblocking(False)
+        try:
+            return sock, sock.connect_ex(sockaddr)
+        except OSError:
+            sock.close()
+            raise
+
+    def connect(self, hostname: str, addresses: list[AddressInfo], timeout: float | None = None) -> socket.socket:
+        if not addresses:
+            raise OSError("Hostname resolved to no addresses")
+
+        queue = interleave_addresses(addresses, self.get_preferred_family(hostname))
+        first_address = queue[0]
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        selector = selectors.DefaultSelector()
+        attempts: dict[socket.socket, AddressInfo] = {}
+        next_attempt_at = 0.0
+        error = None
+        winner = None
+        try:
+            while winner is None:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    raise ConnectTimeoutError(f"Timed out connecting to {hostname}")
+
+                # A new attempt starts every attempt_delay, or at once when all running attempts failed.
+                if queue and (now >= next_attempt_at or not attempts):
+                    address = queue.pop(0)
+                    self.attempts_count += 1
+                    try:
+                        sock, connect_error = self._start_attempt(address)
+                    except OSError as attempt_error:
+                        error = attempt_error
+                        continue
+                    if connect_error == 0:
+                        winner = sock, address
+                    elif connect_error in IN_PROGRESS_ERRORS:
+                        attempts[sock] = address
+                        selector.register(sock, selectors.EVENT_WRITE)
+                        next_attempt_at = now + self.attempt_delay
+                    else:
+                        error = OSError(connect_error, os.strerror(connect_error))
+                        sock.close()
+                    continue
+
+                if not attempts:
+                    raise error
+
+                wait_times = [next_attempt_at - now] if queue else []
+                if deadline is not None:
+                    wait_times.append(deadline - now)
+                for key, _ in selector.select(min(wait_times) if wait_times else None):
+                    sock = key.fileobj
+                    connect_error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    selector.unregister(sock)
+                    address = attempts.pop(sock)
+                    if connect_error:
+                        error = OSError(connect_error, os.strerror(connect_error))
+                        sock.close()
+                    elif winner is None:
+                        winner = sock, address
+                    else:
+                        sock.close()
+        finally:
+            # The losing attempts are cancelled.
+            for sock in attempts:
+                sock.close()
+            selector.close()
+
+        sock, address = winner
+        sock.setblocking(True)
+        self.connections_count += 1
+        if address is not first_address:
+            self.fallbacks_count += 1
+        self._remember_family(hostname, address[0])
+        return sock
+
+    def clear(self):
+        with self._lock:
+            self._families.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "connections": self.connections_count,
+            "attempts": self.attempts_count,
+            "fallbacks": self.fallbacks_count,
+            "remembered_hosts": len(self._families),
+        }
@@ -0,0 +1,143 @@
+from collections.abc import Mapping, MutableMapping
+from typing import Iterable, Iterator
+
+from .constants import *
+
+
+class Headers(MutableMapping):
+    __slots__ = ("_raw", "_raw_lower", "_fields", "_index")
+
+    def __init__(self, headers: Mapping | Iterable[tuple[str, str]] | None = None):
+        self._raw: str | None = None
+        self._raw_lower: str | None = None
+        self._fields: list[tuple[str, str]] | None = []
+        self._index: dict[str, list[int]] | None = None
+
+        if headers:
+            if isinstance(headers, Headers):
+                items = headers.multi_items()
+            elif isinstance(headers, Mapping):
+                items = headers.items()
+            else:
+                items = headers
+
+            for name, value in items:
+                # Plain dicts keep repeated headers such as Set-Cookie as lists of values.
+                if isinstance(value, list):
+                    for item in value:
+                        self._fields.append((name, str(item)))
+                else:
+                    self._fields.append((name, str(value)))
+
+    @classmethod
+    def from_raw(cls, raw: str | bytes) -> "Headers":
+        headers = cls()
+        if isinstance(raw, bytes):
+            raw = raw.decode("iso-8859-1")
+        # Fields are split out of the raw block only when they are first needed.
+        headers._raw = INDENT + raw
+        headers._fields = None
+        return headers
+
+    @property
+    def raw(self) -> str:
+        if self._fields is None:
+            return self._raw[len(INDENT):]
+        return INDENT.join(f"{name}: {value}" for name, value in self._fields)
+
+    def _parse(self) -> list[tuple[str, str]]:
+        if self._fields is None:
+            fields = []
+            for line in self._raw.split(INDENT):
+                name, separator, value = line.partition(":")
+                if separator:
+                    fields.append((name.strip(), value.strip()))
+            self._fields = fields
+            self._raw = self._raw_lower = None
+        return self._fields
+
+    def _get_index(self) -> dict[str, list[int]]:
+        if self._index is None:
+            index = {}
+            for position, (name, _) in enumerate(self._parse()):
+                index.setdefault(name.lower(), []).append(position)
+            self._index = index
+        return self._index
+
+    def _scan_raw(self, name: str) -> list[str]:
+        if self._raw_lower is None:
+            self._raw_lower = self._raw.lower()
+
+        needle = INDENT + name.lower() + ":"
+        values = []
+        start = 0
+        while True:
+            position = self._raw_lower.find(needle, start)
+            if position == -1:
+                return values
+
+            value_start = position + len(needle)
+            value_end = self._raw.find(INDENT, value_start)
+            if value_end == -1:
+                value_end = len(self._raw)
+            values.append(self._raw[value_start:value_end].strip())
+            start = value_end
+
+    def get_all(self, name: str) -> list[str]:
+        if self._fields is None:
+            return self._scan_raw(name)
+        fields = self._fields
+        return [fields[position][1] for position in self._get_index().get(name.lower(), ())]
+
+    def multi_items(self) -> list[tuple[str, str]]:
+        return list(self._parse())
+
+    def add(self, name: str, value: str):
+        self._parse().append((name, str(value)))
+        self._index = None
+
+    def set_all(self, name: str, values: Iterable[str]):
+        self.pop(name, None)
+        for value in values:
+            self.add(name, value)
+
+    def __getitem__(self, name: str) -> str:
+        values = self.get_all(name)
+        if not values:
+            raise KeyError(name)
+        return values[0] if len(values) == 1 else ", ".join(values)
+
+    def __setitem__(self, name: str, value: str):
+        lower_name = name.lower()
+        fields = [field for field in self._parse() if field[0].lower() != lower_name]
+        fields.append((name, str(value)))
+        self._fields = fields
+        self._index = None
+
+    def __delitem__(self, name: str):
+        lower_name = name.lower()
+        fields = [field for field in self._parse() if field[0].lower() != lower_name]
+        if len(fields) == len(self._fields):
+            raise KeyError(name)
+        self._fields = fields
+        self._index = None
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and bool(self.get_all(name))
+
+    def __iter__(self) -> Iterator[str]:
+        seen = set()
+        for name, _ in self._parse():
+            lower_name = name.lower()
+            if lower_name not in seen:
+                seen.add(lower_name)
+                yield name
+
+    def __len__(self) -> int:
+        return len(self._get_index())
+
+    def copy(self) -> "Headers":
+        return Headers(self)
+
+    def __repr__(self):
+        return f"Headers({self.multi_items()})"
@@ -0,0 +1,409 @@
+from .exceptions import HPACKError
+
+
+DEFAULT_TABLE_SIZE = 4096
+# RFC 7541 4.1: every entry costs its name and value length plus 32 bytes.
+ENTRY_OVERHEAD = 32
+
+STATIC_TABLE = (
+    (":authority", ""),
+    (":method", "GET"),
+    (":method", "POST"),
+    (":path", "/"),
+    (":path", "/index.html"),
+    (":scheme", "http"),
+    (":scheme", "https"),
+    (":status", "200"),
+    (":status", "204"),
+    (":status", "206"),
+    (":status", "304"),
+    (":status", "400"),
+    (":status", "404"),
+    (":status", "500"),
+    ("accept-charset", ""),
+    ("accept-encoding", "gzip, deflate"),
+    ("accept-language", ""),
+    ("accept-ranges", ""),
+    ("accept", ""),
+    ("access-control-allow-origin", ""),
+    ("age", ""),
+    ("allow", ""),
+    ("authorization", ""),
+    ("cache-control", ""),
+    ("content-disposition", ""),
+    ("content-encoding", ""),
+    ("content-language", ""),
+    ("content-length", ""),
+    ("content-location", ""),
+    ("content-range", ""),
+    ("content-type", ""),
+    ("cookie", ""),
+    ("date", ""),
+    ("etag", ""),
+    ("expect", ""),
+    ("expires", ""),
+    ("from", ""),
+    ("host", ""),
+    ("if-match", ""),
+    ("if-modified-since", ""),
+    ("if-none-match", ""),
+    ("if-range", ""),
+    ("if-unmodified-since", ""),
+    ("last-modified", ""),
+    ("link", ""),
+    ("location", ""),
+    ("max-forwards", ""),
+    ("proxy-authenticate", ""),
+    ("proxy-authorization", ""),
+    ("range", ""),
+    ("referer", ""),
+    ("refresh", ""),
+    ("retry-after", ""),
+    ("server", ""),
+    ("set-cookie", ""),
+    ("strict-transport-security", ""),
+    ("transfer-encoding", ""),
+    ("user-agent", ""),
+    ("vary", ""),
+    ("via", ""),
+    ("www-authenticate", ""),
+)
+
+# (code, bit length) for every byte value followed by EOS, RFC 7541 Appendix B.
+HUFFMAN_CODES = (
+    (0x1ff8, 13), (0x7fffd8, 23), (0xfffffe2, 28), (0xfffffe3, 28), (0xfffffe4, 28), (0xfffffe5, 28),
+    (0xfffffe6, 28), (0xfffffe7, 28), (0xfffffe8, 28), (0xffffea, 24), (0x3ffffffc, 30), (0xfffffe9, 28),
+    (0xfffffea, 28), (0x3ffffffd, 30), (0xfffffeb, 28), (0xfffffec, 28), (0xfffffed, 28), (0xfffffee, 28),
+    (0xfffffef, 28), (0xffffff0, 28), (0xffffff1, 28), (0xffffff2, 28), (0x3ffffffe, 30), (0xffffff3, 28),
+    (0xffffff4, 28), (0xffffff5, 28), (0xffffff6, 28), (0xffffff7, 28), (0xffffff8, 28), (0xffffff9, 28),
+    (0xffffffa, 28), (0xffffffb, 28), (0x14, 6), (0x3f8, 10), (0x3f9, 10), (0xffa, 12),
+    (0x1ff9, 13), (0x15, 6), (0xf8, 8), (0x7fa, 11), (0x3fa, 10), (0x3fb, 10),
+    (0xf9, 8), (0x7fb, 11), (0xfa, 8), (0x16, 6), (0x17, 6), (0x18, 6),
+    (0x0, 5), (0x1, 5), (0x2, 5), (0x19, 6), (0x1a, 6), (0x1b, 6),
+    (0x1c, 6), (0x1d, 6), (0x1e, 6), (0x1f, 6), (0x5c, 7), (0xfb, 8),
+    (0x7ffc, 15), (0x20, 6), (0xffb, 12), (0x3fc, 10), (0x1ffa, 13), (0x21, 6),
+    (0x5d, 7), (0x5e, 7), (0x5f, 7), (0x60, 7), (0x61, 7), (0x62, 7),
+    (0x63, 7), (0x64, 7), (0x65, 7), (0x66, 7), (0x67, 7), (0x68, 7),
+    (0x69, 7), (0x6a, 7), (0x6b, 7), (0x6c, 7), (0x6d, 7), (0x6e, 7),
+    (0x6f, 7), (0x70, 7), (0x71, 7), (0x72, 7), (0xfc, 8), (0x73, 7),
+    (0xfd, 8), (0x1ffb, 13), (0x7fff0, 19), (0x1ffc, 13), (0x3ffc, 14), (0x22, 6),
+    (0x7ffd, 15), (0x3, 5), (0x23, 6), (0x4, 5), (0x24, 6), (0x5, 5),
+    (0x25, 6), (0x26, 6), (0x27, 6), (0x6, 5), (0x74, 7), (0x75, 7),
+    (0x28, 6), (0x29, 6), (0x2a, 6), (0x7, 5), (0x2b, 6), (0x76, 7),
+    (0x2c, 6), (0x8, 5), (0x9, 5), (0x2d, 6), (0x77, 7), (0x78, 7),
+    (0x79, 7), (0x7a, 7), (0x7b, 7), (0x7ffe, 15), (0x7fc, 11), (0x3ffd, 14),
+    (0x1ffd, 13), (0xffffffc, 28), (0xfffe6, 20), (0x3fffd2, 22), (0xfffe7, 20), (0xfffe8, 20),
+    (0x3fffd3, 22), (0x3fffd4, 22), (0x3fffd5, 22), (0x7fffd9, 23), (0x3fffd6, 22), (0x7fffda, 23),
+    (0x7fffdb, 23), (0x7fffdc, 23), (0x7fffdd, 23), (0x7fffde, 23), (0xffffeb, 24), (0x7fffdf, 23),
+    (0xffffec, 24), (0xffffed, 24), (0x3fffd7, 22), (0x7fffe0, 23), (0xffffee, 24), (0x7fffe1, 23),
+    (0x7fffe2, 23), (0x7fffe3, 23), (0x7fffe4, 23), (0x1fffdc, 21), (0x3fffd8, 22), (0x7fffe5, 23),
+    (0x3fffd9, 22), (0x7fffe6, 23), (0x7fffe7, 23), (0xffffef, 24), (0x3fffda, 22), (0x1fffdd, 21),
+    (0xfffe9, 20), (0x3fffdb, 22), (0x3fffdc, 22), (0x7fffe8, 23), (0x7fffe9, 23), (0x1fffde, 21),
+    (0x7fffea, 23), (0x3fffdd, 22), (0x3fffde, 22), (0xfffff0, 24), (0x1fffdf, 21), (0x3fffdf, 22),
+    (0x7fffeb, 23), (0x7fffec, 23), (0x1fffe0, 21), (0x1fffe1, 21), (0x3fffe0, 22), (0x1fffe2, 21),
+    (0x7fffed, 23), (0x3fffe1, 22), (0x7fffee, 23), (0x7fffef, 23), (0xfffea, 20), (0x3fffe2, 22),
+    (0x3fffe3, 22), (0x3fffe4, 22), (0x7ffff0, 23), (0x3fffe5, 22), (0x3fffe6, 22), (0x7ffff1, 23),
+    (0x3ffffe0, 26), (0x3ffffe1, 26), (0xfffeb, 20), (0x7fff1, 19), (0x3fffe7, 22), (0x7ffff2, 23),
+    (0x3fffe8, 22), (0x1ffffec, 25), (0x3ffffe2, 26), (0x3ffffe3, 26), (0x3ffffe4, 26), (0x7ffffde, 27),
+    (0x7ffffdf, 27), (0x3ffffe5, 26), (0xfffff1, 24), (0x1ffffed, 25), (0x7fff2, 19), (0x1fffe3, 21),
+    (0x3ffffe6, 26), (0x7ffffe0, 27), (0x7ffffe1, 27), (0x3ffffe7, 26), (0x7ffffe2, 27), (0xfffff2, 24),
+    (0x1fffe4, 21), (0x1fffe5, 21), (0x3ffffe8, 26), (0x3ffffe9, 26), (0xffffffd, 28), (0x7ffffe3, 27),
+    (0x7ffffe4, 27), (0x7ffffe5, 27), (0xfffec, 20), (0xfffff3, 24), (0xfffed, 20), (0x1fffe6, 21),
+    (0x3fffe9, 22), (0x1fffe7, 21), (0x1fffe8, 21), (0x7ffff3, 23), (0x3fffea, 22), (0x3fffeb, 22),
+    (0x1ffffee, 25), (0x1ffffef, 25), (0xfffff4, 24), (0xfffff5, 24), (0x3ffffea, 26), (0x7ffff4, 23),
+    (0x3ffffeb, 26), (0x7ffffe6, 27), (0x3ffffec, 26), (0x3ffffed, 26), (0x7ffffe7, 27), (0x7ffffe8, 27),
+    (0x7ffffe9, 27), (0x7ffffea, 27), (0x7ffffeb, 27), (0xffffffe, 28), (0x7ffffec, 27), (0x7ffffed, 27),
+    (0x7ffffee, 27), (0x7ffffef, 27), (0x7fffff0, 27), (0x3ffffee, 26), (0x3fffffff, 30),
+)
+
+EOS = 256
+# Headers whose values must never enter a compression context, RFC 7541 7.1.3.
+NEVER_INDEXED_HEADERS = ("authorization", "proxy-authorization", "set-cookie")
+
+
+def _build_huffman_decoder() -> list[tuple[int, int, bool]]:
+    # Huffman codes are decoded four bits at a time through a state machine over the code tree.
+    # Every code is at least five bits long, so a nibble completes at most one symbol.
+    children = [[None, None]]
+    symbols = [None]
+    for symbol, (code, length) in enumerate(HUFFMAN_CODES):
+        node = 0
+        for bit_index in range(length - 1, -1, -1):
+            bit = (code >> bit_index) & 1
+            if children[node][bit] is None:
+                children.append([None, None])
+                symbols.append(None)
+                children[node][bit] = len(children) - 1
+            node = children[node][bit]
+        symbols[node] = symbol
+
+    # Padding is a prefix of EOS shorter than eight bits, so only all-ones paths of up to seven bits may end a string.
+    accepting = {0}
+    node = 0
+    for _ in range(7):
+        node = children[node][1]
+        accepting.add(node)
+
+    transitions = []
+    for state in range(len(children)):
+        for nibble in range(16):
+            node = state
+            emitted = -1
+            for bit_index in range(3, -1, -1):
+                node = children[node][(nibble >> bit_index) & 1] if node is not None else None
+                if node is None:
+                    break
+                if symbols[node] is not None:
+                    emitted = symbols[node]
+                    node = 0
+            if node is None or emitted == EOS or symbols[state] is not None:
+                transitions.append((-1, -1, False))
+            else:
+                transitions.append((node, emitted, node in accepting))
+    return transitions
+
+
+HUFFMAN_DECODER = _build_huffman_decoder()
+
+
+def huffman_encode(data: bytes) -> bytes:
+    bits = 0
+    bits_count = 0
+    for byte in data:
+        code, length = HUFFMAN_CODES[byte]
+        bits = (bits << length) | code
+        bits_count += length
+
+    padding = -bits_count % 8
+    bits = (bits << padding) | ((1 << padding) - 1)
+    return bits.to_bytes((bits_count + padding) // 8, "big")
+
+
+def huffman_encoded_length(data: bytes) -> int:
+    return (sum(HUFFMAN_CODES[byte][1] for byte in data) + 7) // 8
+
+
+def huffman_decode(data: bytes | memoryview) -> bytes:
+    decoder = HUFFMAN_DECODER
+    decoded = bytearray()
+    state = 0
+    accepting = True
+    for byte in data:
+        for nibble in (byte >> 4, byte & 0x0F):
+            state, symbol, accepting = decoder[state * 16 + nibble]
+            if state == -1:
+                raise HPACKError("Invalid Huffman code")
+            if symbol != -1:
+                decoded.append(symbol)
+
+    if not accepting:
+        raise HPACKError("Invalid Huffman padding")
+    return bytes(decoded)
+
+
+def encode_integer(value: int, prefix_bits: int, flags: int = 0) -> bytearray:
+    max_prefix = (1 << prefix_bits) - 1
+    if value < max_prefix:
+        return bytearray((flags | value,))
+
+    encoded = bytearray((flags | max_prefix,))
+    value -= max_prefix
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return encoded
+
+
+def decode_integer(data: bytes | memoryview, position: int, prefix_bits: int) -> tuple[int, int]:
+    max_prefix = (1 << prefix_bits) - 1
+    try:
+        value = data[position] & max_prefix
+        position += 1
+        if value < max_prefix:
+            return value, position
+
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            value += (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value, position
+            if shift > 28:
+                raise HPACKError("Integer is too large")
+    except IndexError:
+        raise HPACKError("Truncated integer") from None
+
+
+def encode_string(value: bytes) -> bytearray:
+    huffman_length = huffman_encoded_length(value)
+    if huffman_length < len(value):
+        encoded = encode_integer(huffman_length, 7, 0x80)
+        encoded += huffman_encode(value)
+    else:
+        encoded = encode_integer(len(value), 7)
+        encoded += value
+    return encoded
+
+
+def decode_string(data: bytes | memoryview, position: int) -> tuple[bytes, int]:
+    huffman = bool(data[position] & 0x80) if position < len(data) else False
+    length, position = decode_integer(data, position, 7)
+    end = position + length
+    if end > len(data):
+        raise HPACKError("Truncated string")
+
+    value = data[position:end]
+    return (huffman_decode(value) if huffman else bytes(value)), end
+
+
+class HeaderTable:
+    def __init__(self, max_size: int = DEFAULT_TABLE_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        # Newest entries are at the end, so dynamic index 62 is the last element.
+        self._entries: list[tuple[str, str]] = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, index: int) -> tuple[str, str]:
+        if 0 < index <= len(STATIC_TABLE):
+            return STATIC_TABLE[index - 1]
+
+        dynamic_index = index - len(STATIC_TABLE)
+        if 0 < dynamic_index <= len(self._entries):
+            return self._entries[-dynamic_index]
+        raise HPACKError(f"Invalid header table index {index}")
+
+    def add(self, name: str, value: str):
+        entry_size = len(name) + len(value) + ENTRY_OVERHEAD
+        if entry_size > self.max_size:
+            self._entries.clear()
+            self.size = 0
+            return
+
+        self._entries.append((name, value))
+        self.size += entry_size
+        self._evict()
+
+    def resize(self, max_size: int):
+        self.max_size = max_size
+        self._evict()
+
+    def _evict(self):
+        evicted_count = 0
+        while self.size > self.max_size:
+            name, value = self._entries[evicted_count]
+            self.size -= len(name) + len(value) + ENTRY_OVERHEAD
+            evicted_count += 1
+        if evicted_count:
+            del self._entries[:evicted_count]
+
+    def search(self, name: str, value: str) -> tuple[int, bool]:
+        # Returns the best index and whether the value matched too; the index is 0 when nothing matched.
+        static_index = STATIC_FULL_INDEX.get((name, value))
+        if static_index:
+            return static_index, True
+
+        name_index = STATIC_NAME_INDEX.get(name, 0)
+        entries = self._entries
+        for position in range(len(entries) - 1, -1, -1):
+            entry_name, entry_value = entries[position]
+            if entry_name == name:
+                index = len(STATIC_TABLE) + len(entries) - position
+                if entry_value == value:
+                    return index, True
+                if not name_index:
+                    name_index = index
+        return name_index, False
+
+
+STATIC_FULL_INDEX = {entry: index for index, entry in enumerate(STATIC_TABLE, 1)}
+STATIC_NAME_INDEX = {}
+for _index, (_name, _) in enumerate(STATIC_TABLE, 1):
+    STATIC_NAME_INDEX.setdefault(_name, _index)
+
+
+class Encoder:
+    def __init__(self):
+        self.table = HeaderTable()
+        self._pending_size_update: int | None = None
+
+    def resize(self, max_size: int):
+        # The peer's SETTINGS_HEADER_TABLE_SIZE caps our table; the change is announced in the next block.
+        if max_size != self.table.max_size:
+            self.table.resize(max_size)
+            self._pending_size_update = max_size
+
+    def encode(self, headers: list[tuple[str, str]]) -> bytes:
+        encoded = bytearray()
+        if self._pending_size_update is not None:
+            encoded += encode_integer(self._pending_size_update, 5, 0x20)
+            self._pending_size_update = None
+
+        for name, value in headers:
+            index, value_matched = self.table.search(name, value)
+            if value_matched:
+                encoded += encode_integer(index, 7, 0x80)
+                continue
+
+            if name in NEVER_INDEXED_HEADERS or (name == "cookie" and len(value) < 20):
+                encoded += encode_integer(index, 4, 0x10)
+            else:
+                encoded += encode_integer(index, 6, 0x40)
+                self.table.add(name, value)
+
+            if not index:
+                encoded += encode_string(name.encode("latin-1"))
+            encoded += encode_string(value.encode("latin-1"))
+        return bytes(encoded)
+
+
+class Decoder:
+    def __init__(self, max_table_size: int = DEFAULT_TABLE_SIZE, max_header_list_size: int = 256 * 1024):
+        self.table = HeaderTable(max_table_size)
+        self.max_table_size = max_table_size
+        self.max_header_list_size = max_header_list_size
+
+    def decode(self, data: bytes | memoryview) -> list[tuple[str, str]]:
+        headers = []
+        header_list_size = 0
+        position = 0
+        while position < len(data):
+            byte = data[position]
+            if byte & 0x80:
+                index, position = decode_integer(data, position, 7)
+                if not index:
+                    raise HPACKError("Index 0 is not allowed")
+                headers.append(self.table.get(index))
+            elif byte & 0xE0 == 0x20:
+                if headers:
+                    raise HPACKError("Table size update after header fields")
+                max_size, position = decode_integer(data, position, 5)
+                if max_size > self.max_table_size:
+                    raise HPACKError("Table size update exceeds the advertised limit")
+                self.table.resize(max_size)
+                continue
+            else:
+                # Literal with incremental indexing uses a 6-bit prefix; without or never indexed use 4 bits.
+                indexing = bool(byte & 0x40)
+                index, position = decode_integer(data, position, 6 if indexing else 4)
+                if index:
+                    name = self.table.get(index)[0]
+                else:
+                    name_bytes, position = decode_string(data, position)
+                    name = name_bytes.decode("latin-1")
+                value_bytes, position = decode_string(data, position)
+                value = value_bytes.decode("latin-1")
+                if indexing:
+                    self.table.add(name, value)
+                headers.append((name, value))
+
+            name, value = headers[-1]
+            header_list_size += len(name) + len(value) + ENTRY_OVERHEAD
+            if header_list_size > self.max_header_list_size:
+                raise HPACKError("Header list is too large")
+        return headers
@@ -0,0 +1,696 @@
+import io
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from .connection_pool import HTTPConnection
+from .constants import *
+from .exceptions import HPACKError, HTTP2Error, HTTP2StreamRefused, HTTP2StreamReset
+from .hpack import Decoder, Encoder
+from .http_request import HTTPRequest
+from .utils import get_default_port
+
+
+CONNECTION_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+FRAME_HEADER_SIZE = 9
+DEFAULT_WINDOW_SIZE = 65535
+DEFAULT_MAX_FRAME_SIZE = 16384
+MAX_WINDOW_SIZE = 2 ** 31 - 1
+# The connection-specific headers of HTTP/1.1 are forbidden in HTTP/2, RFC 9113 8.2.2.
+CONNECTION_SPECIFIC_HEADERS = ("connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade", "host")
+
+
+def get_request_headers(http_request: HTTPRequest) -> list[tuple[str, str]]:
+    authority = http_request.hostname
+    if http_request.port != get_default_port(http_request.protocol):
+        authority += f":{http_request.port}"
+
+    headers = [(":method", http_request.method), (":scheme", http_request.protocol),
+               (":authority", authority), (":path", http_request.target)]
+    for header, value in http_request.content_headers:
+        if header.lower() not in CONNECTION_SPECIFIC_HEADERS:
+            headers.append((header.lower(), value))
+
+    for header, value in http_request.request_headers.items():
+        header = header.lower()
+        if header in CONNECTION_SPECIFIC_HEADERS or (header == "te" and value.lower() != "trailers"):
+            continue
+        if header == HTTPHeaders.COOKIE.lower():
+            # Separate cookie fields compress better, RFC 9113 8.2.3.
+            headers.extend((header, cookie) for cookie in value.split("; "))
+        else:
+            headers.append((header, value))
+    return headers
+
+
+class HTTP2Stream:
+    def __init__(self, stream_id: int, send_window: int, receive_window: int):
+        self.stream_id = stream_id
+        self.send_window = send_window
+        self.receive_window = receive_window
+        self.headers: list[tuple[str, str]] | None = None
+        self.trailers: list[tuple[str, str]] | None = None
+        self.data: deque[bytes] = deque()
+        self.buffered_size = 0
+        self.unacked_size = 0
+        self.local_closed = False
+        self.remote_closed = False
+        self.cancelled = False
+        self.error: Exception | None = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        # The reader thread owns the socket, so timeouts apply to waiting for this stream's frames.
+        self.read_timeout: float | None = None
+        self.deadline: float | None = None
+
+    def get_wait_deadline(self) -> float | None:
+        if self.read_timeout is None:
+            return self.deadline
+        read_deadline = time.monotonic() + self.read_timeout
+        return read_deadline if self.deadline is None else min(self.deadline, read_deadline)
+
+    @property
+    def finished(self) -> bool:
+        return (self.remote_closed and not self.data) or self.cancelled or self.error is not None
+
+
+class HTTP2Connection:
+    def __init__(self,
+                 connection: HTTPConnection,
+                 *,
+                 on_close: Callable[["HTTP2Connection"], None] | None = None,
+                 stream_window_size: int = 1024 * 1024,
+                 connection_window_size: int = 16 * 1024 * 1024,
+                 max_header_list_size: int = 256 * 1024):
+        self.connection = connection
+        self.sock = connection.sock
+        # The reader thread blocks between frames, so only waits for streams time out.
+        self.sock.settimeout(None)
+        self.streams_count = 0
+        self.closed = False
+        self._on_close = on_close
+        self._encoder = Encoder()
+        self._decoder = Decoder(max_header_list_size=max_header_list_size)
+        # Lock order is _write_lock, then _condition. The reader thread never waits for _write_lock:
+        # its frames are queued and sent by whichever thread holds or next takes the lock.
+        self._write_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._queued_frames: deque[bytes] = deque()
+        self._pending_header_table_size: int | None = None
+        self._streams: dict[int, HTTP2Stream] = {}
+        self._next_stream_id = 1
+        self._goaway_received = False
+        self._error: Exception | None = None
+        self._header_block: tuple[int, bool, bytearray] | None = None
+
+        self._max_concurrent_streams = 100
+        self._max_frame_size = DEFAULT_MAX_FRAME_SIZE
+        self._initial_send_window = DEFAULT_WINDOW_SIZE
+        self._send_window = DEFAULT_WINDOW_SIZE
+        self._stream_window_size = stream_window_size
+        self._connection_window_size = connection_window_size
+        self._receive_window = connection_window_size
+        self._unacked_size = 0
+
+        settings = {
+            HTTP2Settings.ENABLE_PUSH: 0,
+            HTTP2Settings.INITIAL_WINDOW_SIZE: stream_window_size,
+            HTTP2Settings.MAX_HEADER_LIST_SIZE: max_header_list_size,
+        }
+        settings_payload = b"".join(setting.to_bytes(2, "big") + value.to_bytes(4, "big")
+                                    for setting, value in settings.items())
+        window_increment = (connection_window_size - DEFAULT_WINDOW_SIZE).to_bytes(4, "big")
+        self.sock.sendall(CONNECTION_PREFACE
+                          + self._create_frame(HTTP2FrameTypes.SETTINGS, 0, 0, settings_payload)
+                          + self._create_frame(HTTP2FrameTypes.WINDOW_UPDATE, 0, 0, window_increment))
+
+        self._reader_thread = threading.Thread(target=self._read_frames, name="PyHTTP-h2-reader", daemon=True)
+        self._reader_thread.start()
+
+    @property
+    def is_available(self) -> bool:
+        return not self.closed and not self._goaway_received and self._next_stream_id < MAX_WINDOW_SIZE
+
+    @property
+    def active_streams_count(self) -> int:
+        with self._condition:
+            return len(self._streams)
+
+    @staticmethod
+    def _create_frame(frame_type: int, flags: int, stream_id: int, payload: bytes | memoryview = b"") -> bytes:
+        return (len(payload).to_bytes(3, "big") + bytes((frame_type, flags)) + stream_id.to_bytes(4, "big")
+                + bytes(payload))
+
+    def _send(self, data: bytes):
+        if threading.current_thread() is self._reader_thread:
+            # A writer may be blocked on a full socket buffer, and the reader must keep reading meanwhile.
+            self._queued_frames.append(data)
+        else:
+            with self._write_lock:
+                self.sock.sendall(self._take_queued_frames() + data)
+        self._send_queued_frames()
+
+    def _take_queued_frames(self) -> bytes:
+        frames = []
+        while self._queued_frames:
+            frames.append(self._queued_frames.popleft())
+        return b"".join(frames)
+
+    def _send_queued_frames(self):
+        while self._queued_frames and self._write_lock.acquire(blocking=False):
+            try:
+                self.sock.sendall(self._take_queued_frames())
+            finally:
+                self._write_lock.release()
+
+    def _send_frame(self, frame_type: int, flags: int, stream_id: int, payload: bytes | memoryview = b""):
+        self._send(self._create_frame(frame_type, flags, stream_id, payload))
+
+    def _send_header_block(self, stream_id: int, header_block: bytes, end_stream: bool):
+        frames = []
+        max_frame_size = self._max_frame_size
+        first_chunk, rest = header_block[:max_frame_size], header_block[max_frame_size:]
+        flags = (HTTP2Flags.END_STREAM if end_stream else 0) | (0 if rest else HTTP2Flags.END_HEADERS)
+        frames.append(self._create_frame(HTTP2FrameTypes.HEADERS, flags, stream_id, first_chunk))
+        while rest:
+            chunk, rest = rest[:max_frame_size], rest[max_frame_size:]
+            frames.append(self._create_frame(HTTP2FrameTypes.CONTINUATION, 0 if rest else HTTP2Flags.END_HEADERS,
+                                             stream_id, chunk))
+        # Queued frames go first, so a SETTINGS acknowledgement precedes the table size update it allows.
+        self.sock.sendall(self._take_queued_frames() + b"".join(frames))
+
+    def open_stream(self, headers: list[tuple[str, str]], end_stream: bool,
+                    deadline: float | None = None) -> HTTP2Stream:
+        while True:
+            with self._condition:
+                self._raise_if_unavailable()
+                while len(self._streams) >= self._max_concurrent_streams:
+                    self._wait(deadline)
+                    self._raise_if_unavailable()
+
+            # Stream ids must reach the server in increasing order, and the encoder state is shared,
+            # so both are handled under the write lock.
+            with self._write_lock:
+                with self._condition:
+                    self._raise_if_unavailable()
+                    if len(self._streams) >= self._max_concurrent_streams:
+                        continue
+                    stream_id = self._next_stream_id
+                    self._next_stream_id += 2
+                    stream = HTTP2Stream(stream_id, self._initial_send_window, self._stream_window_size)
+                    stream.local_closed = end_stream
+                    self._streams[stream_id] = stream
+                    self.streams_count += 1
+                    header_table_size, self._pending_header_table_size = self._pending_header_table_size, None
+                if header_table_size is not None:
+                    self._encoder.resize(header_table_size)
+                header_block = self._encoder.encode(headers)
+                stream.bytes_sent += len(header_block)
+                self._send_header_block(stream_id, header_block, end_stream)
+            self._send_queued_frames()
+            return stream
+
+    def _raise_if_unavailable(self):
+        if self._error is not None:
+            raise HTTP2StreamRefused(f"Connection failed: {self._error}")
+        if not self.is_available:
+            raise HTTP2StreamRefused("Connection does not accept new streams")
+
+    def send_data(self, stream: HTTP2Stream, data: bytes | bytearray | memoryview, end_stream: bool = False):
+        deadline = stream.get_wait_deadline()
+        view = memoryview(data).cast("B")
+        while view.nbytes or end_stream:
+            with self._condition:
+                while True:
+                    if stream.error is not None:
+                        raise stream.error
+                    if stream.remote_closed or stream.cancelled:
+                        # The server already answered, so the rest of the body is not needed.
+                        return
+                    window = min(self._send_window, stream.send_window, self._max_frame_size)
+                    if window > 0 or not view.nbytes:
+                        break
+                    self._wait(deadline)
+
+                size = min(window, view.nbytes)
+                self._send_window -= size
+                stream.send_window -= size
+                chunk, view = view[:size], view[size:]
+                stream.bytes_sent += size
+                last_frame = end_stream and not view.nbytes
+                if last_frame:
+                    stream.local_closed = True
+
+            self._send_frame(HTTP2FrameTypes.DATA, HTTP2Flags.END_STREAM if last_frame else 0,
+                             stream.stream_id, chunk)
+            if last_frame:
+                return
+
+    def send_request(self, http_request: HTTPRequest, deadline: float | None = None,
+                     read_timeout: float | None = None) -> HTTP2Stream:
+        body_bytes = http_request.body_bytes
+        body_stream = http_request.body_stream
+        has_body = bool(memoryview(body_bytes).nbytes) or body_stream is not None
+
+        # A peer which never frees a stream slot or the flow-control window fails the request like
+        # one which never answers it.
+        open_deadline = deadline
+        if read_timeout is not None:
+            read_deadline = time.monotonic() + read_timeout
+            open_deadline = read_deadline if deadline is None else min(deadline, read_deadline)
+        stream = self.open_stream(get_request_headers(http_request), not has_body, open_deadline)
+        stream.read_timeout = read_timeout
+        stream.deadline = deadline
+        try:
+            if body_stream is not None:
+                if memoryview(body_bytes).nbytes:
+                    self.send_data(stream, body_bytes)
+                for chunk in body_stream.iter_chunks():
+                    self.send_data(stream, chunk)
+                self.send_data(stream, b"", end_stream=True)
+            elif has_body:
+                self.send_data(stream, body_bytes, end_stream=True)
+        except BaseException:
+            self.reset_stream(stream)
+            raise
+        return stream
+
+    def _wait(self, deadline: float | None):
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise TimeoutError("Request timed out")
+        self._condition.wait(timeout)
+
+    def wait_for_headers(self, stream: HTTP2Stream) -> list[tuple[str, str]]:
+        deadline = stream.get_wait_deadline()
+        with self._condition:
+            while stream.headers is None:
+                if stream.error is not None:
+                    raise stream.error
+                if stream.cancelled:
+                    raise HTTP2StreamReset(f"Stream {stream.stream_id} was cancelled", HTTP2ErrorCodes.CANCEL)
+                if stream.remote_closed:
+                    raise HTTP2Error("Stream ended without response headers", HTTP2ErrorCodes.PROTOCOL_ERROR)
+                self._wait(deadline)
+            return stream.headers
+
+    def read_data(self, stream: HTTP2Stream, size: int = -1) -> bytes:
+        deadline = stream.get_wait_deadline()
+        with self._condition:
+            while not stream.data:
+                if stream.error is not None:
+                    raise stream.error
+                if stream.remote_closed or stream.cancelled:
+                    return b""
+                self._wait(deadline)
+
+            chunk = stream.data.popleft()
+            if 0 <= size < len(chunk):
+                chunk, rest = chunk[:size], chunk[size:]
+                stream.data.appendleft(rest)
+            stream.buffered_size -= len(chunk)
+            window_updates = self._acknowledge_data(stream, len(chunk))
+
+        self._send_window_updates(window_updates)
+        return chunk
+
+    def _acknowledge_data(self, stream: HTTP2Stream | None, size: int) -> list[tuple[int, int]]:
+        # Consumed bytes are handed back to the server once half of a window has been read.
+        window_updates = []
+        self._unacked_size += size
+        if self._unacked_size >= self._connection_window_size // 2:
+            window_updates.append((0, self._unacked_size))
+            self._receive_window += self._unacked_size
+            self._unacked_size = 0
+
+        if stream is not None and not stream.remote_closed and not stream.cancelled:
+            stream.unacked_size += size
+            if stream.unacked_size >= self._stream_window_size // 2:
+                window_updates.append((stream.stream_id, stream.unacked_size))
+                stream.receive_window += stream.unacked_size
+                stream.unacked_size = 0
+        return window_updates
+
+    def _send_window_updates(self, window_updates: list[tuple[int, int]]):
+        if not window_updates or self.closed:
+            return
+        try:
+            self._send(b"".join(self._create_frame(HTTP2FrameTypes.WINDOW_UPDATE, 0, stream_id,
+                                                   increment.to_bytes(4, "big"))
+                                for stream_id, increment in window_updates))
+        except OSError as error:
+            self._fail(error)
+
+    def reset_stream(self, stream: HTTP2Stream, error_code: int = HTTP2ErrorCodes.CANCEL):
+        with self._condition:
+            # Streams that the server already closed or reset are only dropped locally.
+            send_reset = stream.stream_id in self._streams and not stream.cancelled
+            stream.cancelled = True
+            discarded_size = stream.buffered_size
+            stream.data.clear()
+            stream.buffered_size = 0
+            self._remove_stream(stream.stream_id)
+            # Discarded data still counts against the connection window, so it is returned as consumed.
+            window_updates = self._acknowledge_data(None, discarded_size)
+            self._condition.notify_all()
+
+        if send_reset and not self.closed:
+            try:
+                self._send_frame(HTTP2FrameTypes.RST_STREAM, 0, stream.stream_id, error_code.to_bytes(4, "big"))
+            except OSError as error:
+                self._fail(error)
+        self._send_window_updates(window_updates)
+
+    def _remove_stream(self, stream_id: int):
+        if self._streams.pop(stream_id, None) is not None:
+            self._condition.notify_all()
+            if self._goaway_received and not self._streams:
+                threading.Thread(target=self.close, daemon=True).start()
+
+    def _read_frames(self):
+        reader = self.connection.reader
+        try:
+            while True:
+                frame_header = reader.read_exact(FRAME_HEADER_SIZE)
+                length = int.from_bytes(frame_header[:3], "big")
+                frame_type = frame_header[3]
+                flags = frame_header[4]
+                stream_id = int.from_bytes(frame_header[5:], "big") & 0x7FFFFFFF
+                if length > DEFAULT_MAX_FRAME_SIZE:
+                    raise HTTP2Error("Frame exceeds the maximum frame size", HTTP2ErrorCodes.FRAME_SIZE_ERROR)
+                payload = reader.read_exact(length) if length else b""
+                self._process_frame(frame_type, flags, stream_id, payload)
+        except HTTP2Error as error:
+            self._fail(error, error.error_code)
+        except (OSError, ValueError) as error:
+            self._fail(error)
+
+    def _process_frame(self, frame_type: int, flags: int, stream_id: int, payload: bytes):
+        if self._header_block is not None and (frame_type != HTTP2FrameTypes.CONTINUATION
+                                               or stream_id != self._header_block[0]):
+            raise HTTP2Error("Expected CONTINUATION frame", HTTP2ErrorCodes.PROTOCOL_ERROR)
+
+        if frame_type == HTTP2FrameTypes.DATA:
+            self._process_data(flags, stream_id, payload)
+        elif frame_type == HTTP2FrameTypes.HEADERS:
+            self._process_headers(flags, stream_id, payload)
+        elif frame_type == HTTP2FrameTypes.CONTINUATION:
+            if self._header_block is None:
+                raise HTTP2Error("Unexpected CONTINUATION frame", HTTP2ErrorCodes.PROTOCOL_ERROR)
+            self._header_block[2].extend(payload)
+            if flags & HTTP2Flags.END_HEADERS:
+                header_stream_id, end_stream, header_block = self._header_block
+                self._header_block = None
+                self._process_header_block(header_stream_id, end_stream, header_block)
+        elif frame_type == HTTP2FrameTypes.RST_STREAM:
+            self._process_rst_stream(stream_id, payload)
+        elif frame_type == HTTP2FrameTypes.SETTINGS:
+            self._process_settings(flags, stream_id, payload)
+        elif frame_type == HTTP2FrameTypes.PING:
+            if len(payload) != 8 or stream_id:
+                raise HTTP2Error("Invalid PING frame", HTTP2ErrorCodes.PROTOCOL_ERROR)
+            if not flags & HTTP2Flags.ACK:
+                self._send_frame(HTTP2FrameTypes.PING, HTTP2Flags.ACK, 0, payload)
+        elif frame_type == HTTP2FrameTypes.GOAWAY:
+            self._process_goaway(payload)
+        elif frame_type == HTTP2FrameTypes.WINDOW_UPDATE:
+            self._process_window_update(stream_id, payload)
+        elif frame_type == HTTP2FrameTypes.PUSH_PROMISE:
+            raise HTTP2Error("Server push is disabled", HTTP2ErrorCodes.PROTOCOL_ERROR)
+
+    @staticmethod
+    def _strip_padding(flags: int, payload: bytes) -> bytes:
+        if not flags & HTTP2Flags.PADDED:
+            return payload
+        if not payload or payload[0] >= len(payload):
+            raise HTTP2Error("Invalid padding", HTTP2ErrorCodes.PROTOCOL_ERROR)
+        return payload[1:len(payload) - payload[0]]
+
+    def _process_data(self, flags: int, stream_id: int, payload: bytes):
+        if not stream_id:
+            raise HTTP2Error("DATA frame on stream 0", HTTP2ErrorCodes.PROTOCOL_ERROR)
+
+        data = self._strip_padding(flags, payload)
+        with self._condition:
+            self._receive_window -= len(payload)
+            if self._receive_window < 0:
+                raise HTTP2Error("Connection flow control window exceeded", HTTP2ErrorCodes.FLOW_CONTROL_ERROR)
+
+            stream = self._streams.get(stream_id)
+            if stream is None or stream.cancelled:
+                window_updates = self._acknowledge_data(None, len(payload))
+            else:
+                stream.receive_window -= len(payload)
+                stream.bytes_received += len(payload)
+                if stream.receive_window < 0:
+                    raise HTTP2Error("Stream flow control window exceeded", HTTP2ErrorCodes.FLOW_CONTROL_ERROR)
+                # Padding is never read by the application, so it is returned to the windows right away.
+                window_updates = self._acknowledge_data(stream, len(payload) - len(data))
+                if data:
+                    stream.data.append(data)
+                    stream.buffered_size += len(data)
+                if flags & HTTP2Flags.END_STREAM:
+                    stream.remote_closed = True
+                    self._remove_stream(stream_id)
+                self._condition.notify_all()
+
+        self._send_window_updates(window_updates)
+
+    def _process_headers(self, flags: int, stream_id: int, payload: bytes):
+        if not stream_id:
+            raise HTTP2Error("HEADERS frame on stream 0", HTTP2ErrorCodes.PROTOCOL_ERROR)
+
+        header_block = self._strip_padding(flags, payload)
+        if flags & HTTP2Flags.PRIORITY:
+            header_block = header_block[5:]
+
+        end_stream = bool(flags & HTTP2Flags.END_STREAM)
+        if flags & HTTP2Flags.END_HEADERS:
+            self._process_header_block(stream_id, end_stream, header_block)
+        else:
+            self._header_block = (stream_id, end_stream, bytearray(header_block))
+
+    def _process_header_block(self, stream_id: int, end_stream: bool, header_block: bytes | bytearray):
+        # Every block is decoded, even for cancelled streams, to keep the HPACK state in sync.
+        try:
+            headers = self._decoder.decode(header_block)
+        except HPACKError as error:
+            raise HTTP2Error(str(error), HTTP2ErrorCodes.COMPRESSION_ERROR) from error
+
+        with self._condition:
+            stream = self._streams.get(stream_id)
+            if stream is None or stream.cancelled:
+                return
+
+            stream.bytes_received += len(header_block)
+            error = None
+            if any("\r" in value or "\n" in value or "\0" in value for _, value in headers):
+                error = HTTP2StreamReset("Invalid header value", HTTP2ErrorCodes.PROTOCOL_ERROR)
+            elif stream.headers is None:
+                status = next((value for name, value in headers if name == ":status"), None)
+                if status is None:
+                    error = HTTP2StreamReset("Response without :status", HTTP2ErrorCodes.PROTOCOL_ERROR)
+                elif status.startswith("1"):
+                    # Informational responses precede the final one and are skipped.
+                    return
+                else:
+                    stream.headers = headers
+            else:
+                stream.trailers = headers
+
+            if error is None:
+                if end_stream:
+                    stream.remote_closed = True
+                    self._remove_stream(stream_id)
+                self._condition.notify_all()
+                return
+
+        self._reset_with_error(stream, error)
+
+    def _reset_with_error(self, stream: HTTP2Stream, error: HTTP2Error):
+        self.reset_stream(stream, error.error_code)
+        with self._condition:
+            stream.error = error
+            self._condition.notify_all()
+
+    def _process_rst_stream(self, stream_id: int, payload: bytes):
+        if len(payload) != 4:
+            raise HTTP2Error("Invalid RST_STREAM frame", HTTP2ErrorCodes.FRAME_SIZE_ERROR)
+
+        error_code = int.from_bytes(payload, "big")
+        with self._condition:
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                return
+
+            if error_code == HTTP2ErrorCodes.REFUSED_STREAM:
+                stream.error = HTTP2StreamRefused(f"Stream {stream_id} was refused", error_code)
+            elif error_code != HTTP2ErrorCodes.NO_ERROR or not stream.remote_closed:
+                stream.error = HTTP2StreamReset(f"Stream {stream_id} was reset with code {error_code}", error_code)
+            stream.cancelled = stream.error is not None
+            self._remove_stream(stream_id)
+            self._condition.notify_all()
+
+    def _process_settings(self, flags: int, stream_id: int, payload: bytes):
+        if stream_id or len(payload) % 6:
+            raise HTTP2Error("Invalid SETTINGS frame", HTTP2ErrorCodes.PROTOCOL_ERROR)
+        if flags & HTTP2Flags.ACK:
+            return
+
+        with self._condition:
+            for position in range(0, len(payload), 6):
+                setting = int.from_bytes(payload[position:position + 2], "big")
+                value = int.from_bytes(payload[position + 2:position + 6], "big")
+                if setting == HTTP2Settings.HEADER_TABLE_SIZE:
+                    # The encoder is only touched under the write lock, right before the next header block.
+                    self._pending_header_table_size = min(value, 4096)
+                elif setting == HTTP2Settings.MAX_CONCURRENT_STREAMS:
+                    self._max_concurrent_streams = value
+                elif setting == HTTP2Settings.INITIAL_WINDOW_SIZE:
+                    if value > MAX_WINDOW_SIZE:
+                        raise HTTP2Error("Invalid initial window size", HTTP2ErrorCodes.FLOW_CONTROL_ERROR)
+                    delta = value - self._initial_send_window
+                    self._initial_send_window = value
+                    for stream in self._streams.values():
+                        stream.send_window += delta
+                elif setting == HTTP2Settings.MAX_FRAME_SIZE:
+                    if not DEFAULT_MAX_FRAME_SIZE <= value <= 2 ** 24 - 1:
+                        raise HTTP2Error("Invalid maximum frame size", HTTP2ErrorCodes.PROTOCOL_ERROR)
+                    self._max_frame_size = value
+            self._condition.notify_all()
+        self._send_frame(HTTP2FrameTypes.SETTINGS, HTTP2Flags.ACK, 0)
+
+    def _process_goaway(self, payload: bytes):
+        if len(payload) < 8:
+            raise HTTP2Error("Invalid GOAWAY frame", HTTP2ErrorCodes.FRAME_SIZE_ERROR)
+
+        last_stream_id = int.from_bytes(payload[:4], "big") & 0x7FFFFFFF
+        error_code = int.from_bytes(payload[4:8], "big")
+        with self._condition:
+            self._goaway_received = True
+            for stream_id, stream in list(self._streams.items()):
+                if stream_id > last_stream_id:
+                    stream.error = HTTP2StreamRefused(f"Stream {stream_id} was not processed", error_code)
+                    self._remove_stream(stream_id)
+            if not self._streams:
+                threading.Thread(target=self.close, daemon=True).start()
+            self._condition.notify_all()
+
+    def _process_window_update(self, stream_id: int, payload: bytes):
+        if len(payload) != 4:
+            raise HTTP2Error("Invalid WINDOW_UPDATE frame", HTTP2ErrorCodes.FRAME_SIZE_ERROR)
+
+        increment = int.from_bytes(payload, "big") & 0x7FFFFFFF
+        with self._condition:
+            if not stream_id:
+                if not increment:
+                    raise HTTP2Error("Zero window increment", HTTP2ErrorCodes.PROTOCOL_ERROR)
+                self._send_window += increment
+                if self._send_window > MAX_WINDOW_SIZE:
+                    raise HTTP2Error("Connection window overflow", HTTP2ErrorCodes.FLOW_CONTROL_ERROR)
+                self._condition.notify_all()
+                return
+
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                return
+            stream.send_window += increment
+            self._condition.notify_all()
+            if increment and stream.send_window <= MAX_WINDOW_SIZE:
+                return
+
+        self._reset_with_error(stream, HTTP2StreamReset("Invalid stream window update",
+                                                        HTTP2ErrorCodes.FLOW_CONTROL_ERROR))
+
+    def _fail(self, error: Exception, error_code: int = HTTP2ErrorCodes.NO_ERROR):
+        with self._condition:
+            if self._error is not None or self.closed:
+                return
+            self._error = error
+            for stream in self._streams.values():
+                if stream.error is None and not stream.remote_closed:
+                    stream.error = HTTP2Error(f"Connection failed: {error!r}")
+            self._streams.clear()
+            self._condition.notify_all()
+        self.close(error_code)
+
+    def close(self, error_code: int = HTTP2ErrorCodes.NO_ERROR):
+        with self._condition:
+            if self.closed:
+                return
+            self.closed = True
+            for stream in self._streams.values():
+                if stream.error is None and not stream.remote_closed:
+                    stream.error = HTTP2Error("Connection closed")
+            self._streams.clear()
+            last_stream_id = 0
+            self._condition.notify_all()
+
+        try:
+            self._send_frame(HTTP2FrameTypes.GOAWAY, 0, 0,
+                             last_stream_id.to_bytes(4, "big") + error_code.to_bytes(4, "big"))
+        except OSError:
+            pass
+        try:
+            # Shutting the socket down wakes the reader thread up.
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        if self._on_close is not None:
+            self._on_close(self)
+
+
+class HTTP2ResponseStream(io.RawIOBase):
+    def __init__(self, connection: HTTP2Connection, stream: HTTP2Stream,
+                 release_callback: Callable[[], None] | None = None):
+        self._connection = connection
+        self._stream = stream
+        self._release_callback = release_callback
+
+    def readable(self) -> bool:
+        return True
+
+    def _release(self):
+        if self._release_callback:
+            release_callback, self._release_callback = self._release_callback, None
+            release_callback()
+
+    def _read_data(self, size: int = -1) -> bytes:
+        try:
+            chunk = self._connection.read_data(self._stream, size)
+        except TimeoutError:
+            self._connection.reset_stream(self._stream)
+            self._release()
+            raise
+        except Exception:
+            self._release()
+            raise
+        if not chunk:
+            self._release()
+        return chunk
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        chunk = self._read_data(view.nbytes)
+        view[:len(chunk)] = chunk
+        return len(chunk)
+
+    def readall(self) -> bytes:
+        chunks = []
+        while True:
+            chunk = self._read_data()
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def close(self):
+        if not self.closed and not self._stream.finished:
+            # Closing before the end cancels only this stream; the connection keeps serving others.
+            self._connection.reset_stream(self._stream)
+        self._release()
+        super().close()
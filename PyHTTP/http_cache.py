@@ -0,0 +1,366 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from .constants import *
+from .http_request import HTTPRequest
+from .http_response import HTTPResponse
+from .response_stream import ContentDecodingStream
+from .utils import join_dict, parse_cache_control, parse_headers
+
+
+class CacheEntry:
+    def __init__(self, http_response: HTTPResponse, vary_headers: dict[str, str | None]):
+        self.status_code = http_response.status_code
+        self.response_headers = http_response.response_headers
+        self.headers = http_response.headers.copy()
+        self.content = http_response.content or b""
+        self.vary_headers = vary_headers
+        self.stored_at = time.time()
+        if isinstance(http_response.raw, ContentDecodingStream):
+            # The content is stored decoded, so the headers must not announce an encoding any more.
+            self.headers.pop(HTTPHeaders.CONTENT_ENCODING, None)
+            self.headers.pop(HTTPHeaders.TRANSFER_ENCODING, None)
+            self.headers[HTTPHeaders.CONTENT_LENGTH] = str(len(self.content))
+            self.update_response_headers()
+
+    @classmethod
+    def from_metadata(cls, metadata: dict, content: bytes) -> "CacheEntry":
+        entry = cls.__new__(cls)
+        entry.status_code = metadata["status_code"]
+        entry.response_headers = metadata["response_headers"]
+        entry.headers = parse_headers(entry.response_headers)["headers"]
+        entry.content = content
+        entry.vary_headers = metadata["vary_headers"]
+        entry.stored_at = metadata["stored_at"]
+        return entry
+
+    def to_metadata(self) -> dict:
+        return {
+            "status_code": self.status_code,
+            "response_headers": self.response_headers,
+            "vary_headers": self.vary_headers,
+            "stored_at": self.stored_at,
+        }
+
+    def update_response_headers(self):
+        self.response_headers = self.response_headers.split(INDENT, 1)[0] + INDENT + self.headers.raw
+
+    @property
+    def size(self) -> int:
+        return len(self.content) + len(self.response_headers)
+
+    def create_response(self, cache_status: str) -> HTTPResponse:
+        http_response = HTTPResponse(hand_init=True)
+        http_response.initialize_headers(self.response_headers)
+        http_response.content = self.content
+        http_response.initialize_cookies()
+        http_response.cache_status = cache_status
+        return http_response
+
+
+class BaseCacheStorage(ABC):
+
+    @abstractmethod
+    def get(self, key: str) -> CacheEntry | None:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+
+class MemoryCacheStorage(BaseCacheStorage):
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def set(self, key: str, entry: CacheEntry):
+        if entry.size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._delete(key)
+            self._entries[key] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                self._delete(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileCacheStorage(BaseCacheStorage):
+    # Entries are plain data, JSON metadata plus a raw body file, so nothing read from the directory is executed.
+    _metadata_suffix = ".json"
+    _body_suffix = ".body"
+    _temporary_suffix = ".tmp"
+    # The directory may hold other files, clear() only removes the ones named like this storage's own.
+    _entry_file_pattern = re.compile(r"[0-9a-f]{64}(\.json|\.\w+\.(body|tmp))")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_name(self, key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _get_metadata_path(self, key: str) -> str:
+        return os.path.join(self.directory, self._get_name(key) + self._metadata_suffix)
+
+    def _read_metadata(self, key: str) -> dict | None:
+        try:
+            with open(self._get_metadata_path(key), encoding="utf-8") as file:
+                metadata = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        body_file = metadata.get("body_file") if isinstance(metadata, dict) else None
+        # The body must be one of this entry's own files, never a path elsewhere.
+        if not isinstance(body_file, str) or os.path.basename(body_file) != body_file \
+                or not body_file.startswith(self._get_name(key)) or not body_file.endswith(self._body_suffix):
+            return None
+        return metadata
+
+    def get(self, key: str) -> CacheEntry | None:
+        metadata = self._read_metadata(key)
+        if metadata is None:
+            return None
+
+        try:
+            with open(os.path.join(self.directory, metadata["body_file"]), "rb") as file:
+                content = file.read()
+            return CacheEntry.from_metadata(metadata, content)
+        except (OSError, KeyError, TypeError, ValueError):
+            return None
+
+    def set(self, key: str, entry: CacheEntry):
+        name = self._get_name(key)
+        previous_metadata = self._read_metadata(key)
+        # Every body gets a new file and the metadata pointing to it is replaced atomically,
+        # so readers never pair metadata with a partially written or different body.
+        body_descriptor, body_path = tempfile.mkstemp(dir=self.directory, prefix=name + ".", suffix=self._body_suffix)
+        metadata_descriptor, metadata_path = tempfile.mkstemp(dir=self.directory, prefix=name + ".",
+                                                              suffix=self._temporary_suffix)
+        try:
+            with os.fdopen(body_descriptor, "wb") as file:
+                file.write(entry.content)
+            with os.fdopen(metadata_descriptor, "w", encoding="utf-8") as file:
+                json.dump({**entry.to_metadata(), "body_file": os.path.basename(body_path)}, file)
+            os.replace(metadata_path, self._get_metadata_path(key))
+        except Exception:
+            for path in (body_path, metadata_path):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            raise
+
+        if previous_metadata is not None:
+            self._delete_body(previous_metadata)
+
+    def _delete_body(self, metadata: dict):
+        try:
+            os.unlink(os.path.join(self.directory, metadata["body_file"]))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, key: str):
+        metadata = self._read_metadata(key)
+        try:
+            os.unlink(self._get_metadata_path(key))
+        except FileNotFoundError:
+            pass
+        if metadata is not None:
+            self._delete_body(metadata)
+
+    def clear(self):
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if self._entry_file_pattern.fullmatch(entry.name) and entry.is_file(follow_symlinks=False):
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+
+class HTTPCache:
+    _cacheable_status_codes = (HTTPStatusCodes.OK, HTTPStatusCodes.MOVED_PERMANENTLY)
+    _revalidation_skipped_headers = (HTTPHeaders.SET_COOKIE.lower(), HTTPHeaders.CONTENT_LENGTH.lower(),
+                                     HTTPHeaders.CONTENT_ENCODING.lower(), HTTPHeaders.TRANSFER_ENCODING.lower())
+
+    def __init__(self, storage: BaseCacheStorage | None = None):
+        self.storage = storage if storage else MemoryCacheStorage()
+        self.hits_count = 0
+        self.revalidations_count = 0
+        self.misses_count = 0
+
+    @staticmethod
+    def get_key(http_request: HTTPRequest) -> str:
+        key = f"{http_request.protocol}://{http_request.hostname}:{http_request.port}{http_request.path}"
+        if http_request.query_string:
+            key += "?" + join_dict(http_request.query_string, "&")
+        return key
+
+    @staticmethod
+    def _get_vary_headers(http_request: HTTPRequest, http_response: HTTPResponse) -> dict[str, str | None]:
+        vary = http_response.headers.get(HTTPHeaders.VARY, "")
+        return {header.strip().lower(): http_request.request_headers.get(header.strip())
+                for header in vary.split(",") if header.strip()}
+
+    @staticmethod
+    def _matches_vary_headers(http_request: HTTPRequest, entry: CacheEntry) -> bool:
+        return all(http_request.request_headers.get(header) == value for header, value in entry.vary_headers.items())
+
+    @staticmethod
+    def _parse_http_date(value: str | None) -> float | None:
+        if not value:
+            return None
+        try:
+            return parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def _get_freshness_lifetime(self, entry: CacheEntry) -> float:
+        headers = entry.headers
+        cache_control = parse_cache_control(headers.get(HTTPHeaders.CACHE_CONTROL))
+        if CacheControlDirectives.MAX_AGE in cache_control:
+            try:
+                return int(cache_control[CacheControlDirectives.MAX_AGE])
+            except ValueError:
+                return 0
+
+        expires = self._parse_http_date(headers.get(HTTPHeaders.EXPIRES))
+        if expires is None:
+            return 0
+        date = self._parse_http_date(headers.get(HTTPHeaders.DATE))
+        return expires - (date if date is not None else entry.stored_at)
+
+    def is_fresh(self, http_request: HTTPRequest, entry: CacheEntry) -> bool:
+        request_cache_control = parse_cache_control(http_request.request_headers.get(HTTPHeaders.CACHE_CONTROL))
+        if CacheControlDirectives.NO_CACHE in request_cache_control:
+            return False
+
+        if CacheControlDirectives.NO_CACHE in parse_cache_control(entry.headers.get(HTTPHeaders.CACHE_CONTROL)):
+            return False
+
+        try:
+            age = int(entry.headers.get(HTTPHeaders.AGE, 0))
+        except ValueError:
+            age = 0
+        current_age = age + time.time() - entry.stored_at
+        return current_age < self._get_freshness_lifetime(entry)
+
+    def lookup(self, http_request: HTTPRequest) -> CacheEntry | None:
+        if http_request.method != HTTPMethods.GET:
+            return None
+
+        request_cache_control = parse_cache_control(http_request.request_headers.get(HTTPHeaders.CACHE_CONTROL))
+        if CacheControlDirectives.NO_STORE in request_cache_control:
+            return None
+
+        entry = self.storage.get(self.get_key(http_request))
+        if entry is None or not self._matches_vary_headers(http_request, entry):
+            return None
+        return entry
+
+    @staticmethod
+    def get_conditional_headers(entry: CacheEntry) -> dict[str, str]:
+        conditional_headers = {}
+
+        etag = entry.headers.get(HTTPHeaders.ETAG)
+        if etag:
+            conditional_headers[HTTPHeaders.IF_NONE_MATCH] = etag
+
+        last_modified = entry.headers.get(HTTPHeaders.LAST_MODIFIED)
+        if last_modified:
+            conditional_headers[HTTPHeaders.IF_MODIFIED_SINCE] = last_modified
+
+        return conditional_headers
+
+    def _is_cacheable(self, http_request: HTTPRequest, http_response: HTTPResponse) -> bool:
+        if http_request.method != HTTPMethods.GET or http_response.status_code not in self._cacheable_status_codes:
+            return False
+
+        request_cache_control = parse_cache_control(http_request.request_headers.get(HTTPHeaders.CACHE_CONTROL))
+        response_cache_control = parse_cache_control(http_response.headers.get(HTTPHeaders.CACHE_CONTROL))
+        if CacheControlDirectives.NO_STORE in request_cache_control \
+                or CacheControlDirectives.NO_STORE in response_cache_control:
+            return False
+
+        if http_response.headers.get(HTTPHeaders.VARY, "").strip() == "*":
+            return False
+
+        return (CacheControlDirectives.MAX_AGE in response_cache_control
+                or CacheControlDirectives.NO_CACHE in response_cache_control
+                or HTTPHeaders.EXPIRES in http_response.headers
+                or HTTPHeaders.ETAG in http_response.headers
+                or HTTPHeaders.LAST_MODIFIED in http_response.headers)
+
+    def store(self, http_request: HTTPRequest, http_response: HTTPResponse) -> bool:
+        if not self._is_cacheable(http_request, http_response):
+            return False
+
+        entry = CacheEntry(http_response, self._get_vary_headers(http_request, http_response))
+        self.storage.set(self.get_key(http_request), entry)
+        return True
+
+    def revalidate(self, http_request: HTTPRequest, entry: CacheEntry, http_response: HTTPResponse) -> HTTPResponse:
+        # A 304 carries updated metadata for the stored response, which keeps its body and its framing.
+        for header in http_response.headers:
+            if header.lower() not in self._revalidation_skipped_headers:
+                entry.headers.set_all(header, http_response.headers.get_all(header))
+
+        entry.update_response_headers()
+        entry.stored_at = time.time()
+        self.storage.set(self.get_key(http_request), entry)
+        return entry.create_response(CacheStatuses.REVALIDATED)
+
+    def invalidate(self, http_request: HTTPRequest):
+        self.storage.delete(self.get_key(http_request))
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits_count,
+            "revalidations": self.revalidations_count,
+            "misses": self.misses_count,
+        }
@@ -1,235 +1,835 @@
-import socket
+import io
 import ssl
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from abc import ABC, abstractmethod
+from functools import partial
+from typing import Callable, Iterable, Iterator
+from urllib.parse import urljoin
 
 from .constants import *
+from .connection_pool import ConnectionPool, HTTPConnection
+from .cookie_jar import CookieJar
+from .download import DownloadResult, SegmentedDownload
+from .http_cache import HTTPCache
+from .exceptions import (ConnectTimeoutError, EmptyResponseError, HTTP2StreamRefused, RequestError, RetryError,
+                         TooManyRedirectsError)
+from .happy_eyeballs import HappyEyeballsConnector
+from .headers import Headers
+from .http2 import HTTP2Connection, HTTP2ResponseStream, HTTP2Stream
 from .http_request import HTTPRequest
-from .http_response import HTTPResponse, ResponseCookie
+from .http_response import HTTPResponse
+from .metrics import MetricsAggregator, RequestTimings
+from .rate_limit import RateLimiter, RatePermit
+from .redirect_cache import RedirectCache
+from .resolver import BaseResolver, CachingResolver
+from .retry import RetryPolicy
+from .response_stream import ContentDecodingStream, ResponseBodyStream
+from .socket_writer import send_buffers
+from .tls import TLSConnector, create_ssl_context
+from .utils import url_parse
 
 
-BUFF_SIZE = 8192
+HTTP2_ATTEMPTS_COUNT = 3
 
 
 class SessionManager:
-    def __init__(self):
-        self.sessions_cookies: [str, ResponseCookie] = {}
+    def __init__(self, cookie_jar: CookieJar | None = None):
+        self.cookie_jar = cookie_jar if cookie_jar is not None else CookieJar()
 
-    def add_hostname_to_sessions_cookies(self, hostname: str):
-        if hostname not in self.sessions_cookies:
-            self.sessions_cookies[hostname] = {}
-
-    def del_hostname_from_sessions_cookies(self, hostname: str):
-        if hostname in self.sessions_cookies:
-            del self.sessions_cookies[hostname]
-
-    def add_cookies_to_sessions_cookies(self, hostname: str, cookies: dict[str, ResponseCookie]):
-        if hostname in self.sessions_cookies:
-            self.sessions_cookies[hostname].update(cookies)
-
-    @staticmethod
-    def _check_cookie_settings(http_request: HTTPRequest, cookie: ResponseCookie) -> bool:
-        if cookie.expires:
-            formatted_expires = datetime.strptime(cookie.expires, "%a, %d %b %Y %H:%M:%S %Z")
-            if cookie.set_time >= formatted_expires:
-                return False
-        elif cookie.max_age:
-            expiration_date = cookie.set_time + timedelta(seconds=cookie.max_age)
-            expiration_date = expiration_date.strftime("%Y-%m-%d %H:%M:%S")
-            if cookie.set_time >= expiration_date:
-                return False
-
-        if cookie.secure and http_request.protocol != HTTPProtocols.HTTPS:
-            return False
-
-        if cookie.path and not http_request.path.startswith(cookie.path):
-            return False
-
-        return True
+    def save_cookies(self, http_request: HTTPRequest, http_response: HTTPResponse):
+        self.cookie_jar.extract_cookies(http_request, http_response)
 
     def add_cookies_to_http_request(self, http_request: HTTPRequest):
-        if http_request.hostname in self.sessions_cookies:
-            hostname_cookies = self.sessions_cookies[http_request.hostname]
-            for cookie_obj in hostname_cookies.values():
-                if self._check_cookie_settings(http_request, cookie_obj):
-                    http_request.set_cookie(cookie_obj.name, cookie_obj.value)
+        self.cookie_jar.add_cookie_header(http_request)
+
+    def save(self):
+        if self.cookie_jar.file_path:
+            self.cookie_jar.save()
 
 
 class RedirectManager:
-    def __init__(self, max_redirects_count: int):
+    _redirect_status_codes = (HTTPStatusCodes.MOVED_PERMANENTLY, HTTPStatusCodes.FOUND, HTTPStatusCodes.SEE_OTHER,
+                              HTTPStatusCodes.TEMPORARY_REDIRECT, HTTPStatusCodes.PERMANENT_REDIRECT)
+    # Headers describing the body, which are dropped together with it.
+    _body_headers = (HTTPHeaders.CONTENT_TYPE, HTTPHeaders.CONTENT_LENGTH, HTTPHeaders.CONTENT_ENCODING,
+                     HTTPHeaders.TRANSFER_ENCODING)
+    # Credentials are not sent to another origin.
+    _credential_headers = (HTTPHeaders.AUTHORIZATION, HTTPHeaders.COOKIE)
+
+    def __init__(self, max_redirects_count: int, redirect_cache: RedirectCache | None = None):
         self._redirects_count = 0
         self.max_redirects_count = max_redirects_count
+        self.redirect_cache = redirect_cache
 
-    @staticmethod
-    def _need_redirect(http_response: HTTPResponse):
+    def _need_redirect(self, http_response: HTTPResponse):
         location = None
-        if http_response.status_code == HTTPStatusCodes.MOVED_PERMANENTLY:
+        if http_response.status_code in self._redirect_status_codes:
             location = http_response.headers.get(HTTPHeaders.LOCATION)
 
         return location
 
+    def _follow(self, http_request: HTTPRequest, status_code: int, location: str) -> HTTPRequest | bool:
+        if self._redirects_count >= self.max_redirects_count:
+            raise TooManyRedirectsError("Too many redirects")
+
+        # 303 switches to GET (except HEAD) and 301 and 302 do so for POST as browsers do, otherwise nothing changes.
+        method = http_request.method
+        keep_body = True
+        if (status_code == HTTPStatusCodes.SEE_OTHER and method != HTTPMethods.HEAD) or (method == HTTPMethods.POST
+                and status_code in (HTTPStatusCodes.MOVED_PERMANENTLY, HTTPStatusCodes.FOUND)):
+            method = HTTPMethods.GET
+            keep_body = False
+        body_stream = http_request.body_stream
+        if keep_body and body_stream is not None and not body_stream.rewind():
+            return False
+
+        request_headers = Headers(http_request.request_headers)
+        removed_headers = () if keep_body else self._body_headers
+        hostname, _, protocol, port = url_parse(location)
+        if (protocol, hostname, port) != (http_request.protocol, http_request.hostname, http_request.port):
+            removed_headers += self._credential_headers
+        for header in removed_headers:
+            request_headers.pop(header, None)
+
+        request = HTTPRequest(location,
+                              method=method,
+                              request_headers=request_headers,
+                              http_version=http_request.http_version,
+                              body=http_request.body if keep_body else None,
+                              form=http_request.form if keep_body else None)
+        self._redirects_count += 1
+        return request
+
     def create_redirect_request(self, http_response: HTTPResponse, http_request: HTTPRequest) -> HTTPRequest | bool:
         location = self._need_redirect(http_response)
-        if location:
-            if self._redirects_count >= self.max_redirects_count:
-                raise Exception("To many redirects")
-
-            request = HTTPRequest(location,
-                                  request_headers=http_request.request_headers,
-                                  body=http_request.body,
-                                  form=http_request.form,
-                                  query_string=http_request.query_string)
-            self._redirects_count += 1
-            return request
-        return False
+        if not location:
+            return False
 
+        location = urljoin(http_request.absolute_url, location.partition("#")[0])
+        request = self._follow(http_request, http_response.status_code, location)
+        if request and self.redirect_cache is not None:
+            self.redirect_cache.store(http_request, http_response, location)
+        return request
 
-class BaseHTTPClient(ABC):
+    def create_cached_redirect_request(self, http_request: HTTPRequest) -> HTTPRequest | bool:
+        # Known redirects are applied before the request is sent, saving a round trip each.
+        entry = self.redirect_cache.lookup(http_request) if self.redirect_cache is not None else None
+        if entry is None:
+            return False
+        return self._follow(http_request, entry.status_code, entry.location)
 
-    @abstractmethod
-    def request(self, http_request: HTTPRequest) -> HTTPResponse:
-        pass
 
+class BaseHTTPClient(ABC):
+    _bodiless_status_codes = (HTTPStatusCodes.NO_CONTENT, HTTPStatusCodes.NOT_MODIFIED)
+    _supported_content_encodings = (ContentEncodings.GZIP, ContentEncodings.X_GZIP, ContentEncodings.DEFLATE)
 
-class HTTPClient(BaseHTTPClient):
-    def __init__(self, redirect_allow: bool = True, max_redirects_count: int = 5):
+    def __init__(self, redirect_allow: bool = True, max_redirects_count: int = 5, keep_alive: bool = True,
+                 cookie_jar: CookieJar | None = None, decode_content: bool = True,
+                 max_decompressed_size: int | None = 1024 * 1024 * 1024):
         self.redirect_allow = redirect_allow
         self.max_redirects_count = max_redirects_count
-        self.session_manager = SessionManager()
+        self.keep_alive = keep_alive
+        self.decode_content = decode_content
+        self.max_decompressed_size = max_decompressed_size
+        self.session_manager = SessionManager(cookie_jar)
         self._session_on = False
 
-    @staticmethod
-    def _get_all_data_from_buffer_with_length(sock: socket.socket | ssl.SSLSocket, data: str, length: int)\
-            -> str:
-        while len(data.encode()) != length:
-            data += sock.recv(length - len(data.encode())).decode()
-
-        return data
-
-    def _get_response_body_with_chunked(self, sock: socket.socket | ssl.SSLSocket, chunk_data: str) -> str:
-        response_body = chunk_data
-        while True:
-            chunk_size_str = ""
-            while not chunk_size_str.endswith(INDENT):
-                chunk_size_str += sock.recv(1).decode()
+    def open_session(self):
+        self._session_on = True
 
-            chunk_size = int(chunk_size_str, 16)
-            if chunk_size == 0:
-                break
+    def close_session(self):
+        self._session_on = False
+        self.session_manager.save()
 
-            chunk_data = self._get_all_data_from_buffer_with_length(sock, "", chunk_size)
+    def _add_session_cookies(self, http_request: HTTPRequest):
+        if self._session_on:
+            self.session_manager.add_cookies_to_http_request(http_request)
 
-            response_body += chunk_data
-            sock.recv(2)
-        return response_body
+    def _save_session_cookies(self, http_request: HTTPRequest, http_response: HTTPResponse):
+        if self._session_on:
+            self.session_manager.save_cookies(http_request, http_response)
 
-    @staticmethod
-    def _check_if_data_eq_to_length(http_response: HTTPResponse, first_recv_data: str, data: str, length: int) \
-            -> HTTPResponse | None:
+    def _add_accept_encoding(self, http_request: HTTPRequest):
+        if self.decode_content and HTTPHeaders.ACCEPT_ENCODING not in http_request.request_headers:
+            http_request.set_header(HTTPHeaders.ACCEPT_ENCODING,
+                                    f"{ContentEncodings.GZIP}, {ContentEncodings.DEFLATE}")
 
-        if len(data.encode()) == length:
-            http_response.body = data
-            http_response.response = first_recv_data
-            return http_response
+    def _get_content_encoding(self, http_response: HTTPResponse) -> str | None:
+        content_encoding = http_response.headers.get(HTTPHeaders.CONTENT_ENCODING, "").strip().lower()
+        if self.decode_content and content_encoding in self._supported_content_encodings:
+            return content_encoding
         return None
 
-    def _get_response_body(self, sock: socket.socket | ssl.SSLSocket,
-                           http_response: HTTPResponse, first_recv_data: str, response_body: str) -> str | HTTPResponse:
-
-        content_length = http_response.headers.get(HTTPHeaders.CONTENT_LENGTH)
-        transfer_encoding_value = http_response.headers.get(HTTPHeaders.TRANSFER_ENCODING)
-        if content_length:
-            content_length = int(content_length)
-
-            check_if_data_eq_to_length_result = self._check_if_data_eq_to_length(http_response, first_recv_data,
-                                                                                 response_body, content_length)
-            if isinstance(check_if_data_eq_to_length_result, HTTPResponse):
-                return check_if_data_eq_to_length_result
-
-            return self._get_all_data_from_buffer_with_length(sock, response_body, content_length)
-        elif transfer_encoding_value and transfer_encoding_value == TransferEncodingValues.CHUNKED:
-            chunk_size, chunk_data = response_body.split(INDENT)
-            chunk_size = int(chunk_size, 16)
-            check_if_data_eq_to_length_result = self._check_if_data_eq_to_length(http_response, first_recv_data,
-                                                                                 chunk_data, chunk_size)
-            if isinstance(check_if_data_eq_to_length_result, HTTPResponse):
-                return check_if_data_eq_to_length_result
+    def _is_connection_reusable(self, http_request: HTTPRequest, http_response: HTTPResponse) -> bool:
+        if not self.keep_alive:
+            return False
 
-            chunk_data = self._get_all_data_from_buffer_with_length(sock, chunk_data, chunk_size)
-            sock.recv(2)
+        request_connection = http_request.request_headers.get(HTTPHeaders.CONNECTION, "")
+        response_connection = http_response.headers.get(HTTPHeaders.CONNECTION, "")
+        if ConnectionValues.CLOSE in (request_connection.lower(), response_connection.lower()):
+            return False
 
-            return self._get_response_body_with_chunked(sock, chunk_data)
+        if http_response.http_version != HTTPVersions.HTTP1_1 \
+                and response_connection.lower() != ConnectionValues.KEEP_ALIVE:
+            return False
 
-    def _connect_send_request_and_get_response(self, sock: socket.socket | ssl.SSLSocket, http_request: HTTPRequest)\
-            -> HTTPResponse:
-        sock.sendall(http_request.request.encode())
+        return (HTTPHeaders.CONTENT_LENGTH in http_response.headers
+                or HTTPHeaders.TRANSFER_ENCODING in http_response.headers
+                or http_response.status_code in self._bodiless_status_codes
+                or http_request.method == HTTPMethods.HEAD)
 
-        first_recv_data = sock.recv(BUFF_SIZE).decode()
-        if not first_recv_data:
-            sock.close()
-            raise Exception("Empty Response")
+    @abstractmethod
+    def request(self, http_request: HTTPRequest, stream: bool = False) -> HTTPResponse:
+        pass
 
-        while DOUBLE_INDENT not in first_recv_data:
-            first_recv_data += sock.recv(BUFF_SIZE).decode()
 
-        http_response = HTTPResponse(hand_init=True)
+class HTTPClient(BaseHTTPClient):
+    def __init__(self, redirect_allow: bool = True, max_redirects_count: int = 5, *,
+                 keep_alive: bool = True,
+                 max_connections_per_host: int = 10,
+                 idle_timeout: float = 60.0,
+                 ssl_context: ssl.SSLContext | None = None,
+                 ca_file: str | None = None,
+                 cert_file: str | None = None,
+                 key_file: str | None = None,
+                 alpn_protocols: list[str] | None = None,
+                 minimum_tls_version: str | ssl.TLSVersion | None = None,
+                 resolver: BaseResolver | None = None,
+                 cache: HTTPCache | None = None,
+                 decode_content: bool = True,
+                 max_decompressed_size: int | None = 1024 * 1024 * 1024,
+                 cookie_jar: CookieJar | None = None,
+                 http2: bool = False,
+                 http2_prior_knowledge: bool = False,
+                 hooks: dict[str, Callable | list[Callable]] | None = None,
+                 metrics: MetricsAggregator | None = None,
+                 retry_policy: RetryPolicy | None = None,
+                 rate_limiter: RateLimiter | None = None,
+                 connect_timeout: float | None = None,
+                 read_timeout: float | None = None,
+                 timeout: float | None = None,
+                 happy_eyeballs_delay: float = 0.25,
+                 redirect_cache: RedirectCache | None = None):
+        super().__init__(redirect_allow, max_redirects_count, keep_alive, cookie_jar, decode_content,
+                         max_decompressed_size)
+        self.cache = cache
+        self.http2 = http2 or http2_prior_knowledge
+        self.http2_prior_knowledge = http2_prior_knowledge
+        self._http2_connections: dict[tuple[str, str, int], HTTP2Connection] = {}
+        self._http1_origins: set[tuple[str, str, int]] = set()
+        self._http2_lock = threading.Lock()
+        self._http2_origins_locks: dict[tuple[str, str, int], threading.Lock] = {}
+        if ssl_context is None:
+            if http2 and alpn_protocols is None:
+                alpn_protocols = [ALPNProtocols.H2, ALPNProtocols.HTTP1_1]
+            ssl_context = create_ssl_context(ca_file=ca_file, cert_file=cert_file, key_file=key_file,
+                                             alpn_protocols=alpn_protocols, minimum_version=minimum_tls_version)
+        self._tls_connector = TLSConnector(ssl_context)
+        self.resolver = resolver if resolver else CachingResolver()
+        self._connection_pool = ConnectionPool(max_connections_per_host, idle_timeout,
+                                               self._tls_connector, self.resolver,
+                                               tcp_connector=HappyEyeballsConnector(happy_eyeballs_delay),
+                                               connect_timeout=connect_timeout, read_timeout=read_timeout)
+        self.timeout = timeout
+        self.redirect_cache = redirect_cache
+        self._hooks: dict[str, list[Callable]] = {}
+        for event, callbacks in (hooks or {}).items():
+            for callback in (callbacks if isinstance(callbacks, list) else [callbacks]):
+                self.add_hook(event, callback)
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.attach(self)
+        self.retry_policy = retry_policy
+        self._hedge_executor: ThreadPoolExecutor | None = None
+        self._hedge_executor_lock = threading.Lock()
+        self.rate_limiter = rate_limiter
+
+    @property
+    def connection_pool(self):
+        return self._connection_pool
+
+    @property
+    def ssl_context(self) -> ssl.SSLContext:
+        return self._tls_connector.ssl_context
+
+    @property
+    def tls_stats(self) -> dict[str, int | float]:
+        return self._tls_connector.stats
+
+    def add_hook(self, event: str, callback: Callable):
+        if event not in CLIENT_EVENTS_TUPLE:
+            raise ValueError(f"Unknown event: {event}. Available events: {', '.join(CLIENT_EVENTS_TUPLE)}")
+        self._hooks.setdefault(event, []).append(callback)
+
+    def remove_hook(self, event: str, callback: Callable):
+        self._hooks.get(event, []).remove(callback)
+
+    def _emit(self, event: str, *args):
+        for callback in self._hooks.get(event, ()):
+            callback(*args)
+
+    def _connection_acquired(self, connection: HTTPConnection, http_request: HTTPRequest, timings: RequestTimings):
+        connect_timings = connection.take_connect_timings()
+        timings.connection_acquired(connect_timings)
+        if connect_timings is not None:
+            self._emit(ClientEvents.CONNECT, http_request, connection)
+
+    def _create_response_body_stream(self, connection: HTTPConnection, http_request: HTTPRequest,
+                                     http_response: HTTPResponse, release_callback: Callable | None = None) \
+            -> ResponseBodyStream | ContentDecodingStream:
+        body_stream = self._create_response_framing_stream(connection, http_request, http_response, release_callback)
+        return self._create_content_decoding_stream(body_stream, http_response)
+
+    def _create_content_decoding_stream(self, body_stream: io.RawIOBase, http_response: HTTPResponse) \
+            -> io.RawIOBase:
+        content_encoding = self._get_content_encoding(http_response)
+        if content_encoding is not None:
+            return ContentDecodingStream(body_stream, content_encoding, self.max_decompressed_size)
+        return body_stream
+
+    def _create_response_framing_stream(self, connection: HTTPConnection, http_request: HTTPRequest,
+                                        http_response: HTTPResponse, release_callback: Callable | None = None) \
+            -> ResponseBodyStream:
+        if release_callback is None:
+            release_callback = partial(self._release_connection, connection, http_request, http_response)
+
+        # Responses to HEAD describe the body without sending it.
+        if http_request.method == HTTPMethods.HEAD:
+            return ResponseBodyStream(None, release_callback=release_callback)
 
-        split_response = first_recv_data.split(DOUBLE_INDENT)
-        http_response.initialize_headers(split_response[0])
-        if len(split_response) > 1:
-            response_body = split_response[1]
-        else:
-            http_response.response = first_recv_data
-            return http_response
+        transfer_encoding_value = http_response.headers.get(HTTPHeaders.TRANSFER_ENCODING)
+        if transfer_encoding_value and transfer_encoding_value.lower() == TransferEncodingValues.CHUNKED:
+            return ResponseBodyStream(connection.reader, chunked=True, release_callback=release_callback)
 
-        get_response_body_result = self._get_response_body(sock, http_response, first_recv_data, response_body)
-        if isinstance(get_response_body_result, HTTPResponse):
-            return get_response_body_result
+        content_length = http_response.headers.get(HTTPHeaders.CONTENT_LENGTH)
+        if content_length:
+            return ResponseBodyStream(connection.reader, content_length=int(content_length),
+                                      release_callback=release_callback)
+        elif http_response.status_code in self._bodiless_status_codes:
+            return ResponseBodyStream(None, release_callback=release_callback)
+
+        return ResponseBodyStream(connection.reader, release_callback=release_callback)
+
+    def _connect_send_request_and_get_response(self, connection: HTTPConnection, http_request: HTTPRequest,
+                                               timings: RequestTimings) -> HTTPResponse:
+        self._add_accept_encoding(http_request)
+        received_offset = connection.reader.bytes_consumed
+        bytes_sent = send_buffers(connection.sock, [http_request.head, http_request.body_bytes])
+        if http_request.body_stream:
+            bytes_sent += http_request.body_stream.send(connection.sock)
+        timings.request_sent(bytes_sent, received_offset)
+
+        http_response = self._read_response_head(connection)
+        timings.headers_received(connection.reader.bytes_consumed)
+        http_response.timings = timings
+        return http_response
 
-        http_response.body = get_response_body_result
-        http_response.response = split_response[0] + DOUBLE_INDENT + get_response_body_result
+    @staticmethod
+    def _read_response_head(connection: HTTPConnection) -> HTTPResponse:
+        try:
+            response_headers = connection.reader.read_until(DOUBLE_INDENT_BYTES)
+        except ConnectionError:
+            raise EmptyResponseError("Empty Response")
 
+        http_response = HTTPResponse(hand_init=True)
+        http_response.initialize_headers(response_headers.decode("iso-8859-1"))
         http_response.initialize_cookies()
         return http_response
 
-    def _get_response(self, http_request: HTTPRequest) -> HTTPResponse:
-        with socket.create_connection((http_request.hostname, http_request.port)) as sock:
-            if http_request.protocol == HTTPProtocols.HTTP:
-                return self._connect_send_request_and_get_response(sock, http_request)
-            else:
-                context = ssl.create_default_context()
-                with context.wrap_socket(sock, server_hostname=http_request.hostname) as ssl_sock:
-                    return self._connect_send_request_and_get_response(ssl_sock, http_request)
-
-    def open_session(self):
-        self._session_on = True
-
-    def close_session(self):
-        self._session_on = False
+    def _get_http2_connection(self, http_request: HTTPRequest, timings: RequestTimings,
+                              deadline: float | None = None) -> HTTP2Connection | None:
+        key = (http_request.protocol, http_request.hostname, http_request.port)
+        if key in self._http1_origins or (http_request.protocol == HTTPProtocols.HTTP
+                                          and not self.http2_prior_knowledge):
+            return None
+
+        http2_connection = self._get_available_http2_connection(key)
+        if http2_connection is not None:
+            timings.connection_acquired(None)
+            return http2_connection
+
+        # Connecting happens under the origin's own lock, so a slow origin does not hold up requests to the others.
+        with self._http2_lock:
+            origin_lock = self._http2_origins_locks.setdefault(key, threading.Lock())
+        timeout = -1 if deadline is None else max(0.0, deadline - time.monotonic())
+        if not origin_lock.acquire(timeout=timeout):
+            raise ConnectTimeoutError("Timed out waiting for the HTTP/2 connection")
+        try:
+            # Another request may have connected while this one waited for the lock.
+            http2_connection = self._get_available_http2_connection(key)
+            if http2_connection is not None:
+                timings.connection_acquired(None)
+                return http2_connection
+            if key in self._http1_origins:
+                return None
+
+            connection = self._connection_pool.get_connection(*key, deadline)
+            if connection.reused:
+                # Idle connections in the pool already speak HTTP/1.1.
+                self._connection_pool.release_connection(connection, reusable=False)
+                connection = self._connection_pool.get_connection(*key, deadline)
+
+            if http_request.protocol == HTTPProtocols.HTTPS \
+                    and connection.sock.selected_alpn_protocol() != ALPNProtocols.H2:
+                self._http1_origins.add(key)
+                self._connection_pool.release_connection(connection)
+                return None
+
+            try:
+                http2_connection = HTTP2Connection(connection, on_close=self._forget_http2_connection)
+            except Exception:
+                self._connection_pool.release_connection(connection, reusable=False)
+                raise
+            with self._http2_lock:
+                self._http2_connections[key] = http2_connection
+            self._connection_acquired(connection, http_request, timings)
+            return http2_connection
+        finally:
+            origin_lock.release()
+
+    def _get_available_http2_connection(self, key: tuple[str, str, int]) -> HTTP2Connection | None:
+        with self._http2_lock:
+            http2_connection = self._http2_connections.get(key)
+        if http2_connection is not None and http2_connection.is_available:
+            return http2_connection
+        return None
 
-    def request(self, http_request: HTTPRequest) -> HTTPResponse:
-        redirect_manager = RedirectManager(self.max_redirects_count)
+    def _forget_http2_connection(self, http2_connection: HTTP2Connection):
+        self._connection_pool.release_connection(http2_connection.connection, reusable=False)
+        with self._http2_lock:
+            if self._http2_connections.get(http2_connection.connection.key) is http2_connection:
+                del self._http2_connections[http2_connection.connection.key]
+
+    def _get_http2_response(self, http2_connection: HTTP2Connection, http_request: HTTPRequest,
+                            timings: RequestTimings, stream: bool = False,
+                            permit: RatePermit | None = None, deadline: float | None = None) -> HTTPResponse:
+        self._add_accept_encoding(http_request)
+        http2_stream = http2_connection.send_request(http_request, deadline, self._connection_pool.read_timeout)
+        timings.request_sent(http2_stream.bytes_sent)
+        try:
+            headers = http2_connection.wait_for_headers(http2_stream)
+        except BaseException:
+            http2_connection.reset_stream(http2_stream)
+            raise
+        timings.headers_received(http2_stream.bytes_received)
+
+        status = next(value for name, value in headers if name == ":status")
+        header_lines = [f"{HTTPVersions.HTTP2} {status}"]
+        header_lines.extend(f"{name}: {value}" for name, value in headers if not name.startswith(":"))
+
+        response = HTTPResponse(hand_init=True)
+        response.initialize_headers(INDENT.join(header_lines))
+        response.timings = timings
+        self._emit(ClientEvents.HEADERS_RECEIVED, http_request, response)
+
+        release_callback = partial(self._release_http2_stream, http2_stream, http_request, response, permit=permit)
+        response.raw = self._create_content_decoding_stream(
+            HTTP2ResponseStream(http2_connection, http2_stream, release_callback), response)
+        if not stream:
+            response.read()
+        return response
 
-        request = http_request
+    def _release_http2_stream(self, http2_stream: HTTP2Stream, http_request: HTTPRequest, http_response: HTTPResponse,
+                              permit: RatePermit | None = None):
+        http_response.timings.body_received(http2_stream.bytes_received)
+        if permit is not None:
+            permit.release(http_response)
+        self._emit(ClientEvents.BODY_COMPLETE, http_request, http_response)
+
+    def _get_response(self, http_request: HTTPRequest, stream: bool = False,
+                      timings: RequestTimings | None = None, deadline: float | None = None) -> HTTPResponse:
+        timings = timings if timings is not None else RequestTimings()
+        if self.rate_limiter is None:
+            return self._get_network_response(http_request, stream, timings, deadline=deadline)
+
+        permit = self.rate_limiter.acquire(http_request.hostname, deadline)
+        timings.throttle_ns = permit.queued_ns
+        try:
+            # The permit is released with the connection once the body is received.
+            return self._get_network_response(http_request, stream, timings, permit, deadline)
+        except BaseException:
+            permit.release()
+            raise
+
+    def _get_network_response(self, http_request: HTTPRequest, stream: bool, timings: RequestTimings,
+                              permit: RatePermit | None = None, deadline: float | None = None) -> HTTPResponse:
+        for attempt in range(HTTP2_ATTEMPTS_COUNT if self.http2 else 0):
+            http2_connection = self._get_http2_connection(http_request, timings, deadline)
+            if http2_connection is None:
+                break
+            try:
+                return self._get_http2_response(http2_connection, http_request, timings, stream, permit, deadline)
+            except HTTP2StreamRefused:
+                # The server did not process the stream, so it can be sent again on a new connection.
+                body_stream = http_request.body_stream
+                if attempt == HTTP2_ATTEMPTS_COUNT - 1 or (body_stream and not body_stream.rewind()):
+                    raise
 
         while True:
-            if self._session_on:
-                self.session_manager.add_cookies_to_http_request(request)
-
-            response = self._get_response(request)
+            connection = self._connection_pool.get_connection(http_request.protocol,
+                                                              http_request.hostname,
+                                                              http_request.port,
+                                                              deadline)
+            self._connection_acquired(connection, http_request, timings)
+            try:
+                if deadline is not None:
+                    connection.reader.set_deadline(deadline)
+                response = self._connect_send_request_and_get_response(connection, http_request, timings)
+            except Exception as exception:
+                self._connection_pool.release_connection(connection, reusable=False)
+                # The server may have dropped a kept-alive connection between our staleness
+                # check and the request, so retry on another connection in that case. The request
+                # may also have been processed before the connection closed, so only idempotent
+                # methods are sent again.
+                body_stream = http_request.body_stream
+                if connection.reused and not isinstance(exception, TimeoutError) \
+                        and http_request.method in IDEMPOTENT_METHODS_TUPLE \
+                        and (not body_stream or body_stream.rewind()):
+                    continue
+                raise
+
+            connection.requests_count += 1
+            self._emit(ClientEvents.HEADERS_RECEIVED, http_request, response)
+            # The connection goes back to the pool once the body stream is drained or closed.
+            release_callback = partial(self._release_connection, connection, http_request, response, permit=permit)
+            response.raw = self._create_response_body_stream(connection, http_request, response, release_callback)
+            if not stream:
+                response.read()
+            return response
+
+    def _get_response_with_cache(self, http_request: HTTPRequest, stream: bool = False,
+                                 timings: RequestTimings | None = None, deadline: float | None = None) \
+            -> HTTPResponse:
+        timings = timings if timings is not None else RequestTimings()
+        if self.cache is None or stream:
+            return self._get_response(http_request, stream, timings, deadline)
+
+        # Accept-Encoding is part of the request the cache compares against Vary, on lookup as on store.
+        self._add_accept_encoding(http_request)
+
+        if http_request.method != HTTPMethods.GET:
+            response = self._get_response(http_request, timings=timings, deadline=deadline)
+            if http_request.method != HTTPMethods.HEAD:
+                self.cache.invalidate(http_request)
+            return response
+
+        entry = self.cache.lookup(http_request)
+        if entry is not None and self.cache.is_fresh(http_request, entry):
+            self.cache.hits_count += 1
+            response = entry.create_response(CacheStatuses.HIT)
+            # Nothing goes over the network, so only the total duration is recorded.
+            timings.body_received()
+            response.timings = timings
+            self._emit(ClientEvents.HEADERS_RECEIVED, http_request, response)
+            self._emit(ClientEvents.BODY_COMPLETE, http_request, response)
+            return response
+
+        conditional_headers = self.cache.get_conditional_headers(entry) if entry is not None else {}
+        conditional_request = http_request
+        if conditional_headers:
+            # The validators go on a copy, so validators the caller set are left as they were.
+            conditional_request = http_request.copy()
+            for header, value in conditional_headers.items():
+                conditional_request.set_header(header, value)
+        response = self._get_response(conditional_request, timings=timings, deadline=deadline)
+
+        if entry is not None and response.status_code == HTTPStatusCodes.NOT_MODIFIED:
+            self.cache.revalidations_count += 1
+            revalidated_response = self.cache.revalidate(http_request, entry, response)
+            revalidated_response.timings = timings
+            return revalidated_response
+
+        self.cache.misses_count += 1
+        self.cache.store(http_request, response)
+        response.cache_status = CacheStatuses.MISS
+        return response
 
-            if self._session_on:
-                self.session_manager.add_hostname_to_sessions_cookies(request.hostname)
-                if response.cookies:
-                    self.session_manager.add_cookies_to_sessions_cookies(request.hostname, response.cookies)
+    def _release_connection(self, connection: HTTPConnection, http_request: HTTPRequest,
+                            http_response: HTTPResponse, reusable: bool = True, permit: RatePermit | None = None):
+        if http_response.timings is not None:
+            http_response.timings.body_received(connection.reader.bytes_consumed)
+        reusable = reusable and self._is_connection_reusable(http_request, http_response)
+        if reusable and connection.reader.deadline is not None:
+            connection.reader.set_deadline(None)
+        self._connection_pool.release_connection(connection, reusable)
+        if permit is not None:
+            permit.release(http_response)
+        self._emit(ClientEvents.BODY_COMPLETE, http_request, http_response)
+
+    def download(self, url: str, path: str, segments: int = 4, *,
+                 request_headers: dict | None = None,
+                 min_segment_size: int = 1024 * 1024,
+                 progress_interval: int = 1024 * 1024) -> DownloadResult:
+        return SegmentedDownload(self, url, path, segments=segments, request_headers=request_headers,
+                                 min_segment_size=min_segment_size, progress_interval=progress_interval).run()
+
+    def preconnect(self, urls: list[str]) -> int:
+        opened_connections_count = 0
+        for url in urls:
+            hostname, _, protocol, port = url_parse(url)
+            if self._connection_pool.preconnect(protocol, hostname, port):
+                opened_connections_count += 1
+        return opened_connections_count
+
+    def close(self):
+        with self._hedge_executor_lock:
+            hedge_executor, self._hedge_executor = self._hedge_executor, None
+        if hedge_executor is not None:
+            # Slower hedged attempts still running are waited for, so their connections are released first.
+            hedge_executor.shutdown(wait=True, cancel_futures=True)
+        with self._http2_lock:
+            http2_connections = list(self._http2_connections.values())
+        for http2_connection in http2_connections:
+            http2_connection.close()
+        self._connection_pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _get_deadline(self) -> float | None:
+        return time.monotonic() + self.timeout if self.timeout is not None else None
+
+    def _request_once(self, http_request: HTTPRequest, stream: bool = False,
+                      deadline: float | None = None) -> HTTPResponse:
+        redirect_manager = RedirectManager(self.max_redirects_count, self.redirect_cache)
 
-            if self.redirect_allow:
-                request_creating_result = redirect_manager.create_redirect_request(response, http_request)
-                if not request_creating_result:
-                    break
+        request = http_request
 
-                request = request_creating_result
-                continue
-            break
+        while True:
+            try:
+                if self.redirect_allow:
+                    cached_redirect_request = redirect_manager.create_cached_redirect_request(request)
+                    while cached_redirect_request:
+                        request = cached_redirect_request
+                        cached_redirect_request = redirect_manager.create_cached_redirect_request(request)
+                self._emit(ClientEvents.REQUEST_START, request)
+                self._add_session_cookies(request)
+                response = self._get_response_with_cache(request, stream, RequestTimings(), deadline)
+                self._save_session_cookies(request, response)
+
+                redirect_request = False
+                if self.redirect_allow:
+                    redirect_request = redirect_manager.create_redirect_request(response, request)
+                if redirect_request:
+                    # Drain the redirect body so its connection can serve the next hop.
+                    response.read()
+            except Exception as exception:
+                self._emit(ClientEvents.ERROR, request, exception)
+                raise
+
+            if not redirect_request:
+                break
+            self._emit(ClientEvents.REDIRECT, request, response, redirect_request)
+            request = redirect_request
 
+        response.http_request = request
         return response
+
+    def _start_attempt(self, http_request: HTTPRequest, deadline: float | None = None) -> Future:
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="PyHTTP-hedge")
+            # Sending a request changes its headers, so every attempt gets its own copy.
+            return self._hedge_executor.submit(self._request_once, http_request.copy(), deadline=deadline)
+
+    def _request_hedged(self, http_request: HTTPRequest, deadline: float | None = None) -> HTTPResponse:
+        policy = self.retry_policy
+        futures = [self._start_attempt(http_request, deadline)]
+        hedging = True
+        while True:
+            pending = [future for future in futures if not future.done()]
+            if not pending:
+                raise futures[0].exception()
+
+            # Another attempt goes out on a new connection whenever the running ones are slower than the threshold.
+            hedging = hedging and len(futures) <= policy.max_hedges
+            done, _ = wait(pending, timeout=policy.hedge_after if hedging else None, return_when=FIRST_COMPLETED)
+            for index, future in enumerate(futures):
+                if future.done() and future.exception() is None:
+                    if index:
+                        policy.hedge_wins_count += 1
+                    # Slower attempts finish in the background and give their connections back to the pool.
+                    return future.result()
+
+            if not done and hedging:
+                hedging = policy.can_hedge()
+                if hedging:
+                    policy.hedges_count += 1
+                    futures.append(self._start_attempt(http_request, deadline))
+
+    def request(self, http_request: HTTPRequest, stream: bool = False) -> HTTPResponse:
+        policy = self.retry_policy
+        deadline = self._get_deadline()
+        if policy is None:
+            return self._request_once(http_request, stream, deadline)
+
+        policy.start_request()
+        attempt = 1
+        while True:
+            try:
+                if policy.should_hedge(http_request, stream):
+                    response = self._request_hedged(http_request, deadline)
+                else:
+                    response = self._request_once(http_request, stream, deadline)
+            except Exception as exception:
+                if not policy.should_retry_exception(http_request, exception):
+                    raise
+                delay = policy.get_backoff(attempt)
+                # A retry which cannot start before the total timeout is not attempted.
+                if (deadline is not None and time.monotonic() + delay >= deadline) \
+                        or not policy.can_retry(http_request, attempt):
+                    raise RetryError(http_request, attempt, exception) from exception
+            else:
+                if not policy.should_retry_response(http_request, response):
+                    return response
+                delay = policy.get_delay(attempt, response)
+                if delay is None or (deadline is not None and time.monotonic() + delay >= deadline) \
+                        or not policy.can_retry(http_request, attempt):
+                    return response
+                response.close()
+
+            policy.retries_count += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def _start_pipelined_request(self, connection: HTTPConnection, http_request: HTTPRequest,
+                                 timings: RequestTimings, connect_timings: tuple[int, int, int] | None = None) \
+            -> list[bytes]:
+        self._emit(ClientEvents.REQUEST_START, http_request)
+        timings.connection_acquired(connect_timings)
+        if connect_timings is not None:
+            self._emit(ClientEvents.CONNECT, http_request, connection)
+
+        self._add_session_cookies(http_request)
+        self._add_accept_encoding(http_request)
+        return [http_request.head, http_request.body_bytes]
+
+    def _request_pipelined_on_origin(self, http_requests: list[tuple[int, HTTPRequest]], depth: int,
+                                     responses: list[HTTPResponse | None]):
+        pending = deque(http_requests)
+        while pending:
+            index, http_request = pending[0]
+            connection = self._connection_pool.get_connection(http_request.protocol,
+                                                              http_request.hostname,
+                                                              http_request.port)
+            connect_timings = connection.take_connect_timings()
+            in_flight = deque()
+            answered_count = 0
+            reusable = True
+            try:
+                # The first window is written in one go, then one request follows each response read.
+                requests_buffers = []
+                while pending and len(in_flight) < depth:
+                    in_flight.append((*pending.popleft(), RequestTimings()))
+                    requests_buffers.append(self._start_pipelined_request(connection, *in_flight[-1][1:],
+                                                                          connect_timings))
+                    connect_timings = None
+                send_buffers(connection.sock, [buffer for buffers in requests_buffers for buffer in buffers])
+                for (_, _, timings), buffers in zip(in_flight, requests_buffers):
+                    timings.request_sent(sum(len(buffer) for buffer in buffers))
+
+                while in_flight:
+                    index, http_request, timings = in_flight[0]
+                    received_offset = connection.reader.bytes_consumed
+                    response = self._read_response_head(connection)
+                    timings.headers_received(connection.reader.bytes_consumed - received_offset)
+                    response.timings = timings
+                    self._emit(ClientEvents.HEADERS_RECEIVED, http_request, response)
+
+                    release_results = []
+                    response.raw = self._create_response_body_stream(connection, http_request, response,
+                                                                     release_results.append)
+                    response.read()
+                    timings.body_received(connection.reader.bytes_consumed - received_offset)
+                    self._emit(ClientEvents.BODY_COMPLETE, http_request, response)
+                    response.http_request = http_request
+                    self._save_session_cookies(http_request, response)
+
+                    in_flight.popleft()
+                    responses[index] = response
+                    answered_count += 1
+                    connection.requests_count += 1
+
+                    reusable = all(release_results) and self._is_connection_reusable(http_request, response)
+                    if not reusable:
+                        break
+                    if pending:
+                        timings = RequestTimings()
+                        in_flight.append((*pending.popleft(), timings))
+                        buffers = self._start_pipelined_request(connection, in_flight[-1][1], timings)
+                        timings.request_sent(send_buffers(connection.sock, buffers))
+            except Exception as exception:
+                reusable = False
+                # A fresh connection that answers nothing would fail the same way again.
+                if not answered_count and not connection.reused:
+                    self._connection_pool.release_connection(connection, reusable=False)
+                    self._emit(ClientEvents.ERROR, in_flight[0][1], exception)
+                    raise
+            finally:
+                # Unanswered requests go back to the front of the queue for another connection.
+                pending.extendleft((index, http_request) for index, http_request, _ in reversed(in_flight))
+
+            self._connection_pool.release_connection(connection, reusable)
+
+    def request_pipelined(self, http_requests: Iterable[HTTPRequest], depth: int = 8) -> list[HTTPResponse]:
+        if depth < 1:
+            raise ValueError("Pipeline depth must be positive")
+
+        http_requests = list(http_requests)
+        origins_requests = {}
+        for index, http_request in enumerate(http_requests):
+            if http_request.method not in IDEMPOTENT_METHODS_TUPLE:
+                raise ValueError(f"{http_request.method} requests are not idempotent and cannot be pipelined")
+            if http_request.body_stream:
+                raise ValueError("Requests with streamed bodies cannot be pipelined")
+            if http_request.http_version != HTTPVersions.HTTP1_1:
+                raise ValueError("Only HTTP/1.1 requests can be pipelined")
+
+            key = (http_request.protocol, http_request.hostname, http_request.port)
+            origins_requests.setdefault(key, []).append((index, http_request))
+
+        responses = [None] * len(http_requests)
+        for origin_requests in origins_requests.values():
+            self._request_pipelined_on_origin(origin_requests, depth, responses)
+        return responses
+
+    def _request_with_host_limit(self, http_request: HTTPRequest,
+                                 hosts_semaphores: dict[tuple[str, str, int], threading.Semaphore]) \
+            -> HTTPResponse:
+        try:
+            semaphore = hosts_semaphores.get((http_request.protocol, http_request.hostname, http_request.port))
+            if semaphore is None:
+                return self.request(http_request)
+            with semaphore:
+                return self.request(http_request)
+        except Exception as exception:
+            raise RequestError(http_request, exception) from exception
+
+    def request_many(self, http_requests: Iterable[HTTPRequest], max_workers: int = 10,
+                     per_host_limit: int | None = None, ordered: bool = True) \
+            -> Iterator[HTTPResponse | RequestError]:
+        http_requests = list(http_requests)
+
+        hosts_semaphores = {}
+        if per_host_limit:
+            for http_request in http_requests:
+                key = (http_request.protocol, http_request.hostname, http_request.port)
+                if key not in hosts_semaphores:
+                    hosts_semaphores[key] = threading.BoundedSemaphore(per_host_limit)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PyHTTP") as executor:
+            futures = [executor.submit(self._request_with_host_limit, http_request, hosts_semaphores)
+                       for http_request in http_requests]
+            try:
+                for future in (futures if ordered else as_completed(futures)):
+                    exception = future.exception()
+                    yield exception if exception else future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
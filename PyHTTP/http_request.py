@@ -1,22 +1,36 @@
+import copy
+import gzip
 import json
 from .validation import protocol_validation, method_validation, port_validation
 from .constants import *
+from .headers import Headers
+from .request_body import BaseRequestBody, create_request_body
 from .utils import url_parse, get_default_port, join_dict
 
 
 class HTTPRequest:
+    __slots__ = ("_url", "_hostname", "_path", "_protocol", "_port", "_method", "_request_headers",
+                 "_http_version", "_query_string", "_body", "_body_copy", "_form", "_cookies", "_content_type",
+                 "_content_length", "_compress_body", "_compression_threshold", "_body_compressed",
+                 "_start_line_needs_update", "_headers_need_update", "_body_needs_update", "_request_start_line",
+                 "_request_headers_str", "_body_str", "_body_bytes", "_request_head", "_body_stream",
+                 "_cookies_need_update")
+
     _body_methods = (HTTPMethods.POST, HTTPMethods.PUT, HTTPMethods.DELETE)
+    _binary_body_types = (bytes, bytearray, memoryview)
 
     def __init__(self,
                  url: str,
                  *,
                  method: str | None = None,
-                 request_headers: dict | None = None,
+                 request_headers: dict | Headers | None = None,
                  http_version: str = HTTPVersions.HTTP1_1,
                  query_string: dict[str, str] | None = None,
-                 body: str | dict | None = None,
+                 body: str | dict | bytes | bytearray | memoryview | None = None,
                  form: dict[str, str] | None = None,
-                 cookies: dict[str, str] | None = None):
+                 cookies: dict[str, str] | None = None,
+                 compress_body: bool = False,
+                 compression_threshold: int = 1024):
 
         self._url = url
         self._hostname: str | None = None
@@ -24,21 +38,28 @@ class HTTPRequest:
         self._protocol: str | None = None
         self._port: int | None = None
         self._method = method.upper() if method else HTTPMethods.GET
-        self._request_headers = request_headers if request_headers else {}
+        self._request_headers = Headers(request_headers)
         self._http_version = http_version.upper()
         self._query_string = query_string if query_string else {}
         self._body = body
         self._body_copy = body
         self._form = form
-        self._cookies = cookies if cookies else {}
+        self._cookies = dict(cookies) if cookies else {}
+        self._cookies_need_update = bool(self._cookies)
         self._content_type: str | None = None
         self._content_length: int | None = None
+        self._compress_body = compress_body
+        self._compression_threshold = compression_threshold
+        self._body_compressed = False
         self._start_line_needs_update = True
         self._headers_need_update = True
         self._body_needs_update = True
         self._request_start_line: str | None = None
         self._request_headers_str: str | None = None
         self._body_str: str | None = None
+        self._body_bytes: bytes | bytearray | memoryview | None = None
+        self._request_head: bytes | None = None
+        self._body_stream: BaseRequestBody | None = None
         self._initialize_url()
         self._initialize_port()
         self._initialize_form()
@@ -109,6 +130,7 @@ class HTTPRequest:
 
     @property
     def request_headers(self):
+        self._initialize_cookies()
         return self._request_headers
 
     def set_header(self, key, value):
@@ -120,6 +142,14 @@ class HTTPRequest:
             del self._request_headers[key]
         self._headers_need_update = True
 
+    def copy(self) -> "HTTPRequest":
+        # Headers, cookies and the query string are copied, so the client may change them on one copy only.
+        request = copy.copy(self)
+        request._request_headers = self._request_headers.copy()
+        request._cookies = dict(self._cookies)
+        request._query_string = dict(self._query_string)
+        return request
+
     @property
     def http_version(self):
         return self._http_version
@@ -148,6 +178,7 @@ class HTTPRequest:
     def body(self, new_body):
         self._body = new_body
         self._body_copy = new_body
+        self._initialize_content_headers()
         self._headers_need_update = True
         self._body_needs_update = True
 
@@ -166,32 +197,61 @@ class HTTPRequest:
         self._headers_need_update = True
         self._body_needs_update = True
 
+    @property
+    def compress_body(self):
+        return self._compress_body
+
+    @compress_body.setter
+    def compress_body(self, new_compress_body: bool):
+        self._compress_body = new_compress_body
+        self._headers_need_update = True
+        self._body_needs_update = True
+
     @property
     def cookies(self):
         return self._cookies
 
     def set_cookie(self, key, value):
         self._cookies[key] = value
-        self._initialize_cookies()
+        self._cookies_need_update = True
+        self._headers_need_update = True
+
+    def update_cookies(self, cookies: dict[str, str]):
+        self._cookies.update(cookies)
+        self._cookies_need_update = True
+        self._headers_need_update = True
 
     def del_cookie(self, key):
         if key in self._cookies:
             del self._cookies[key]
-        self._initialize_cookies()
+        self._cookies_need_update = True
+        self._headers_need_update = True
 
     def _initialize_content_headers(self):
+        self._body_stream = None
         if self._method in self._body_methods:
-            self._content_length = len(str(self._body).encode("utf-8"))
-
-            if isinstance(self._body, dict):
+            self._body_stream = create_request_body(self._body)
+            if self._body_stream:
+                self._content_type = self._body_stream.content_type
+            elif isinstance(self._body, dict):
                 self._content_type = ContentTypes.JSON
+            elif isinstance(self._body, self._binary_body_types):
+                self._content_type = ContentTypes.OCTET_STREAM
             elif self._form:
                 self._content_type = ContentTypes.FORM
             else:
                 self._content_type = ContentTypes.TEXT
 
     def _initialize_cookies(self):
-        self.set_header(HTTPHeaders.COOKIE, join_dict(self._cookies, "; "))
+        # The Cookie header is rebuilt once per render rather than on every set_cookie call.
+        if not self._cookies_need_update:
+            return
+
+        self._cookies_need_update = False
+        if self._cookies:
+            self._request_headers[HTTPHeaders.COOKIE] = join_dict(self._cookies, "; ")
+        else:
+            self._request_headers.pop(HTTPHeaders.COOKIE, None)
 
     def _initialize_url(self):
         self._hostname, self._path, self._protocol, self._port = url_parse(self.url)
@@ -207,45 +267,130 @@ class HTTPRequest:
             self._port = get_default_port(self._protocol)
 
     def _create_request_start_line_str(self):
-        path = self._path
-        if self._query_string:
-            path += "?" + join_dict(self._query_string, "&")
-        self._request_start_line = f"{self._method} {path} {self._http_version}{INDENT}"
+        self._request_start_line = f"{self._method} {self.target} {self._http_version}{INDENT}"
         self._start_line_needs_update = False
 
-    def _create_headers_for_content_sending(self):
-        content_headers = (f"{HTTPHeaders.CONTENT_TYPE}: {self._content_type}{INDENT}"
-                           f"{HTTPHeaders.CONTENT_LENGTH}: {self._content_length}{INDENT}")
+    def _get_content_headers(self) -> list[tuple[str, str]]:
+        content_headers = [(HTTPHeaders.CONTENT_TYPE, self._content_type)]
+        if self._content_length is None:
+            content_headers.append((HTTPHeaders.TRANSFER_ENCODING, TransferEncodingValues.CHUNKED))
+        else:
+            content_headers.append((HTTPHeaders.CONTENT_LENGTH, str(self._content_length)))
+        if self._body_compressed:
+            content_headers.append((HTTPHeaders.CONTENT_ENCODING, ContentEncodings.GZIP))
         return content_headers
 
+    def _has_body(self) -> bool:
+        # Streamed bodies are framed even when empty, since the client always sends their encoding.
+        return self._method in self._body_methods and (self._body_stream is not None or bool(self._body))
+
+    def _create_headers_for_content_sending(self):
+        return "".join(f"{header}: {value}{INDENT}" for header, value in self._get_content_headers())
+
     def _create_request_headers_str(self):
-        request_headers_str = f"{HTTPHeaders.HOST}: {self._hostname}{INDENT}"
-        if self._body and self._method in self._body_methods:
-            request_headers_str += self._create_headers_for_content_sending()
+        self._initialize_cookies()
+        request_headers = [f"{HTTPHeaders.HOST}: {self._hostname}{INDENT}"]
+        if self._has_body():
+            request_headers.append(self._create_headers_for_content_sending())
 
-        for header, value in self._request_headers.items():
-            request_headers_str += f"{header}: {value}{INDENT}"
+        for header, value in self._request_headers.multi_items():
+            request_headers.append(f"{header}: {value}{INDENT}")
 
-        self._request_headers_str = request_headers_str
+        self._request_headers_str = "".join(request_headers)
         self._headers_need_update = False
 
-    def _create_request_body_str(self):
+    def _create_request_body(self):
+        self._body_str = None
+        if self._body_stream:
+            # Streamed bodies are sent by the client after the head and never buffered here.
+            self._body_str = ""
+            self._body_bytes = b""
+            self._body_compressed = False
+            self._content_length = self._body_stream.content_length
+            self._body_needs_update = False
+            self._headers_need_update = True
+            return
+
         if self._body and self._method in self._body_methods:
-            if isinstance(self.body, dict):
-                self._body_str = json.dumps(self._body)
+            if isinstance(self._body, self._binary_body_types):
+                self._body_bytes = self._body
             else:
-                self._body_str = str(self._body)
+                if isinstance(self._body, dict):
+                    self._body_str = json.dumps(self._body)
+                else:
+                    self._body_str = str(self._body)
+                self._body_bytes = self._body_str.encode()
         else:
             self._body_str = ""
+            self._body_bytes = b""
+
+        self._body_compressed = self._compress_body and len(self._body_bytes) >= self._compression_threshold
+        if self._body_compressed:
+            self._body_bytes = gzip.compress(self._body_bytes)
+            self._body_str = None
+        self._content_length = memoryview(self._body_bytes).nbytes
+
         self._body_needs_update = False
+        self._headers_need_update = True
 
-    @property
-    def request(self):
+    def _update_request(self):
+        head_needs_update = self._start_line_needs_update or self._headers_need_update or self._body_needs_update
         if self._start_line_needs_update:
             self._create_request_start_line_str()
+        if self._body_needs_update:
+            self._create_request_body()
         if self._headers_need_update:
             self._create_request_headers_str()
-        if self._body_needs_update:
-            self._create_request_body_str()
+        if head_needs_update or self._request_head is None:
+            self._request_head = (self._request_start_line + self._request_headers_str + INDENT).encode()
 
-        return self._request_start_line + self._request_headers_str + DOUBLE_INDENT + self._body_str
+    @property
+    def head(self) -> bytes:
+        self._update_request()
+        return self._request_head
+
+    @property
+    def body_bytes(self) -> bytes | bytearray | memoryview:
+        self._update_request()
+        return self._body_bytes
+
+    @property
+    def absolute_url(self) -> str:
+        authority = self._hostname
+        if self._port != get_default_port(self._protocol):
+            authority += f":{self._port}"
+        return f"{self._protocol}://{authority}{self.target}"
+
+    @property
+    def target(self) -> str:
+        if self._query_string:
+            return self._path + "?" + join_dict(self._query_string, "&")
+        return self._path
+
+    @property
+    def content_headers(self) -> list[tuple[str, str]]:
+        self._update_request()
+        if self._has_body():
+            return self._get_content_headers()
+        return []
+
+    @property
+    def body_stream(self) -> BaseRequestBody | None:
+        return self._body_stream
+
+    @property
+    def content_length(self) -> int | None:
+        self._update_request()
+        return self._content_length
+
+    @property
+    def request(self):
+        self._update_request()
+        body_str = self._body_str
+        if body_str is None:
+            body_str = bytes(self._body_bytes).decode("utf-8", errors="replace")
+        return self._request_start_line + self._request_headers_str + INDENT + body_str
+
+    @property
+    def request_bytes(self):
+        return self.head + self.body_bytes
@@ -1,5 +1,16 @@
+import codecs
+import json
+from typing import Iterator
+
 from .constants import *
-from .utils import parse_cookie, parse_headers
+from .headers import Headers
+from .metrics import RequestTimings
+from .response_stream import ResponseBodyStream
+from .utils import get_charset, parse_cookie, parse_headers
+
+
+DEFAULT_CHARSET = "utf-8"
+_NOT_PARSED = object()
 
 
 class ResponseCookie:
@@ -20,44 +31,159 @@ class ResponseCookie:
 
 
 class HTTPResponse:
+    __slots__ = ("_response", "_status_line", "http_version", "status_code", "headers", "raw", "http_request",
+                 "cache_status", "timings", "_content", "_text", "_json", "_cookies")
+
     def __init__(self, response: str | None = None, hand_init: bool = False):
         if not hand_init and not response:
             raise ValueError("Response is required when hand initialization is disabled")
 
-        self.response = response
+        self._response: str | None = None
+        self._status_line: str | None = None
         self.http_version: str | None = None
         self.status_code: int | None = None
-        self.headers = {}
-        self.body: str | None = None
-        self.cookies = {}
+        self.headers = Headers()
+        self.raw: ResponseBodyStream | None = None
+        self.http_request = None
+        self.cache_status: str | None = None
+        self.timings: RequestTimings | None = None
+        self._content: bytes | None = None
+        self._text: str | None = None
+        self._json = _NOT_PARSED
+        self._cookies: dict[str, ResponseCookie] | None = None
         if response:
-            self._parse_response()
-            self.initialize_cookies()
+            self._parse_response(response)
 
-    def initialize_cookies(self):
-        cookies_lst = self.headers.get(HTTPHeaders.SET_COOKIE)
-        if cookies_lst:
-            for cookie in cookies_lst:
+    @property
+    def content(self) -> bytes | None:
+        if self._content is None and self.raw is not None:
+            with self.raw:
+                self._content = self.raw.read()
+        return self._content
+
+    @content.setter
+    def content(self, new_content: bytes | None):
+        self._content = new_content
+        self._text = None
+        self._json = _NOT_PARSED
+        self._response = None
+
+    def read(self) -> bytes | None:
+        return self.content
+
+    def iter_content(self, chunk_size: int = 8192) -> Iterator[bytes]:
+        if self._content is not None or self.raw is None:
+            content = self._content or b""
+            for index in range(0, len(content), chunk_size):
+                yield content[index:index + chunk_size]
+            return
+
+        with self.raw:
+            while True:
+                chunk = self.raw.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def iter_lines(self, chunk_size: int = 8192) -> Iterator[bytes]:
+        pending = b""
+        for chunk in self.iter_content(chunk_size):
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line[:-1] if line.endswith(b"\r") else line
+
+        if pending:
+            yield pending
+
+    def close(self):
+        if self.raw is not None:
+            self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def encoding(self) -> str:
+        charset = get_charset(self.headers.get(HTTPHeaders.CONTENT_TYPE))
+        try:
+            return codecs.lookup(charset).name if charset else DEFAULT_CHARSET
+        except LookupError:
+            return DEFAULT_CHARSET
+
+    @property
+    def text(self) -> str | None:
+        if self._text is None and self.content is not None:
+            self._text = self.content.decode(self.encoding, errors="replace")
+        return self._text
+
+    def json(self):
+        if self._json is _NOT_PARSED:
+            # Without a declared charset json detects UTF-8, UTF-16 or UTF-32 from the bytes themselves.
+            has_charset = get_charset(self.headers.get(HTTPHeaders.CONTENT_TYPE)) is not None
+            self._json = json.loads(self.text if has_charset else self.content)
+        return self._json
+
+    @property
+    def body(self) -> str | None:
+        return self.text
+
+    @body.setter
+    def body(self, new_body: str | None):
+        self.content = new_body.encode(self.encoding, errors="replace") if new_body is not None else None
+
+    @property
+    def response_headers(self) -> str | None:
+        if self._status_line is None:
+            return None
+        return self._status_line + INDENT + self.headers.raw
+
+    @property
+    def response(self) -> str | None:
+        if self._response is None and self._status_line is not None:
+            self._response = self.response_headers + DOUBLE_INDENT + (self.text or "")
+        return self._response
+
+    @response.setter
+    def response(self, new_response: str | None):
+        self._response = new_response
+
+    @property
+    def cookies(self) -> dict[str, ResponseCookie]:
+        if self._cookies is None:
+            cookies = {}
+            for cookie in self.headers.get_all(HTTPHeaders.SET_COOKIE):
                 cookie_obj = ResponseCookie(cookie)
-                self.cookies[cookie_obj.name] = cookie_obj
+                cookies[cookie_obj.name] = cookie_obj
+            self._cookies = cookies
+        return self._cookies
+
+    @cookies.setter
+    def cookies(self, new_cookies: dict[str, ResponseCookie]):
+        self._cookies = new_cookies
+
+    def initialize_cookies(self):
+        # Set-Cookie headers are parsed on first access to cookies.
+        self._cookies = None
 
     def initialize_headers(self, http_headers: str):
         parsed_headers = parse_headers(http_headers)
 
+        self._status_line = parsed_headers["status_line"]
         self.http_version = parsed_headers["http_version"]
         self.status_code = parsed_headers["status_code"]
         self.headers = parsed_headers["headers"]
+        self._cookies = None
+        self._response = None
 
-    def _parse_response(self):
-        split_response = self.response.split(DOUBLE_INDENT)
-        response_headers = split_response[0]
-
-        response_body = None
-        if len(split_response) > 1:
-            response_body = split_response[1]
-
-        self.body = response_body
+    def _parse_response(self, response: str):
+        response_headers, _, body = response.partition(DOUBLE_INDENT)
         self.initialize_headers(response_headers)
+        if body:
+            self.body = body
 
     def __bool__(self):
         return self.status_code == HTTPStatusCodes.OK
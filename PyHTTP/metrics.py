@@ -0,0 +1,268 @@
+import bisect
+import threading
+import time
+
+from .constants import *
+
+
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class RequestTimings:
+    # Phases are measured with time.perf_counter_ns and add up to total_ns once the body is received.
+    __slots__ = ("started_at", "throttle_ns", "queue_ns", "dns_ns", "connect_ns", "tls_ns", "send_ns", "ttfb_ns",
+                 "download_ns", "total_ns", "bytes_sent", "bytes_received", "connection_reused", "_acquired_at",
+                 "_sent_at", "_headers_received_at", "_received_offset")
+
+    def __init__(self):
+        self.started_at = time.perf_counter_ns()
+        self.throttle_ns = 0
+        self.queue_ns = 0
+        self.dns_ns = 0
+        self.connect_ns = 0
+        self.tls_ns = 0
+        self.send_ns = 0
+        self.ttfb_ns = 0
+        self.download_ns = 0
+        self.total_ns = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.connection_reused = False
+        self._acquired_at = self.started_at
+        self._sent_at = self.started_at
+        self._headers_received_at = self.started_at
+        self._received_offset = 0
+
+    def connection_acquired(self, connect_timings: tuple[int, int, int] | None):
+        self._acquired_at = time.perf_counter_ns()
+        if connect_timings is None:
+            self.connection_reused = True
+            self.dns_ns = self.connect_ns = self.tls_ns = 0
+        else:
+            self.connection_reused = False
+            self.dns_ns, self.connect_ns, self.tls_ns = connect_timings
+        # Retries on another connection count as waiting too, time spent in the rate limiter does not.
+        self.queue_ns = max(0, self._acquired_at - self.started_at - self.throttle_ns - self.dns_ns - self.connect_ns
+                            - self.tls_ns)
+
+    def request_sent(self, bytes_sent: int, received_offset: int = 0):
+        self._sent_at = time.perf_counter_ns()
+        self.send_ns = self._sent_at - self._acquired_at
+        self.bytes_sent = bytes_sent
+        self._received_offset = received_offset
+
+    def headers_received(self, received_position: int = 0):
+        self._headers_received_at = time.perf_counter_ns()
+        self.ttfb_ns = self._headers_received_at - self._sent_at
+        self.total_ns = self._headers_received_at - self.started_at
+        self.bytes_received = received_position - self._received_offset
+
+    def body_received(self, received_position: int = 0):
+        now = time.perf_counter_ns()
+        self.download_ns = now - self._headers_received_at
+        self.total_ns = now - self.started_at
+        self.bytes_received = received_position - self._received_offset
+
+    def to_dict(self) -> dict[str, float | int | bool]:
+        return {
+            "throttle_ms": self.throttle_ns / 1e6,
+            "queue_ms": self.queue_ns / 1e6,
+            "dns_ms": self.dns_ns / 1e6,
+            "connect_ms": self.connect_ns / 1e6,
+            "tls_ms": self.tls_ns / 1e6,
+            "send_ms": self.send_ns / 1e6,
+            "ttfb_ms": self.ttfb_ns / 1e6,
+            "download_ms": self.download_ns / 1e6,
+            "total_ms": self.total_ns / 1e6,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "connection_reused": self.connection_reused,
+        }
+
+    def __repr__(self):
+        return (f"RequestTimings(total={self.total_ns / 1e6:.3f}ms, ttfb={self.ttfb_ns / 1e6:.3f}ms, "
+                f"reused={self.connection_reused})")
+
+
+class LatencyHistogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        # The last count is the +Inf bucket.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def get_percentile(self, percentile: float) -> float | None:
+        if not self.count:
+            return None
+
+        rank = percentile / 100 * self.count
+        cumulative_count = 0
+        for bucket, count in zip(self.buckets, self.counts):
+            cumulative_count += count
+            if cumulative_count >= rank:
+                return bucket
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.get_percentile(50),
+            "p99": self.get_percentile(99),
+        }
+
+
+class HostMetrics:
+    __slots__ = ("requests_count", "errors_count", "redirects_count", "connections_count", "reused_count",
+                 "bytes_sent", "bytes_received", "status_codes", "latency", "ttfb", "throttle")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.requests_count = 0
+        self.errors_count = 0
+        self.redirects_count = 0
+        self.connections_count = 0
+        self.reused_count = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.status_codes: dict[int, int] = {}
+        self.latency = LatencyHistogram(buckets)
+        self.ttfb = LatencyHistogram(buckets)
+        self.throttle = LatencyHistogram(buckets)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests_count,
+            "errors": self.errors_count,
+            "redirects": self.redirects_count,
+            "connections_opened": self.connections_count,
+            "reused_connections": self.reused_count,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "status_codes": dict(self.status_codes),
+            "latency_ms": self.latency.to_dict(),
+            "ttfb_ms": self.ttfb.to_dict(),
+            "throttle_ms": self.throttle.to_dict(),
+        }
+
+
+class MetricsAggregator:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._hosts: dict[str, HostMetrics] = {}
+        self._clients = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_host(http_request) -> str:
+        return f"{http_request.protocol}://{http_request.hostname}:{http_request.port}"
+
+    def _get_host_metrics(self, http_request) -> HostMetrics:
+        host = self._get_host(http_request)
+        host_metrics = self._hosts.get(host)
+        if host_metrics is None:
+            host_metrics = self._hosts[host] = HostMetrics(self.buckets)
+        return host_metrics
+
+    def attach(self, client):
+        client.add_hook(ClientEvents.CONNECT, self.on_connect)
+        client.add_hook(ClientEvents.BODY_COMPLETE, self.on_body_complete)
+        client.add_hook(ClientEvents.REDIRECT, self.on_redirect)
+        client.add_hook(ClientEvents.ERROR, self.on_error)
+        self._clients.append(client)
+
+    def on_connect(self, http_request, connection):
+        with self._lock:
+            self._get_host_metrics(http_request).connections_count += 1
+
+    def on_body_complete(self, http_request, http_response):
+        timings = http_response.timings
+        with self._lock:
+            host_metrics = self._get_host_metrics(http_request)
+            host_metrics.requests_count += 1
+            host_metrics.status_codes[http_response.status_code] = \
+                host_metrics.status_codes.get(http_response.status_code, 0) + 1
+            if timings is not None:
+                host_metrics.latency.observe(timings.total_ns / 1e6)
+                host_metrics.ttfb.observe(timings.ttfb_ns / 1e6)
+                host_metrics.throttle.observe(timings.throttle_ns / 1e6)
+                host_metrics.bytes_sent += timings.bytes_sent
+                host_metrics.bytes_received += timings.bytes_received
+                if timings.connection_reused:
+                    host_metrics.reused_count += 1
+
+    def on_redirect(self, http_request, http_response, redirect_request):
+        with self._lock:
+            self._get_host_metrics(http_request).redirects_count += 1
+
+    def on_error(self, http_request, exception: Exception):
+        with self._lock:
+            self._get_host_metrics(http_request).errors_count += 1
+
+    def get_pool_stats(self) -> dict:
+        pools_stats = [client.connection_pool.stats for client in self._clients]
+        hosts = {}
+        for pool_stats in pools_stats:
+            for host, host_stats in pool_stats["hosts"].items():
+                totals = hosts.setdefault(host, {"connections": 0, "idle_connections": 0})
+                for name, value in host_stats.items():
+                    totals[name] += value
+
+        return {
+            "connections": sum(pool_stats["connections"] for pool_stats in pools_stats),
+            "idle_connections": sum(pool_stats["idle_connections"] for pool_stats in pools_stats),
+            "waiting_requests": sum(pool_stats["waiting_requests"] for pool_stats in pools_stats),
+            "hosts": hosts,
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            hosts = {host: host_metrics.to_dict() for host, host_metrics in self._hosts.items()}
+        return {"hosts": hosts, "pool": self.get_pool_stats()}
+
+    def render_prometheus(self, prefix: str = "pyhttp") -> str:
+        snapshot = self.snapshot()
+        lines = []
+        counters = (("requests", "requests_total"), ("errors", "errors_total"), ("redirects", "redirects_total"),
+                    ("connections_opened", "connections_opened_total"),
+                    ("reused_connections", "reused_connections_total"),
+                    ("bytes_sent", "sent_bytes_total"), ("bytes_received", "received_bytes_total"))
+        for key, name in counters:
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for host, host_metrics in snapshot["hosts"].items():
+                lines.append(f'{prefix}_{name}{{host="{host}"}} {host_metrics[key]}')
+
+        lines.append(f"# TYPE {prefix}_responses_total counter")
+        for host, host_metrics in snapshot["hosts"].items():
+            for status_code, count in host_metrics["status_codes"].items():
+                lines.append(f'{prefix}_responses_total{{host="{host}",status="{status_code}"}} {count}')
+
+        for key, name in (("latency_ms", "request_duration_milliseconds"), ("ttfb_ms", "ttfb_milliseconds"),
+                          ("throttle_ms", "rate_limit_wait_milliseconds")):
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for host, host_metrics in snapshot["hosts"].items():
+                histogram = host_metrics[key]
+                cumulative_count = 0
+                for bucket, count in histogram["buckets"].items():
+                    cumulative_count += count
+                    lines.append(f'{prefix}_{name}_bucket{{host="{host}",le="{bucket}"}} {cumulative_count}')
+                lines.append(f'{prefix}_{name}_sum{{host="{host}"}} {histogram["sum"]}')
+                lines.append(f'{prefix}_{name}_count{{host="{host}"}} {histogram["count"]}')
+
+        pool = snapshot["pool"]
+        for name in ("connections", "idle_connections", "waiting_requests"):
+            lines.append(f"# TYPE {prefix}_pool_{name} gauge")
+            lines.append(f"{prefix}_pool_{name} {pool[name]}")
+        for name in ("connections", "idle_connections"):
+            lines.append(f"# TYPE {prefix}_pool_host_{name} gauge")
+            for host, host_stats in pool["hosts"].items():
+                lines.append(f'{prefix}_pool_host_{name}{{host="{host}"}} {host_stats[name]}')
+        return "\n".join(lines) + "\n"
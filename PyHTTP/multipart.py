@@ -0,0 +1,128 @@
+import mimetypes
+import os
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from .constants import *
+from .request_body import BaseRequestBody, FileBody
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class MultipartPart:
+    def __init__(self,
+                 name: str,
+                 data: str | bytes | BinaryIO | Path,
+                 *,
+                 filename: str | None = None,
+                 content_type: str | None = None,
+                 headers: dict[str, str] | None = None):
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers if headers else {}
+
+        if isinstance(data, str):
+            data = data.encode()
+        self._data = data if isinstance(data, (bytes, bytearray, memoryview)) else None
+        self._file_body = None if self._data is not None else FileBody(data)
+
+    @property
+    def head(self) -> bytes:
+        disposition = f'form-data; name="{_quote(self.name)}"'
+        if self.filename is not None:
+            disposition += f'; filename="{_quote(self.filename)}"'
+
+        head_lines = [f"{HTTPHeaders.CONTENT_DISPOSITION}: {disposition}{INDENT}"]
+        if self.content_type:
+            head_lines.append(f"{HTTPHeaders.CONTENT_TYPE}: {self.content_type}{INDENT}")
+        for header, value in self.headers.items():
+            head_lines.append(f"{header}: {value}{INDENT}")
+        head_lines.append(INDENT)
+        return "".join(head_lines).encode()
+
+    @property
+    def data_length(self) -> int | None:
+        if self._data is not None:
+            return memoryview(self._data).nbytes
+        return self._file_body.content_length
+
+    def iter_data(self) -> Iterator[bytes | memoryview]:
+        if self._data is not None:
+            yield self._data
+        else:
+            yield from self._file_body.iter_chunks()
+
+    def rewind(self) -> bool:
+        return self._data is not None or self._file_body.rewind()
+
+
+class MultipartForm(BaseRequestBody):
+    def __init__(self,
+                 fields: dict[str, str] | None = None,
+                 files: dict[str, BinaryIO | Path | str] | None = None,
+                 boundary: str | None = None):
+        self.boundary = boundary if boundary else uuid.uuid4().hex
+        self.parts: list[MultipartPart] = []
+
+        for name, value in (fields or {}).items():
+            self.add_field(name, value)
+        for name, file in (files or {}).items():
+            self.add_file(name, file)
+
+    @property
+    def content_type(self) -> str:
+        return f"{ContentTypes.MULTIPART_FORM}; boundary={self.boundary}"
+
+    def add_field(self, name: str, value: str | bytes, content_type: str | None = None,
+                  headers: dict[str, str] | None = None) -> MultipartPart:
+        part = MultipartPart(name, value, content_type=content_type, headers=headers)
+        self.parts.append(part)
+        return part
+
+    def add_file(self, name: str, file: BinaryIO | Path | str | bytes, filename: str | None = None,
+                 content_type: str | None = None, headers: dict[str, str] | None = None) -> MultipartPart:
+        if isinstance(file, str):
+            file = Path(file)
+
+        if filename is None:
+            file_path = file if isinstance(file, Path) else getattr(file, "name", None)
+            filename = os.path.basename(file_path) if isinstance(file_path, (str, Path)) else name
+
+        if content_type is None:
+            content_type = mimetypes.guess_type(filename)[0] or ContentTypes.OCTET_STREAM
+
+        part = MultipartPart(name, file, filename=filename, content_type=content_type, headers=headers)
+        self.parts.append(part)
+        return part
+
+    def _get_delimiter(self) -> bytes:
+        return f"--{self.boundary}{INDENT}".encode()
+
+    def _get_close_delimiter(self) -> bytes:
+        return f"--{self.boundary}--{INDENT}".encode()
+
+    @property
+    def content_length(self) -> int | None:
+        content_length = len(self._get_close_delimiter())
+        delimiter_length = len(self._get_delimiter())
+        for part in self.parts:
+            data_length = part.data_length
+            if data_length is None:
+                return None
+            content_length += delimiter_length + len(part.head) + data_length + len(INDENT_BYTES)
+        return content_length
+
+    def iter_chunks(self) -> Iterator[bytes | memoryview]:
+        delimiter = self._get_delimiter()
+        for part in self.parts:
+            yield delimiter + part.head
+            yield from part.iter_data()
+            yield INDENT_BYTES
+        yield self._get_close_delimiter()
+
+    def rewind(self) -> bool:
+        return all(part.rewind() for part in self.parts)
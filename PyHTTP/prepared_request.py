@@ -0,0 +1,145 @@
+from collections import ChainMap
+
+from .constants import *
+from .headers import Headers
+from .http_request import HTTPRequest
+from .validation import method_validation
+from .utils import join_dict
+
+
+class RequestTemplate:
+    def __init__(self,
+                 url: str,
+                 *,
+                 method: str | None = None,
+                 request_headers: dict[str, str] | Headers | None = None,
+                 http_version: str = HTTPVersions.HTTP1_1):
+        method = method.upper() if method else HTTPMethods.GET
+        method_validation(method)
+
+        # Parsing and validation run once through a regular request.
+        http_request = HTTPRequest(url, method=method, http_version=http_version)
+        self.url = http_request.url
+        self.method = http_request.method
+        self.hostname = http_request.hostname
+        self.path = http_request.path
+        self.protocol = http_request.protocol
+        self.port = http_request.port
+        self.http_version = http_request.http_version
+        self.request_headers = Headers(request_headers)
+
+        self.start_line_prefix = f"{self.method} {self.path}".encode()
+        self.static_head = self.create_static_head(self.hostname, self.http_version)
+        self.static_header_names = {HTTPHeaders.HOST.lower()} | {header.lower() for header in self.request_headers}
+
+    def create_static_head(self, hostname: str, http_version: str, excluded_headers: set[str] = frozenset()) -> bytes:
+        static_head = [f" {http_version}{INDENT}"]
+        if HTTPHeaders.HOST.lower() not in excluded_headers:
+            static_head.append(f"{HTTPHeaders.HOST}: {hostname}{INDENT}")
+        static_head.extend(f"{header}: {value}{INDENT}" for header, value in self.request_headers.multi_items()
+                           if header.lower() not in excluded_headers)
+        return "".join(static_head).encode()
+
+    def prepare(self,
+                *,
+                query_string: dict[str, str] | None = None,
+                body: str | dict | bytes | bytearray | memoryview | None = None,
+                request_headers: dict[str, str] | Headers | None = None) -> "PreparedRequest":
+        return PreparedRequest(self, query_string=query_string, body=body, request_headers=request_headers)
+
+
+class PreparedRequest(HTTPRequest):
+    __slots__ = ("_template",)
+
+    def __init__(self,
+                 template: RequestTemplate,
+                 *,
+                 query_string: dict[str, str] | None = None,
+                 body: str | dict | bytes | bytearray | memoryview | None = None,
+                 request_headers: dict[str, str] | Headers | None = None):
+        # HTTPRequest.__init__ is skipped on purpose: everything it parses is taken from the template.
+        self._template = template
+        self._url = template.url
+        self._hostname = template.hostname
+        self._path = template.path
+        self._protocol = template.protocol
+        self._port = template.port
+        self._method = template.method
+        self._http_version = template.http_version
+        self._request_headers = Headers(request_headers)
+        self._query_string = query_string if query_string else {}
+        self._body = body
+        self._body_copy = body
+        self._form = None
+        self._cookies = {}
+        self._cookies_need_update = False
+        self._content_type = None
+        self._content_length = None
+        self._compress_body = False
+        self._compression_threshold = 0
+        self._body_compressed = False
+        self._start_line_needs_update = False
+        self._headers_need_update = True
+        self._body_needs_update = True
+        self._request_start_line = None
+        self._request_headers_str = None
+        self._body_str = None
+        self._body_bytes = None
+        self._request_head = None
+        self._body_stream = None
+        if body is not None:
+            self._initialize_content_headers()
+
+    @property
+    def template(self) -> RequestTemplate:
+        return self._template
+
+    @property
+    def request_headers(self):
+        self._initialize_cookies()
+        return ChainMap(self._request_headers, self._template.request_headers)
+
+    def _get_start_line_prefix(self) -> bytes:
+        template = self._template
+        if (self._method, self._path) == (template.method, template.path):
+            return template.start_line_prefix
+        return f"{self._method} {self._path}".encode()
+
+    def _get_static_head(self, content_headers: list[tuple[str, str]]) -> bytes:
+        # Per-call headers, cookies and content headers replace template headers of the same name.
+        template = self._template
+        overridden_headers = {header.lower() for header in self._request_headers}
+        overridden_headers.update(header.lower() for header, _ in content_headers)
+        overridden_headers &= template.static_header_names
+        if not overridden_headers and (self._hostname, self._http_version) == (template.hostname,
+                                                                              template.http_version):
+            return template.static_head
+        return template.create_static_head(self._hostname, self._http_version, overridden_headers)
+
+    def _update_request(self):
+        self._initialize_cookies()
+        if self._body_needs_update:
+            self._create_request_body()
+        if not (self._start_line_needs_update or self._headers_need_update) and self._request_head is not None:
+            return
+
+        content_headers = self._get_content_headers() if self._has_body() else []
+        head = [self._get_start_line_prefix()]
+        if self._query_string:
+            head.append(("?" + join_dict(self._query_string, "&")).encode())
+        head.append(self._get_static_head(content_headers))
+
+        if content_headers:
+            head.append("".join(f"{header}: {value}{INDENT}" for header, value in content_headers).encode())
+        if self._request_headers:
+            head.append("".join(f"{header}: {value}{INDENT}"
+                                for header, value in self._request_headers.multi_items()).encode())
+        head.append(INDENT_BYTES)
+
+        self._request_head = b"".join(head)
+        self._start_line_needs_update = False
+        self._headers_need_update = False
+
+    @property
+    def request(self):
+        return (self.head + bytes(self.body_bytes)).decode("utf-8", errors="replace")
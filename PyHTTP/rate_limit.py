@@ -0,0 +1,200 @@
+import threading
+import time
+
+from .constants import *
+from .http_response import HTTPResponse
+from .metrics import LatencyHistogram
+from .utils import parse_retry_after
+
+
+THROTTLE_STATUS_CODES = (HTTPStatusCodes.TOO_MANY_REQUESTS, HTTPStatusCodes.SERVICE_UNAVAILABLE)
+
+
+class HostRateState:
+    __slots__ = ("rate", "burst", "max_in_flight", "current_rate", "tokens", "updated_at", "in_flight",
+                 "waiting_count", "blocked_until", "requests_count", "delayed_count", "throttled_count",
+                 "timed_out_count", "queued_ns", "queued", "condition")
+
+    def __init__(self, rate: float | None, burst: float | None, max_in_flight: int | None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 1.0)
+        self.max_in_flight = max_in_flight
+        self.current_rate = rate
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.in_flight = 0
+        self.waiting_count = 0
+        self.blocked_until = 0.0
+        self.requests_count = 0
+        self.delayed_count = 0
+        self.throttled_count = 0
+        self.timed_out_count = 0
+        self.queued_ns = 0
+        self.queued = LatencyHistogram()
+        self.condition = threading.Condition()
+
+    def refill(self, now: float):
+        if self.current_rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.current_rate)
+        self.updated_at = now
+
+    def get_wait_time(self, now: float) -> float | None:
+        # Zero means a request may start now, None waits for a request in flight to finish.
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            return None
+
+        self.refill(now)
+        if self.current_rate is None or self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.current_rate
+
+    def to_dict(self) -> dict:
+        return {
+            "rate": self.current_rate,
+            "configured_rate": self.rate,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting_count,
+            "blocked_for": max(0.0, self.blocked_until - time.monotonic()),
+            "requests": self.requests_count,
+            "delayed_requests": self.delayed_count,
+            "throttled_responses": self.throttled_count,
+            "timed_out_requests": self.timed_out_count,
+            "queued_ms_total": self.queued_ns / 1e6,
+            "queued_ms": self.queued.to_dict(),
+        }
+
+
+class RatePermit:
+    __slots__ = ("_limiter", "hostname", "queued_ns", "_released")
+
+    def __init__(self, limiter: "RateLimiter", hostname: str, queued_ns: int):
+        self._limiter = limiter
+        self.hostname = hostname
+        self.queued_ns = queued_ns
+        self._released = False
+
+    def release(self, http_response: HTTPResponse | None = None):
+        if not self._released:
+            self._released = True
+            self._limiter.release(self.hostname, http_response)
+
+
+class RateLimiter:
+    def __init__(self,
+                 rate: float | None = None,
+                 burst: float | None = None,
+                 max_in_flight: int | None = None,
+                 *,
+                 host_limits: dict[str, dict[str, float | int | None]] | None = None,
+                 decrease_factor: float = 0.5,
+                 increase_ratio: float = 0.05,
+                 min_rate: float = 0.1,
+                 default_retry_after: float = 1.0,
+                 max_retry_after: float = 60.0):
+        if rate is not None and rate <= 0:
+            raise ValueError("Rate must be greater than 0")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("Max in flight requests must be greater than 0")
+        if not 0 < decrease_factor <= 1:
+            raise ValueError("Decrease factor must be in (0, 1]")
+
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.host_limits = {hostname.lower(): limits for hostname, limits in (host_limits or {}).items()}
+        self.decrease_factor = decrease_factor
+        self.increase_ratio = increase_ratio
+        self.min_rate = min_rate
+        self.default_retry_after = default_retry_after
+        self.max_retry_after = max_retry_after
+        self._hosts: dict[str, HostRateState] = {}
+        self._lock = threading.Lock()
+
+    def _get_host_state(self, hostname: str) -> HostRateState:
+        host_state = self._hosts.get(hostname)
+        if host_state is None:
+            with self._lock:
+                host_state = self._hosts.get(hostname)
+                if host_state is None:
+                    limits = self.host_limits.get(hostname, {})
+                    host_state = self._hosts[hostname] = HostRateState(limits.get("rate", self.rate),
+                                                                       limits.get("burst", self.burst),
+                                                                       limits.get("max_in_flight",
+                                                                                  self.max_in_flight))
+        return host_state
+
+    def acquire(self, hostname: str, deadline: float | None = None) -> RatePermit:
+        hostname = hostname.lower()
+        host_state = self._get_host_state(hostname)
+        started_at = time.perf_counter_ns()
+        delayed = False
+        with host_state.condition:
+            host_state.waiting_count += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait_time = host_state.get_wait_time(now)
+                    if wait_time == 0:
+                        break
+                    if deadline is not None:
+                        # A wait which cannot end before the deadline fails right away instead of sleeping first.
+                        remaining = deadline - now
+                        if remaining <= 0 or (wait_time is not None and wait_time >= remaining):
+                            host_state.timed_out_count += 1
+                            raise TimeoutError(f"Timed out waiting for the rate limit of {hostname}")
+                        if wait_time is None:
+                            wait_time = remaining
+                    delayed = True
+                    host_state.condition.wait(wait_time)
+            finally:
+                host_state.waiting_count -= 1
+
+            if host_state.current_rate is not None:
+                host_state.tokens -= 1
+            host_state.in_flight += 1
+
+            queued_ns = time.perf_counter_ns() - started_at
+            host_state.requests_count += 1
+            host_state.queued_ns += queued_ns
+            host_state.queued.observe(queued_ns / 1e6)
+            if delayed:
+                host_state.delayed_count += 1
+        return RatePermit(self, hostname, queued_ns)
+
+    def release(self, hostname: str, http_response: HTTPResponse | None = None):
+        host_state = self._get_host_state(hostname.lower())
+        with host_state.condition:
+            host_state.in_flight -= 1
+            if http_response is not None:
+                self._adjust_rate(host_state, http_response)
+            host_state.condition.notify_all()
+
+    def _adjust_rate(self, host_state: HostRateState, http_response: HTTPResponse):
+        if http_response.status_code in THROTTLE_STATUS_CODES:
+            # The server asked us to slow down: pause the host and halve its rate.
+            host_state.throttled_count += 1
+            retry_after = parse_retry_after(http_response.headers.get(HTTPHeaders.RETRY_AFTER))
+            pause = min(self.max_retry_after, retry_after if retry_after is not None else self.default_retry_after)
+            host_state.blocked_until = max(host_state.blocked_until, time.monotonic() + pause)
+            if host_state.current_rate is not None:
+                host_state.refill(time.monotonic())
+                host_state.current_rate = max(self.min_rate, host_state.current_rate * self.decrease_factor)
+                host_state.tokens = min(host_state.tokens, 0)
+        elif host_state.rate is not None and host_state.current_rate < host_state.rate \
+                and http_response.status_code < HTTPStatusCodes.INTERNAL_SERVER_ERROR:
+            # Successful responses win the rate back additively.
+            host_state.refill(time.monotonic())
+            host_state.current_rate = min(host_state.rate,
+                                          host_state.current_rate + host_state.rate * self.increase_ratio)
+
+    @property
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            hosts = list(self._hosts.items())
+        stats = {}
+        for hostname, host_state in hosts:
+            with host_state.condition:
+                stats[hostname] = host_state.to_dict()
+        return stats
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+
+from .constants import *
+from .http_request import HTTPRequest
+from .http_response import HTTPResponse
+from .utils import parse_cache_control
+
+
+PERMANENT_REDIRECT_STATUS_CODES = (HTTPStatusCodes.MOVED_PERMANENTLY, HTTPStatusCodes.PERMANENT_REDIRECT)
+TEMPORARY_REDIRECT_STATUS_CODES = (HTTPStatusCodes.FOUND, HTTPStatusCodes.TEMPORARY_REDIRECT)
+
+
+class RedirectCacheEntry:
+    __slots__ = ("status_code", "location", "expires_at")
+
+    def __init__(self, status_code: int, location: str, expires_at: float | None):
+        self.status_code = status_code
+        self.location = location
+        self.expires_at = expires_at
+
+
+class RedirectCache:
+    def __init__(self, max_entries: int = 1024):
+        if max_entries < 1:
+            raise ValueError("Max entries must be greater than 0")
+
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], RedirectCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_count = 0
+        self.stores_count = 0
+        self.evictions_count = 0
+
+    @staticmethod
+    def get_key(http_request: HTTPRequest) -> tuple[str, str]:
+        return http_request.method, http_request.absolute_url
+
+    @staticmethod
+    def _get_lifetime(http_response: HTTPResponse) -> float | None:
+        # None means the redirect never expires, zero that it must not be cached.
+        cache_control = parse_cache_control(http_response.headers.get(HTTPHeaders.CACHE_CONTROL))
+        if CacheControlDirectives.NO_STORE in cache_control or CacheControlDirectives.NO_CACHE in cache_control:
+            return 0
+        if CacheControlDirectives.MAX_AGE in cache_control:
+            try:
+                return max(0, int(cache_control[CacheControlDirectives.MAX_AGE]))
+            except ValueError:
+                return 0
+        # Permanent redirects are cacheable by default, temporary ones only with explicit freshness.
+        return None if http_response.status_code in PERMANENT_REDIRECT_STATUS_CODES else 0
+
+    def store(self, http_request: HTTPRequest, http_response: HTTPResponse, location: str) -> bool:
+        if http_response.status_code not in PERMANENT_REDIRECT_STATUS_CODES + TEMPORARY_REDIRECT_STATUS_CODES:
+            return False
+
+        lifetime = self._get_lifetime(http_response)
+        if lifetime == 0:
+            return False
+
+        entry = RedirectCacheEntry(http_response.status_code, location,
+                                   time.monotonic() + lifetime if lifetime is not None else None)
+        key = self.get_key(http_request)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.stores_count += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions_count += 1
+        return True
+
+    def lookup(self, http_request: HTTPRequest) -> RedirectCacheEntry | None:
+        key = self.get_key(http_request)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at is not None and time.monotonic() >= entry.expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits_count += 1
+            return entry
+
+    def invalidate(self, http_request: HTTPRequest):
+        with self._lock:
+            self._entries.pop(self.get_key(http_request), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        # Every hit is a round trip that was not made.
+        return {
+            "entries": len(self._entries),
+            "avoided_round_trips": self.hits_count,
+            "stores": self.stores_count,
+            "evictions": self.evictions_count,
+        }
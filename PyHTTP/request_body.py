@@ -0,0 +1,156 @@
+import io
+import os
+import socket
+import ssl
+import stat
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+from .constants import *
+
+
+CHUNK_SIZE = 65536
+
+
+class BaseRequestBody(ABC):
+    content_type = ContentTypes.OCTET_STREAM
+
+    @property
+    @abstractmethod
+    def content_length(self) -> int | None:
+        pass
+
+    @abstractmethod
+    def iter_chunks(self) -> Iterator[bytes | memoryview]:
+        pass
+
+    def rewind(self) -> bool:
+        return False
+
+    def iter_encoded_chunks(self) -> Iterator[bytes | memoryview]:
+        if self.content_length is not None:
+            yield from self.iter_chunks()
+            return
+
+        for chunk in self.iter_chunks():
+            if len(chunk):
+                yield f"{len(chunk):x}{INDENT}".encode()
+                yield chunk
+                yield INDENT_BYTES
+        yield b"0" + DOUBLE_INDENT_BYTES
+
+    def send(self, sock: socket.socket | ssl.SSLSocket) -> int:
+        sent = 0
+        for chunk in self.iter_encoded_chunks():
+            sock.sendall(chunk)
+            sent += len(chunk)
+        return sent
+
+
+class FileBody(BaseRequestBody):
+    def __init__(self, file: BinaryIO | str | os.PathLike, content_length: int | None = None):
+        self._path = os.fspath(file) if isinstance(file, (str, os.PathLike)) else None
+        self._file = None if self._path else file
+        self._offset = 0 if self._path else self._get_offset(file)
+        self._content_length = content_length if content_length is not None else self._get_size()
+
+    @staticmethod
+    def _get_offset(file: BinaryIO) -> int:
+        try:
+            return file.tell()
+        except (AttributeError, OSError):
+            return 0
+
+    def _get_size(self) -> int | None:
+        # Pipes, sockets and devices report a size of 0 whatever they hold, so they are sent chunked.
+        if self._path:
+            file_stat = os.stat(self._path)
+            return file_stat.st_size if stat.S_ISREG(file_stat.st_mode) else None
+
+        try:
+            file_stat = os.fstat(self._file.fileno())
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+        else:
+            return file_stat.st_size - self._offset if stat.S_ISREG(file_stat.st_mode) else None
+
+        try:
+            end = self._file.seek(0, os.SEEK_END)
+            self._file.seek(self._offset)
+            return end - self._offset
+        except (AttributeError, OSError):
+            return None
+
+    @property
+    def content_length(self) -> int | None:
+        return self._content_length
+
+    def _open(self) -> BinaryIO:
+        if self._path:
+            return open(self._path, "rb")
+        return self._file
+
+    def _close(self, file: BinaryIO):
+        if self._path:
+            file.close()
+
+    def rewind(self) -> bool:
+        if self._path:
+            return True
+        try:
+            self._file.seek(self._offset)
+            return True
+        except (AttributeError, OSError):
+            return False
+
+    def iter_chunks(self) -> Iterator[bytes | memoryview]:
+        file = self._open()
+        try:
+            remaining = self._content_length
+            while remaining is None or remaining > 0:
+                chunk = file.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            self._close(file)
+
+    def send(self, sock: socket.socket | ssl.SSLSocket) -> int:
+        # sendfile copies file pages to the socket in the kernel, which TLS sockets cannot do.
+        if isinstance(sock, ssl.SSLSocket) or self._content_length is None:
+            return super().send(sock)
+
+        file = self._open()
+        try:
+            return sock.sendfile(file, self._offset, self._content_length)
+        finally:
+            self._close(file)
+
+
+class IterableBody(BaseRequestBody):
+    def __init__(self, iterable: Iterable[bytes | bytearray | memoryview | str], content_length: int | None = None):
+        self._iterable = iterable
+        self._content_length = content_length
+
+    @property
+    def content_length(self) -> int | None:
+        return self._content_length
+
+    def iter_chunks(self) -> Iterator[bytes | memoryview]:
+        for chunk in self._iterable:
+            yield chunk.encode() if isinstance(chunk, str) else chunk
+
+
+def create_request_body(body) -> BaseRequestBody | None:
+    if isinstance(body, BaseRequestBody):
+        return body
+    if isinstance(body, Path):
+        return FileBody(body)
+    if hasattr(body, "read"):
+        return FileBody(body)
+    if isinstance(body, (str, dict, bytes, bytearray, memoryview)) or not hasattr(body, "__iter__"):
+        return None
+    return IterableBody(body)
@@ -0,0 +1,162 @@
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+AddressInfo = tuple[int, int, int, str, tuple]
+
+
+class BaseResolver(ABC):
+
+    @abstractmethod
+    def resolve(self, hostname: str, port: int) -> list[AddressInfo]:
+        pass
+
+
+class SystemResolver(BaseResolver):
+    def resolve(self, hostname: str, port: int) -> list[AddressInfo]:
+        return socket.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+
+
+class ResolverCacheEntry:
+    def __init__(self, addresses: list[AddressInfo] | None, error: OSError | None, ttl: float):
+        self.addresses = addresses
+        # Only the class and arguments of a failure are kept, so every hit raises a new exception
+        # instead of growing the traceback of a shared one.
+        self.error_type = type(error) if error is not None else None
+        self.error_args = error.args if error is not None else ()
+        self.expires_at = time.monotonic() + ttl
+        self.refreshing = False
+        self.next_index = 0
+
+    @property
+    def failed(self) -> bool:
+        return self.error_type is not None
+
+    def create_error(self) -> OSError:
+        return self.error_type(*self.error_args)
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def rotate(self) -> list[AddressInfo]:
+        index = self.next_index % len(self.addresses)
+        self.next_index = index + 1
+        return self.addresses[index:] + self.addresses[:index]
+
+
+class CachingResolver(BaseResolver):
+    def __init__(self,
+                 resolver: BaseResolver | None = None,
+                 *,
+                 ttl: float = 60.0,
+                 negative_ttl: float = 5.0,
+                 stale_ttl: float = 300.0,
+                 max_entries: int = 1024,
+                 hosts: dict[str, str | list[str]] | None = None):
+        if max_entries < 1:
+            raise ValueError("Max entries must be greater than 0")
+
+        self.resolver = resolver if resolver else SystemResolver()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.hosts = hosts if hosts else {}
+        self._entries: OrderedDict[tuple[str, int], ResolverCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_count = 0
+        self.misses_count = 0
+        self.stale_hits_count = 0
+        self.negative_hits_count = 0
+        self.refreshes_count = 0
+        self.evictions_count = 0
+
+    @staticmethod
+    def _resolve_static_addresses(addresses: str | list[str], port: int) -> list[AddressInfo]:
+        if isinstance(addresses, str):
+            addresses = [addresses]
+
+        address_infos = []
+        for address in addresses:
+            address_infos.extend(socket.getaddrinfo(address, port, type=socket.SOCK_STREAM,
+                                                    flags=socket.AI_NUMERICHOST))
+        return address_infos
+
+    def _lookup(self, hostname: str, port: int) -> ResolverCacheEntry:
+        try:
+            return ResolverCacheEntry(self.resolver.resolve(hostname, port), None, self.ttl)
+        except OSError as error:
+            return ResolverCacheEntry(None, error, self.negative_ttl)
+
+    def _refresh(self, key: tuple[str, int]):
+        entry = self._lookup(*key)
+        with self._lock:
+            self.refreshes_count += 1
+            # A failed refresh keeps serving the stale addresses until they run out of stale time.
+            if entry.addresses is not None or key not in self._entries:
+                self._store(key, entry)
+            else:
+                self._entries[key].refreshing = False
+
+    def _store(self, key: tuple[str, int], entry: ResolverCacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions_count += 1
+
+    @staticmethod
+    def _get_addresses(entry: ResolverCacheEntry) -> list[AddressInfo]:
+        if entry.failed:
+            raise entry.create_error()
+        return entry.rotate()
+
+    def resolve(self, hostname: str, port: int) -> list[AddressInfo]:
+        if hostname in self.hosts:
+            return self._resolve_static_addresses(self.hosts[hostname], port)
+
+        key = (hostname, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.is_fresh(now):
+                    if entry.failed:
+                        self.negative_hits_count += 1
+                    else:
+                        self.hits_count += 1
+                    return self._get_addresses(entry)
+
+                if entry.addresses is not None and now < entry.expires_at + self.stale_ttl:
+                    self.stale_hits_count += 1
+                    if not entry.refreshing:
+                        entry.refreshing = True
+                        threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+                    return self._get_addresses(entry)
+
+            self.misses_count += 1
+
+        entry = self._lookup(hostname, port)
+        with self._lock:
+            self._store(key, entry)
+            return self._get_addresses(entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits_count,
+            "misses": self.misses_count,
+            "stale_hits": self.stale_hits_count,
+            "negative_hits": self.negative_hits_count,
+            "refreshes": self.refreshes_count,
+            "evictions": self.evictions_count,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,209 @@
+import io
+import zlib
+from typing import Callable
+
+from .constants import *
+from .exceptions import DecompressedSizeError
+from .socket_reader import BufferedSocketReader, BUFF_SIZE
+
+
+class ResponseBodyStream(io.RawIOBase):
+    def __init__(self,
+                 reader: BufferedSocketReader | None,
+                 *,
+                 content_length: int | None = None,
+                 chunked: bool = False,
+                 release_callback: Callable[[bool], None] | None = None):
+        super().__init__()
+        self._reader = reader
+        self._remaining = content_length
+        self._chunked = chunked
+        self._chunk_remaining = 0
+        self._release_callback = release_callback
+        self._finished = reader is None or content_length == 0
+        self.bytes_read = 0
+        if self._finished:
+            self._release(True)
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def readable(self) -> bool:
+        return True
+
+    def _release(self, reusable: bool):
+        self._finished = True
+        if self._release_callback:
+            release_callback, self._release_callback = self._release_callback, None
+            release_callback(reusable)
+
+    def _readinto_chunked(self, view: memoryview) -> int:
+        if not self._chunk_remaining:
+            chunk_size_line = self._reader.read_line()
+            self._chunk_remaining = int(chunk_size_line.split(b";", 1)[0], 16)
+            if not self._chunk_remaining:
+                # Skip trailer fields up to the empty line which terminates the message.
+                while self._reader.read_line():
+                    pass
+                self._release(True)
+                return 0
+
+        received = self._reader.readinto(view[:self._chunk_remaining])
+        if not received:
+            raise ConnectionError("Connection closed before whole chunk was received")
+
+        self._chunk_remaining -= received
+        if not self._chunk_remaining:
+            self._reader.read_line()
+        return received
+
+    def _readinto_with_length(self, view: memoryview) -> int:
+        received = self._reader.readinto(view[:self._remaining])
+        if not received:
+            raise ConnectionError("Connection closed before whole body was received")
+
+        self._remaining -= received
+        if not self._remaining:
+            self._release(True)
+        return received
+
+    def _readinto_until_close(self, view: memoryview) -> int:
+        received = self._reader.readinto(view)
+        if not received:
+            self._release(False)
+        return received
+
+    def readinto(self, buffer) -> int:
+        if self._finished or self.closed:
+            return 0
+
+        view = memoryview(buffer).cast("B")
+        if not len(view):
+            return 0
+
+        try:
+            if self._chunked:
+                received = self._readinto_chunked(view)
+            elif self._remaining is not None:
+                received = self._readinto_with_length(view)
+            else:
+                received = self._readinto_until_close(view)
+        except Exception:
+            self._release(False)
+            raise
+
+        self.bytes_read += received
+        return received
+
+    def readall(self) -> bytes:
+        if self._remaining is not None and not self._chunked and not self._finished:
+            data = bytearray(self._remaining)
+            view = memoryview(data)
+            filled = 0
+            while filled < len(data):
+                received = self.readinto(view[filled:])
+                if not received:
+                    break
+                filled += received
+            return bytes(view[:filled])
+
+        chunks = []
+        while True:
+            chunk = self.read(BUFF_SIZE)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def close(self):
+        if not self.closed:
+            # A body that was not drained leaves unread bytes on the socket,
+            # so the connection cannot be used for the next request.
+            if not self._finished:
+                self._release(False)
+            super().close()
+
+
+class ContentDecodingStream(io.RawIOBase):
+    def __init__(self, stream: io.RawIOBase, content_encoding: str, max_decompressed_size: int | None = None):
+        super().__init__()
+        self._stream = stream
+        self._content_encoding = content_encoding
+        self._decompressor = self._create_decompressor(content_encoding)
+        self._max_decompressed_size = max_decompressed_size
+        self._pending = b""
+        self._first_data = True
+        self._finished = False
+        self.decompressed_size = 0
+
+    @staticmethod
+    def _create_decompressor(content_encoding: str, raw_deflate: bool = False):
+        if content_encoding in (ContentEncodings.GZIP, ContentEncodings.X_GZIP):
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if content_encoding == ContentEncodings.DEFLATE:
+            return zlib.decompressobj(-zlib.MAX_WBITS if raw_deflate else zlib.MAX_WBITS)
+        raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+    @property
+    def stream(self) -> io.RawIOBase:
+        return self._stream
+
+    def readable(self) -> bool:
+        return True
+
+    def _decompress(self, data: bytes, max_length: int) -> bytes:
+        try:
+            return self._decompressor.decompress(data, max_length)
+        except zlib.error:
+            # Some servers send raw deflate data without the zlib wrapper.
+            if not (self._first_data and self._content_encoding == ContentEncodings.DEFLATE):
+                raise
+            self._decompressor = self._create_decompressor(self._content_encoding, raw_deflate=True)
+            return self._decompressor.decompress(data, max_length)
+
+    def _get_decompressed_data(self, max_length: int) -> bytes:
+        while not self._finished:
+            if self._decompressor.unconsumed_tail:
+                data = self._decompressor.unconsumed_tail
+            else:
+                data = self._stream.read(BUFF_SIZE)
+                if not data:
+                    self._finished = True
+                    return self._decompressor.flush()
+
+            decompressed_data = self._decompress(data, max_length)
+            self._first_data = False
+            if decompressed_data:
+                return decompressed_data
+        return b""
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        if not len(view):
+            return 0
+
+        if not self._pending:
+            self._pending = self._get_decompressed_data(len(view))
+
+        length = min(len(view), len(self._pending))
+        view[:length] = self._pending[:length]
+        self._pending = self._pending[length:]
+
+        self.decompressed_size += length
+        if self._max_decompressed_size is not None and self.decompressed_size > self._max_decompressed_size:
+            self.close()
+            raise DecompressedSizeError(f"Decompressed body exceeds {self._max_decompressed_size} bytes")
+        return length
+
+    def readall(self) -> bytes:
+        chunks = []
+        while True:
+            chunk = self.read(BUFF_SIZE)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def close(self):
+        if not self.closed:
+            self._stream.close()
+            super().close()
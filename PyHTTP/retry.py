@@ -0,0 +1,161 @@
+import random
+import socket
+import threading
+import time
+
+from .constants import *
+from .exceptions import ConnectTimeoutError, HTTP2Error, HTTP2StreamRefused
+from .http_request import HTTPRequest
+from .http_response import HTTPResponse
+from .utils import parse_retry_after
+
+
+RETRY_STATUS_CODES = (HTTPStatusCodes.TOO_MANY_REQUESTS, HTTPStatusCodes.BAD_GATEWAY,
+                      HTTPStatusCodes.SERVICE_UNAVAILABLE, HTTPStatusCodes.GATEWAY_TIMEOUT)
+RETRY_EXCEPTIONS = (ConnectionError, TimeoutError, HTTP2Error)
+# Failures which happen before the request is sent, so any method may be sent again. An empty response
+# is not one of them: the server may have read and processed the request before closing the connection.
+NOT_SENT_EXCEPTIONS = (ConnectionRefusedError, ConnectTimeoutError, HTTP2StreamRefused, socket.gaierror)
+
+
+class RetryBudget:
+    # Every request deposits `ratio` tokens and every retry withdraws one, so retries stay a fraction
+    # of the traffic during an outage; the floor keeps low-traffic clients able to retry at all.
+    def __init__(self, ratio: float = 0.2, min_retries_per_second: float = 1.0, max_tokens: float = 10.0):
+        if ratio < 0 or min_retries_per_second < 0 or max_tokens < 1:
+            raise ValueError("Retry budget parameters must be non-negative and max tokens at least 1")
+
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated_at) * self.min_retries_per_second)
+        self._updated_at = now
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def deposit(self):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    def __init__(self,
+                 max_attempts: int = 3,
+                 *,
+                 backoff_base: float = 0.1,
+                 backoff_max: float = 10.0,
+                 jitter: float = 1.0,
+                 retry_status_codes: tuple[int, ...] = RETRY_STATUS_CODES,
+                 retry_exceptions: tuple[type[Exception], ...] = RETRY_EXCEPTIONS,
+                 retry_methods: tuple[str, ...] = IDEMPOTENT_METHODS_TUPLE,
+                 respect_retry_after: bool = True,
+                 budget: RetryBudget | None = None,
+                 hedge_after: float | None = None,
+                 max_hedges: int = 1):
+        if max_attempts < 1:
+            raise ValueError("Max attempts must be greater than 0")
+        if not 0 <= jitter <= 1:
+            raise ValueError("Jitter must be between 0 and 1")
+        if hedge_after is not None and (hedge_after < 0 or max_hedges < 1):
+            raise ValueError("Hedging delay must be non-negative and max hedges greater than 0")
+
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_status_codes = retry_status_codes
+        self.retry_exceptions = retry_exceptions
+        self.retry_methods = retry_methods
+        self.respect_retry_after = respect_retry_after
+        self.budget = budget
+        self.hedge_after = hedge_after
+        self.max_hedges = max_hedges
+
+        self.retries_count = 0
+        self.budget_exhausted_count = 0
+        self.hedges_count = 0
+        self.hedge_wins_count = 0
+
+    def is_idempotent(self, http_request: HTTPRequest) -> bool:
+        return http_request.method in self.retry_methods
+
+    def should_retry_exception(self, http_request: HTTPRequest, exception: Exception) -> bool:
+        if not isinstance(exception, self.retry_exceptions):
+            return False
+        return self.is_idempotent(http_request) or isinstance(exception, NOT_SENT_EXCEPTIONS)
+
+    def should_retry_response(self, http_request: HTTPRequest, http_response: HTTPResponse) -> bool:
+        if http_response.status_code not in self.retry_status_codes:
+            return False
+        # 429 and 503 mean the request was not processed, so they are safe to repeat for any method.
+        return self.is_idempotent(http_request) or http_response.status_code in (
+            HTTPStatusCodes.TOO_MANY_REQUESTS, HTTPStatusCodes.SERVICE_UNAVAILABLE)
+
+    def should_hedge(self, http_request: HTTPRequest, stream: bool = False) -> bool:
+        return (self.hedge_after is not None and not stream and http_request.body_stream is None
+                and self.is_idempotent(http_request))
+
+    def get_backoff(self, attempt: int) -> float:
+        # Exponential backoff with jitter spreading the retries of many clients apart.
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def get_delay(self, attempt: int, http_response: HTTPResponse | None = None) -> float | None:
+        if http_response is not None and self.respect_retry_after:
+            retry_after = parse_retry_after(http_response.headers.get(HTTPHeaders.RETRY_AFTER))
+            if retry_after is not None:
+                # Waiting longer than the backoff cap is left to the caller.
+                return retry_after if retry_after <= self.backoff_max else None
+        return self.get_backoff(attempt)
+
+    def start_request(self):
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def can_retry(self, http_request: HTTPRequest, attempt: int) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+
+        body_stream = http_request.body_stream
+        if body_stream is not None and not body_stream.rewind():
+            return False
+
+        if self.budget is not None and not self.budget.withdraw():
+            self.budget_exhausted_count += 1
+            return False
+        return True
+
+    def can_hedge(self) -> bool:
+        # Hedged attempts add load just like retries, so they draw on the same budget.
+        if self.budget is not None and not self.budget.withdraw():
+            self.budget_exhausted_count += 1
+            return False
+        return True
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "retries": self.retries_count,
+            "budget_exhausted": self.budget_exhausted_count,
+            "hedges": self.hedges_count,
+            "hedge_wins": self.hedge_wins_count,
+        }
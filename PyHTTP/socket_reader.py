@@ -0,0 +1,143 @@
+import socket
+import ssl
+import time
+
+from .constants import *
+from .exceptions import LineTooLongError
+
+
+BUFF_SIZE = 65536
+MAX_LINE_LENGTH = 65536
+
+
+class BufferedSocketReader:
+    def __init__(self, sock: socket.socket | ssl.SSLSocket, buffer_size: int = BUFF_SIZE):
+        self._sock = sock
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self.recv_calls_count = 0
+        self.bytes_received = 0
+        # The socket timeout bounds each recv, the deadline bounds the whole request.
+        self.timeout = sock.gettimeout()
+        self.deadline: float | None = None
+
+    @property
+    def buffered_size(self) -> int:
+        return self._end - self._start
+
+    @property
+    def bytes_consumed(self) -> int:
+        return self.bytes_received - self.buffered_size
+
+    def set_deadline(self, deadline: float | None):
+        self.deadline = deadline
+        if deadline is None:
+            self._sock.settimeout(self.timeout)
+        else:
+            self._apply_deadline()
+
+    def _apply_deadline(self):
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Request timed out")
+        self._sock.settimeout(remaining if self.timeout is None else min(self.timeout, remaining))
+
+    def _recv_into(self, view: memoryview) -> int:
+        if self.deadline is not None:
+            self._apply_deadline()
+        self.recv_calls_count += 1
+        received = self._sock.recv_into(view)
+        self.bytes_received += received
+        return received
+
+    def _fill(self) -> int:
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buffer):
+            buffered_size = self.buffered_size
+            if self._start:
+                self._view[:buffered_size] = self._view[self._start:self._end]
+            else:
+                self._view.release()
+                self._buffer.extend(bytes(len(self._buffer)))
+                self._view = memoryview(self._buffer)
+            self._start, self._end = 0, buffered_size
+
+        received = self._recv_into(self._view[self._end:])
+        self._end += received
+        return received
+
+    def _consume(self, length: int) -> bytes:
+        data = bytes(self._view[self._start:self._start + length])
+        self._start += length
+        return data
+
+    def read_until(self, separator: bytes, max_length: int = MAX_LINE_LENGTH) -> bytes:
+        search_start = self._start
+        while True:
+            index = self._buffer.find(separator, search_start, self._end)
+            if index - self._start > max_length or (index == -1 and self.buffered_size > max_length):
+                raise LineTooLongError(f"Line is longer than {max_length} bytes")
+            if index != -1:
+                data = self._consume(index - self._start)
+                self._start += len(separator)
+                return data
+
+            search_start = max(self._start, self._end - len(separator) + 1)
+            search_offset = search_start - self._start
+            if not self._fill():
+                raise ConnectionError("Connection closed before separator was received")
+            search_start = self._start + search_offset
+
+    def read_line(self, max_length: int = MAX_LINE_LENGTH) -> bytes:
+        return self.read_until(INDENT_BYTES, max_length)
+
+    def read_exact(self, length: int) -> bytes:
+        data = bytearray(length)
+        self.read_exact_into(memoryview(data))
+        return bytes(data)
+
+    def read_exact_into(self, view: memoryview):
+        length = len(view)
+        from_buffer = min(length, self.buffered_size)
+        view[:from_buffer] = self._view[self._start:self._start + from_buffer]
+        self._start += from_buffer
+
+        # Anything not yet buffered is received straight into the caller's memory.
+        filled = from_buffer
+        while filled < length:
+            received = self._recv_into(view[filled:])
+            if not received:
+                raise ConnectionError("Connection closed before whole message was received")
+            filled += received
+
+    def readinto(self, view: memoryview) -> int:
+        if not self.buffered_size:
+            if len(view) >= len(self._buffer):
+                return self._recv_into(view)
+            if not self._fill():
+                return 0
+
+        length = min(len(view), self.buffered_size)
+        view[:length] = self._view[self._start:self._start + length]
+        self._start += length
+        return length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            return self.read_until_close()
+
+        if not self.buffered_size and not self._fill():
+            return b""
+        return self._consume(min(size, self.buffered_size))
+
+    def read_until_close(self) -> bytes:
+        chunks = [self._consume(self.buffered_size)]
+        self._start = self._end = 0
+        while True:
+            received = self._recv_into(self._view)
+            if not received:
+                return b"".join(chunks)
+            chunks.append(bytes(self._view[:received]))
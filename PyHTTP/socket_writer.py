@@ -0,0 +1,32 @@
+import socket
+import ssl
+
+
+SMALL_MESSAGE_SIZE = 16384
+
+
+def send_buffers(sock: socket.socket | ssl.SSLSocket, buffers: list[bytes | bytearray | memoryview]) -> int:
+    views = [memoryview(buffer).cast("B") for buffer in buffers]
+    views = [view for view in views if len(view)]
+    total_size = sum(len(view) for view in views)
+
+    if isinstance(sock, ssl.SSLSocket) or not hasattr(sock, "sendmsg"):
+        # Small messages are joined so they go out in a single TLS record.
+        if total_size <= SMALL_MESSAGE_SIZE:
+            sock.sendall(b"".join(views))
+        else:
+            for view in views:
+                sock.sendall(view)
+        return total_size
+
+    while views:
+        sent = sock.sendmsg(views)
+        while sent:
+            if sent >= len(views[0]):
+                sent -= len(views[0])
+                views.pop(0)
+            else:
+                views[0] = views[0][sent:]
+                sent = 0
+
+    return total_size
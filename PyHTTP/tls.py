@@ -0,0 +1,98 @@
+import socket
+import ssl
+import threading
+from collections import OrderedDict
+
+
+TLS_VERSIONS = {
+    "TLSv1.2": ssl.TLSVersion.TLSv1_2,
+    "TLSv1.3": ssl.TLSVersion.TLSv1_3,
+}
+
+
+def create_ssl_context(*,
+                       ca_file: str | None = None,
+                       cert_file: str | None = None,
+                       key_file: str | None = None,
+                       alpn_protocols: list[str] | None = None,
+                       minimum_version: str | ssl.TLSVersion | None = None,
+                       verify: bool = True) -> ssl.SSLContext:
+    context = ssl.create_default_context(cafile=ca_file)
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    if cert_file:
+        context.load_cert_chain(cert_file, key_file)
+
+    if alpn_protocols:
+        context.set_alpn_protocols(alpn_protocols)
+
+    if minimum_version:
+        if isinstance(minimum_version, str):
+            if minimum_version not in TLS_VERSIONS:
+                raise ValueError(f"Unknown TLS version: {minimum_version}. "
+                                 f"Available versions: {', '.join(TLS_VERSIONS)}")
+            minimum_version = TLS_VERSIONS[minimum_version]
+        context.minimum_version = minimum_version
+
+    return context
+
+
+class TLSConnector:
+    def __init__(self, ssl_context: ssl.SSLContext | None = None, max_cached_sessions: int = 1000):
+        self.ssl_context = ssl_context if ssl_context else create_ssl_context()
+        self.max_cached_sessions = max_cached_sessions
+        self._sessions: OrderedDict[tuple[str, int], ssl.SSLSession] = OrderedDict()
+        self._lock = threading.Lock()
+        self.handshakes_count = 0
+        self.resumed_handshakes_count = 0
+
+    def _get_session(self, hostname: str, port: int) -> ssl.SSLSession | None:
+        with self._lock:
+            session = self._sessions.get((hostname, port))
+            if session is not None:
+                self._sessions.move_to_end((hostname, port))
+            return session
+
+    def save_session(self, ssl_sock: ssl.SSLSocket, hostname: str, port: int):
+        # TLS 1.3 servers send session tickets after the handshake, so the session
+        # is saved once the socket has exchanged application data.
+        session = ssl_sock.session
+        if session is None or (not session.has_ticket and not session.id):
+            return
+
+        with self._lock:
+            self._sessions[(hostname, port)] = session
+            self._sessions.move_to_end((hostname, port))
+            while len(self._sessions) > self.max_cached_sessions:
+                self._sessions.popitem(last=False)
+
+    def wrap_socket(self, sock: socket.socket, hostname: str, port: int) -> ssl.SSLSocket:
+        session = self._get_session(hostname, port)
+        ssl_sock = self.ssl_context.wrap_socket(sock, server_hostname=hostname, session=session)
+
+        with self._lock:
+            self.handshakes_count += 1
+            if ssl_sock.session_reused:
+                self.resumed_handshakes_count += 1
+        return ssl_sock
+
+    def clear_sessions(self):
+        with self._lock:
+            self._sessions.clear()
+
+    @property
+    def resumption_rate(self) -> float:
+        if not self.handshakes_count:
+            return 0.0
+        return self.resumed_handshakes_count / self.handshakes_count
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "handshakes": self.handshakes_count,
+            "resumed_handshakes": self.resumed_handshakes_count,
+            "resumption_rate": self.resumption_rate,
+            "cached_sessions": len(self._sessions),
+        }
@@ -1,6 +1,9 @@
+import time
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 
 from .constants import *
+from .headers import Headers
 from .validation import protocol_validation, port_validation
 
 
@@ -61,27 +64,59 @@ def parse_cookie(cookie: str) -> dict:
     return cookie_dct
 
 
+def parse_cache_control(cache_control: str | None) -> dict[str, str | bool]:
+    directives = {}
+    if not cache_control:
+        return directives
+
+    for directive in cache_control.split(","):
+        directive = directive.strip()
+        if not directive:
+            continue
+
+        if "=" in directive:
+            name, value = directive.split("=", 1)
+            directives[name.strip().lower()] = value.strip().strip('"')
+        else:
+            directives[directive.lower()] = True
+
+    return directives
+
+
 def parse_headers(headers: str) -> dict:
-    parsed_headers = {
-        "headers": {}
+    status_line, _, header_lines = headers.partition(INDENT)
+    http_version, status_code, *_ = status_line.split()
+
+    return {
+        "status_line": status_line,
+        "http_version": http_version,
+        "status_code": int(status_code),
+        "headers": Headers.from_raw(header_lines),
     }
 
-    cookies_lst = []
-    response_header_lines = headers.split(INDENT)
-    http_version, status_code, *_ = response_header_lines[0].split()
 
-    parsed_headers["http_version"] = http_version
-    parsed_headers["status_code"] = int(status_code)
+def get_charset(content_type: str | None) -> str | None:
+    if not content_type:
+        return None
+
+    for parameter in content_type.split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "charset":
+            return value.strip().strip('"') or None
+    return None
 
-    for line in response_header_lines[1:]:
-        header, value = line.split(": ", 1)
-        if header == HTTPHeaders.SET_COOKIE:
-            cookies_lst.append(value)
-            continue
 
-        parsed_headers["headers"][header] = value
+def parse_retry_after(retry_after: str | None, now: float | None = None) -> float | None:
+    # Retry-After is either a number of seconds or an HTTP date, RFC 9110 10.2.3.
+    if not retry_after:
+        return None
 
-    if cookies_lst:
-        parsed_headers["headers"][HTTPHeaders.SET_COOKIE] = cookies_lst
+    retry_after = retry_after.strip()
+    if retry_after.isdigit():
+        return float(retry_after)
 
-    return parsed_headers
+    try:
+        retry_at = parsedate_to_datetime(retry_after).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (now if now is not None else time.time()))
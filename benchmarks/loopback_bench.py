@@ -0,0 +1,327 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from datetime import datetime, timezone
+
+from PyHTTP import HTTPClient, HTTPRequest, parse_cookie, parse_headers, url_parse
+
+
+KB = 1024
+MB = 1024 * KB
+BODY_SIZES = (KB, 64 * KB, MB, 10 * MB, 100 * MB)
+BLOCK = b"x" * MB
+RESPONSE_HEADERS = ("HTTP/1.1 200 OK\r\n"
+                    "Date: Sat, 17 Oct 2026 10:00:00 GMT\r\n"
+                    "Server: nginx\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    "Content-Length: 1024\r\n"
+                    "Cache-Control: private, max-age=60\r\n"
+                    "Set-Cookie: session=abc; Path=/; HttpOnly\r\n"
+                    "Set-Cookie: theme=dark; Path=/; Max-Age=3600")
+COOKIE = "session=5f2b8c; Domain=example.com; Path=/; Max-Age=3600; Secure; HttpOnly; SameSite=Lax"
+URL = "https://api.example.com:8443/v1/items/search?page=1"
+
+
+class LoopbackHandler:
+    # Serves /bytes/<size>, /chunked/<size>/<chunk size> and /redirect/<hops> on one keep-alive connection.
+    def __init__(self, sock: socket.socket, url: str):
+        self.sock = sock
+        self.url = url
+        self.file = sock.makefile("rb")
+
+    def run(self):
+        try:
+            while self.handle_request():
+                pass
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.file.close()
+            self.sock.close()
+
+    def handle_request(self) -> bool:
+        request_line = self.file.readline()
+        if not request_line:
+            return False
+
+        content_length = 0
+        while True:
+            line = self.file.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                content_length = int(value)
+        if content_length:
+            self.file.read(content_length)
+
+        _, path, _ = request_line.decode().split(" ", 2)
+        route, *arguments = path.strip("/").split("/")
+        if route == "bytes":
+            self.send_content_length(int(arguments[0]))
+        elif route == "chunked":
+            self.send_chunked(int(arguments[0]), int(arguments[1]))
+        elif route == "redirect" and int(arguments[0]):
+            location = f"{self.url}/redirect/{int(arguments[0]) - 1}"
+            self.sock.sendall(f"HTTP/1.1 301 Moved Permanently\r\nLocation: {location}\r\n"
+                              f"Content-Length: 0\r\n\r\n".encode())
+        else:
+            self.send_content_length(0)
+        return True
+
+    def send_content_length(self, size: int):
+        self.sock.sendall(f"HTTP/1.1 200 OK\r\nContent-Length: {size}\r\n\r\n".encode())
+        self.send_body(size, lambda block: self.sock.sendall(block))
+
+    def send_chunked(self, size: int, chunk_size: int):
+        self.sock.sendall(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n")
+        if chunk_size >= 4 * KB:
+            self.send_body(size, lambda block: self.sock.sendall(f"{len(block):x}\r\n".encode() + block + b"\r\n"))
+        else:
+            # Small chunks are batched into one send so the server does not dominate the measurement.
+            chunk = f"{chunk_size:x}\r\n".encode() + BLOCK[:chunk_size] + b"\r\n"
+            full_chunks_count, last_chunk_size = divmod(size, chunk_size)
+            batch_size = max(1, 64 * KB // len(chunk))
+            for position in range(0, full_chunks_count, batch_size):
+                self.sock.sendall(chunk * min(batch_size, full_chunks_count - position))
+            if last_chunk_size:
+                self.sock.sendall(f"{last_chunk_size:x}\r\n".encode() + BLOCK[:last_chunk_size] + b"\r\n")
+        self.sock.sendall(b"0\r\n\r\n")
+
+    @staticmethod
+    def send_body(size: int, send):
+        view = memoryview(BLOCK)
+        while size > 0:
+            block = view[:min(size, len(BLOCK))]
+            send(block.tobytes() if len(block) < len(BLOCK) else BLOCK)
+            size -= len(block)
+
+
+class LoopbackServer:
+    def __init__(self, ssl_context: ssl.SSLContext | None = None):
+        self.ssl_context = ssl_context
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.url = f"{'https' if ssl_context else 'http'}://127.0.0.1:{self.port}"
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                sock, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.handle, args=(sock,), daemon=True).start()
+
+    def handle(self, sock: socket.socket):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.ssl_context:
+            try:
+                sock = self.ssl_context.wrap_socket(sock, server_side=True)
+            except (OSError, ssl.SSLError):
+                sock.close()
+                return
+        LoopbackHandler(sock, self.url).run()
+
+    def close(self):
+        self.sock.close()
+
+
+def create_tls_server_context(directory: str) -> tuple[ssl.SSLContext, str]:
+    cert_file = os.path.join(directory, "cert.pem")
+    key_file = os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-keyout", key_file, "-out", cert_file, "-subj", "/CN=localhost",
+                    "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost"],
+                   check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_file, key_file)
+    return context, cert_file
+
+
+def get_percentile(sorted_values: list[int], percentile: float) -> int:
+    position = min(len(sorted_values) - 1, round(percentile / 100 * (len(sorted_values) - 1)))
+    return sorted_values[position]
+
+
+def get_iterations_count(size: int, quick: bool) -> int:
+    # Roughly a constant number of bytes per scenario, bounded so small bodies still finish quickly.
+    iterations_count = max(5, min(2000, 512 * MB // max(size, 1)))
+    return max(3, iterations_count // 10) if quick else iterations_count
+
+
+def measure_requests(client: HTTPClient, url: str, iterations_count: int, expected_size: int) -> dict:
+    client.request(HTTPRequest(url))
+    latencies = []
+    started_at = time.perf_counter_ns()
+    for _ in range(iterations_count):
+        request_started_at = time.perf_counter_ns()
+        response = client.request(HTTPRequest(url))
+        if len(response.content) != expected_size:
+            raise Exception(f"Expected {expected_size} bytes from {url}, received {len(response.content)}")
+        latencies.append(time.perf_counter_ns() - request_started_at)
+    elapsed = (time.perf_counter_ns() - started_at) / 1e9
+
+    latencies.sort()
+    return {
+        "iterations": iterations_count,
+        "requests_per_second": round(iterations_count / elapsed, 2),
+        "p50_ms": round(get_percentile(latencies, 50) / 1e6, 4),
+        "p99_ms": round(get_percentile(latencies, 99) / 1e6, 4),
+        "megabytes_per_second": round(expected_size * iterations_count / elapsed / MB, 2),
+    }
+
+
+def get_loopback_scenarios(sizes: tuple[int, ...], quick: bool) -> list[tuple[str, str, int, int]]:
+    scenarios = []
+    for size in sizes:
+        iterations_count = get_iterations_count(size, quick)
+        scenarios.append((f"content-length {format_size(size)}", f"/bytes/{size}", size, iterations_count))
+        scenarios.append((f"chunked {format_size(size)}", f"/chunked/{size}/{64 * KB}", size, iterations_count))
+
+    small_chunks_iterations_count = 20 if quick else 200
+    for chunk_size in (16, 256):
+        scenarios.append((f"small chunks 256KB/{chunk_size}B", f"/chunked/{256 * KB}/{chunk_size}",
+                          256 * KB, small_chunks_iterations_count))
+
+    redirects_iterations_count = 100 if quick else 1000
+    for hops in (1, 5):
+        scenarios.append((f"redirect chain {hops}", f"/redirect/{hops}", 0, redirects_iterations_count))
+    return scenarios
+
+
+def run_loopback_benchmarks(server: LoopbackServer, client: HTTPClient, sizes: tuple[int, ...],
+                            quick: bool) -> dict[str, dict]:
+    results = {}
+    for name, path, size, iterations_count in get_loopback_scenarios(sizes, quick):
+        results[name] = measure_requests(client, server.url + path, iterations_count, size)
+        print_result(name, results[name])
+    return results
+
+
+def measure_micro(function, number: int) -> dict:
+    seconds = min(timeit.repeat(function, number=number, repeat=5))
+    return {"iterations": number, "ns_per_op": round(seconds / number * 1e9, 1)}
+
+
+def run_micro_benchmarks(quick: bool) -> dict[str, dict]:
+    number = 2000 if quick else 20000
+    headers = {"user-agent": "PyHTTP", "accept": "application/json", "Authorization": "Bearer token"}
+    benchmarks = {
+        "url_parse": lambda: url_parse(URL),
+        "parse_headers": lambda: parse_headers(RESPONSE_HEADERS),
+        "parse_headers + lookup": lambda: parse_headers(RESPONSE_HEADERS)["headers"].get("Cache-Control"),
+        "parse_cookie": lambda: parse_cookie(COOKIE),
+        "HTTPRequest.request GET": lambda: HTTPRequest(URL, request_headers=dict(headers)).request,
+        "HTTPRequest.request POST": lambda: HTTPRequest(URL, method="POST", request_headers=dict(headers),
+                                                        body={"id": 1, "name": "item"}).request,
+    }
+
+    results = {}
+    for name, function in benchmarks.items():
+        results[name] = measure_micro(function, number)
+        print(f"{name:<36} {results[name]['ns_per_op']:>12.1f} ns/op")
+    return results
+
+
+def format_size(size: int) -> str:
+    if size >= MB:
+        return f"{size // MB}MB"
+    return f"{size // KB}KB"
+
+
+def print_result(name: str, result: dict):
+    print(f"{name:<36} {result['requests_per_second']:>10.1f} req/s  p50 {result['p50_ms']:>9.3f} ms  "
+          f"p99 {result['p99_ms']:>9.3f} ms  {result['megabytes_per_second']:>9.1f} MB/s")
+
+
+def get_git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, check=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline: dict, results: dict, threshold: float = 5.0):
+    print(f"\nCompared with {baseline['metadata'].get('commit') or 'baseline'}:")
+    for group, key, higher_is_better in (("micro", "ns_per_op", False), ("http", "requests_per_second", True),
+                                         ("https", "requests_per_second", True)):
+        for name, result in results.get(group, {}).items():
+            baseline_result = baseline.get(group, {}).get(name)
+            if not baseline_result:
+                continue
+            change = (result[key] - baseline_result[key]) / baseline_result[key] * 100
+            if abs(change) < threshold:
+                verdict = "unchanged"
+            else:
+                verdict = "better" if (change > 0) == higher_is_better else "worse"
+            print(f"{group + ' ' + name:<42} {change:>+8.1f}% {key:<20} {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyHTTP loopback and parser benchmarks")
+    parser.add_argument("--output", default="benchmark_results.json", help="Path of the JSON results file")
+    parser.add_argument("--compare", help="Path of a previous JSON results file to compare with")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and no 100MB bodies")
+    parser.add_argument("--no-tls", action="store_true", help="Skip the TLS server")
+    arguments = parser.parse_args()
+
+    sizes = tuple(size for size in BODY_SIZES if size < 100 * MB) if arguments.quick else BODY_SIZES
+    results = {
+        "metadata": {
+            "commit": get_git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "quick": arguments.quick,
+        },
+    }
+
+    print("Microbenchmarks")
+    results["micro"] = run_micro_benchmarks(arguments.quick)
+
+    print("\nHTTP loopback")
+    server = LoopbackServer()
+    try:
+        with HTTPClient() as client:
+            results["http"] = run_loopback_benchmarks(server, client, sizes, arguments.quick)
+    finally:
+        server.close()
+
+    if not arguments.no_tls and shutil.which("openssl"):
+        print("\nTLS loopback")
+        certificate_directory = tempfile.mkdtemp()
+        try:
+            ssl_context, cert_file = create_tls_server_context(certificate_directory)
+            server = LoopbackServer(ssl_context)
+            try:
+                with HTTPClient(ca_file=cert_file) as client:
+                    results["https"] = run_loopback_benchmarks(server, client, sizes, arguments.quick)
+            finally:
+                server.close()
+        finally:
+            shutil.rmtree(certificate_directory)
+
+    with open(arguments.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults saved to {arguments.output}")
+
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            compare_results(json.load(file), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import timeit
+import tracemalloc
+
+from PyHTTP import HTTPRequest, RequestTemplate
+
+
+URL = "https://api.example.com:8443/v1/items/search"
+HEADERS = {"user-agent": "PyHTTP", "accept": "application/json", "Authorization": "Bearer token"}
+NUMBER = 20000
+
+
+def render_http_request(index: int) -> bytes:
+    http_request = HTTPRequest(URL, method="POST", request_headers=dict(HEADERS),
+                               query_string={"page": str(index)}, body={"id": index})
+    return http_request.request_bytes
+
+
+def render_http_request_str(index: int) -> str:
+    http_request = HTTPRequest(URL, method="POST", request_headers=dict(HEADERS),
+                               query_string={"page": str(index)}, body={"id": index})
+    return http_request.request
+
+
+def render_prepared_request(template: RequestTemplate, index: int) -> bytes:
+    return template.prepare(query_string={"page": str(index)}, body={"id": index}).request_bytes
+
+
+def render_http_get_request(index: int) -> bytes:
+    return HTTPRequest(URL, request_headers=dict(HEADERS), query_string={"page": str(index)}).request_bytes
+
+
+def render_prepared_get_request(template: RequestTemplate, index: int) -> bytes:
+    return template.prepare(query_string={"page": str(index)}).request_bytes
+
+
+def measure_memory(create_request, count: int = 100000) -> float:
+    tracemalloc.start()
+    requests = [create_request(index) for index in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del requests
+    return size / count
+
+
+def main():
+    template = RequestTemplate(URL, method="POST", request_headers=HEADERS)
+    get_template = RequestTemplate(URL, request_headers=HEADERS)
+
+    benchmarks = {
+        "POST HTTPRequest.request": lambda: [render_http_request_str(index) for index in range(NUMBER)],
+        "POST HTTPRequest.request_bytes": lambda: [render_http_request(index) for index in range(NUMBER)],
+        "POST RequestTemplate.prepare": lambda: [render_prepared_request(template, index) for index in range(NUMBER)],
+        "GET HTTPRequest.request_bytes": lambda: [render_http_get_request(index) for index in range(NUMBER)],
+        "GET RequestTemplate.prepare": lambda: [render_prepared_get_request(get_template, index)
+                                                for index in range(NUMBER)],
+    }
+    for name, benchmark in benchmarks.items():
+        seconds = min(timeit.repeat(benchmark, number=1, repeat=5))
+        print(f"{name:<32} {seconds / NUMBER * 1e6:8.2f} us per request")
+
+    request_size = measure_memory(lambda index: HTTPRequest(URL, query_string={"page": str(index)}))
+    print(f"{'HTTPRequest memory':<32} {request_size:8.0f} bytes per queued request")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import json
+import timeit
+import tracemalloc
+
+from PyHTTP import HTTPResponse
+
+
+RESPONSE_HEADERS = ("HTTP/1.1 200 OK\r\n"
+                    "Date: Sat, 17 Oct 2026 10:00:00 GMT\r\n"
+                    "Server: nginx\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    "Content-Length: {content_length}\r\n"
+                    "Cache-Control: private, max-age=60\r\n"
+                    "Set-Cookie: session={index}; Path=/; HttpOnly\r\n"
+                    "Set-Cookie: theme=dark; Path=/; Max-Age=3600")
+NUMBER = 50000
+
+
+def create_content(index: int) -> bytes:
+    return json.dumps({"id": index, "name": f"item-{index}", "tags": ["a", "b", "c"], "price": 9.99}).encode()
+
+
+def create_response(index: int) -> HTTPResponse:
+    # Mirrors how the client builds responses read from a socket.
+    content = create_content(index)
+    http_response = HTTPResponse(hand_init=True)
+    http_response.initialize_headers(RESPONSE_HEADERS.format(content_length=len(content), index=index))
+    http_response.content = content
+    http_response.initialize_cookies()
+    return http_response
+
+
+def create_response_from_str(index: int) -> HTTPResponse:
+    content = create_content(index)
+    headers = RESPONSE_HEADERS.format(content_length=len(content), index=index)
+    return HTTPResponse(headers + "\r\n\r\n" + content.decode())
+
+
+def measure_memory(create, count: int = NUMBER) -> float:
+    tracemalloc.start()
+    responses = [create(index) for index in range(count)]
+    for response in responses:
+        response.status_code
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del responses
+    return size / count
+
+
+def main():
+    benchmarks = {
+        "wire response": create_response,
+        "response from str": create_response_from_str,
+    }
+    for name, create in benchmarks.items():
+        seconds = min(timeit.repeat(lambda: [create(index) for index in range(NUMBER)], number=1, repeat=3))
+        print(f"{name:<24} {seconds / NUMBER * 1e6:8.2f} us per response")
+        print(f"{name:<24} {measure_memory(create):8.0f} bytes per held response")
+
+
+if __name__ == '__main__':
+    main()
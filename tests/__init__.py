@@ -1 +1,10 @@
-from .utils_tests import *
\ No newline at end of file
+from .utils_tests import *
+from .resolver_tests import *
+from .cookie_jar_tests import *
+from .http2_tests import *
+from .client_tests import *
+from .retry_tests import *
+from .rate_limit_tests import *
+from .happy_eyeballs_tests import *
+from .redirect_tests import *
+from .download_tests import *
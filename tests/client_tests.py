@@ -0,0 +1,596 @@
+import email
+import email.policy
+import gzip
+import json
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import TestCase, main, skipUnless
+import asyncio
+
+from PyHTTP import (AsyncHTTPClient, ClientEvents, FileCacheStorage, HTTPCache, HTTPClient, HTTPRequest,
+                    HTTPResponse, MemoryCacheStorage, MetricsAggregator, MultipartForm, RequestError,
+                    RequestTemplate)
+from PyHTTP.exceptions import DecompressedSizeError, LineTooLongError
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        if self.path == "/close":
+            self._send(200, b"bye", {"Connection": "close"})
+            self.close_connection = True
+        elif self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            data = "привет мир".encode() * 100
+            for index in range(0, len(data), 7):
+                chunk = data[index:index + 7]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        elif self.path == "/cookies":
+            self.send_response(200)
+            self.send_header("Set-Cookie", "session=abc; Path=/")
+            self.send_header("Set-Cookie", "theme=dark; Max-Age=3600")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path == "/echo-cookie":
+            self._send(200, self.headers.get("Cookie", "").encode())
+        elif self.path.startswith("/echo/"):
+            self._send(200, self.path[len("/echo/"):].encode())
+        elif self.path == "/big":
+            self._send(200, b"x" * 5_000_000)
+        elif self.path == "/long-header":
+            self._send(200, b"", {"X-Long": "x" * 100_000})
+        elif self.path == "/max-age":
+            self._send(200, b"fresh", {"Cache-Control": "max-age=60"})
+        elif self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+            else:
+                self._send(200, b"tagged", {"ETag": '"v1"', "Cache-Control": "no-cache"})
+        elif self.path == "/gzip":
+            self._send(200, gzip.compress(b"compressed " * 10000), {"Content-Encoding": "gzip"})
+        elif self.path == "/gzip-vary":
+            self.server.counts["/gzip-vary"] = self.server.counts.get("/gzip-vary", 0) + 1
+            self._send(200, gzip.compress(b"varied " * 1000), {"Content-Encoding": "gzip", "Vary": "Accept-Encoding",
+                                                             "Cache-Control": "max-age=60"})
+        elif self.path == "/gzip-chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Content-Encoding", "gzip")
+            self.end_headers()
+            data = gzip.compress("привет мир".encode() * 1000)
+            for index in range(0, len(data), 100):
+                chunk = data[index:index + 100]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        elif self.path == "/redirect":
+            self._send(301, b"", {"Location": f"http://127.0.0.1:{self.server.server_port}/"})
+        else:
+            self._send(200, b"hello")
+
+    def do_PUT(self):
+        self.do_POST()
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") != "chunked":
+            return self.rfile.read(int(self.headers["Content-Length"]))
+
+        chunks = []
+        while True:
+            chunk_size = int(self.rfile.readline().strip(), 16)
+            if not chunk_size:
+                self.rfile.readline()
+                return b"".join(chunks)
+            chunks.append(self.rfile.read(chunk_size))
+            self.rfile.readline()
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        body = self._read_body()
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        if self.headers.get("Content-Type", "").startswith("multipart/form-data"):
+            message = email.message_from_bytes(b"Content-Type: " + self.headers["Content-Type"].encode()
+                                               + b"\r\n\r\n" + body, policy=email.policy.HTTP)
+            body = json.dumps({part.get_param("name", header="content-disposition"): part.get_content()
+                               if part.get_content_maintype() == "text" else len(part.get_content())
+                               for part in message.iter_parts()}).encode()
+        self._send(200, body)
+
+
+class LocalServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class LocalServerTestCase(TestCase):
+    handler = LocalHandler
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = LocalServer(("127.0.0.1", 0), cls.handler)
+        cls.server.connections = set()
+        cls.server.counts = {}
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.connections.clear()
+        self.client = HTTPClient()
+
+    def tearDown(self):
+        self.client.close()
+
+
+class ConnectionPoolTest(LocalServerTestCase):
+    def test_connection_reused(self):
+        for _ in range(3):
+            response = self.client.request(HTTPRequest(self.url + "/"))
+            self.assertEqual(response.body, "hello")
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_connection_close_honored(self):
+        self.client.request(HTTPRequest(self.url + "/close"))
+        self.assertEqual(self.client.connection_pool.idle_connections_count("http", "127.0.0.1",
+                                                                             self.server.server_port), 0)
+        self.client.request(HTTPRequest(self.url + "/close"))
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_redirect_over_pool(self):
+        response = self.client.request(HTTPRequest(self.url + "/redirect"))
+        self.assertEqual(response.body, "hello")
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_preconnect(self):
+        self.assertEqual(self.client.preconnect([self.url]), 1)
+        self.client.request(HTTPRequest(self.url + "/"))
+        self.assertEqual(len(self.server.connections), 1)
+
+
+class ResponseReadingTest(LocalServerTestCase):
+    def test_chunked_multibyte(self):
+        response = self.client.request(HTTPRequest(self.url + "/chunked"))
+        self.assertEqual(response.body, "привет мир" * 100)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_big_content_length(self):
+        response = self.client.request(HTTPRequest(self.url + "/big"))
+        self.assertEqual(response.content, b"x" * 5_000_000)
+        response = self.client.request(HTTPRequest(self.url + "/"))
+        self.assertEqual(response.body, "hello")
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_line_too_long(self):
+        with self.assertRaises(LineTooLongError):
+            self.client.request(HTTPRequest(self.url + "/long-header"))
+        self.assertEqual(self.client.request(HTTPRequest(self.url + "/")).body, "hello")
+
+
+class LazyResponseTest(TestCase):
+    def test_decoding(self):
+        http_response = HTTPResponse(hand_init=True)
+        http_response.initialize_headers("HTTP/1.1 200 OK\r\nContent-Type: application/json; charset=cp1251\r\n"
+                                         "Set-Cookie: a=1\r\nSet-Cookie: b=2")
+        http_response.content = '{"name": "привет"}'.encode("cp1251")
+
+        self.assertEqual(http_response.encoding, "cp1251")
+        self.assertEqual(http_response.text, '{"name": "привет"}')
+        self.assertIs(http_response.json(), http_response.json())
+        self.assertEqual(set(http_response.cookies), {"a", "b"})
+        self.assertTrue(http_response.response.endswith('\r\n\r\n{"name": "привет"}'))
+        self.assertFalse(hasattr(http_response, "__dict__"))
+
+
+class SessionCookiesTest(LocalServerTestCase):
+    def test_session(self):
+        self.client.open_session()
+        self.client.request(HTTPRequest(self.url + "/cookies"))
+        response = self.client.request(HTTPRequest(self.url + "/echo-cookie"))
+        self.assertEqual(response.body, "session=abc; theme=dark")
+
+        self.client.close_session()
+        response = self.client.request(HTTPRequest(self.url + "/echo-cookie"))
+        self.assertEqual(response.body, "")
+
+
+class PipeliningTest(LocalServerTestCase):
+    def test_responses_in_order(self):
+        http_requests = [HTTPRequest(f"{self.url}/echo/{index}") for index in range(20)]
+        responses = self.client.request_pipelined(http_requests, depth=8)
+        self.assertEqual([response.body for response in responses], [str(index) for index in range(20)])
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_retry_after_close(self):
+        paths = ["/echo/1", "/close", "/echo/2", "/chunked", "/echo/3"]
+        responses = self.client.request_pipelined([HTTPRequest(self.url + path) for path in paths], depth=4)
+        self.assertEqual([response.body for response in responses], ["1", "bye", "2", "привет мир" * 100, "3"])
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_refuse_post(self):
+        with self.assertRaises(ValueError):
+            self.client.request_pipelined([HTTPRequest(self.url + "/", method="POST", body="data")])
+
+
+class StreamingResponseTest(LocalServerTestCase):
+    def test_iter_content_releases_connection(self):
+        response = self.client.request(HTTPRequest(self.url + "/big"), stream=True)
+        self.assertEqual(sum(len(chunk) for chunk in response.iter_content(65536)), 5_000_000)
+        self.client.request(HTTPRequest(self.url + "/"))
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_iter_lines_chunked(self):
+        response = self.client.request(HTTPRequest(self.url + "/chunked"), stream=True)
+        self.assertEqual(b"".join(response.iter_lines(5)).decode(), "привет мир" * 100)
+
+    def test_closed_stream_drops_connection(self):
+        with self.client.request(HTTPRequest(self.url + "/big"), stream=True) as response:
+            self.assertEqual(response.raw.read(10), b"x" * 10)
+        self.client.request(HTTPRequest(self.url + "/"))
+        self.assertEqual(len(self.server.connections), 2)
+
+
+class RequestManyTest(LocalServerTestCase):
+    def test_ordered_with_errors(self):
+        requests = [HTTPRequest(self.url + "/"), HTTPRequest("http://127.0.0.1:1/"), HTTPRequest(self.url + "/chunked")]
+        results = list(self.client.request_many(requests, max_workers=3, per_host_limit=2))
+        self.assertEqual(results[0].body, "hello")
+        self.assertIsInstance(results[1], RequestError)
+        self.assertIs(results[1].http_request, requests[1])
+        self.assertEqual(results[2].body, "привет мир" * 100)
+
+    def test_unordered(self):
+        requests = [HTTPRequest(self.url + "/") for _ in range(20)]
+        results = list(self.client.request_many(requests, max_workers=5, ordered=False))
+        self.assertEqual({response.body for response in results}, {"hello"})
+        self.assertLessEqual(len(self.server.connections), 5)
+
+
+def create_self_signed_certificate(directory: str) -> tuple[str, str]:
+    cert_file = os.path.join(directory, "cert.pem")
+    key_file = os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-keyout", key_file, "-out", cert_file, "-subj", "/CN=localhost",
+                    "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost"],
+                   check=True, capture_output=True)
+    return cert_file, key_file
+
+
+@skipUnless(shutil.which("openssl"), "openssl is required to create a test certificate")
+class TLSTest(LocalServerTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.certificate_directory = tempfile.mkdtemp()
+        cls.cert_file, key_file = create_self_signed_certificate(cls.certificate_directory)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cls.cert_file, key_file)
+        cls.server.socket = context.wrap_socket(cls.server.socket, server_side=True)
+        cls.url = f"https://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.certificate_directory)
+
+    def setUp(self):
+        self.server.connections.clear()
+        self.client = HTTPClient(ca_file=self.cert_file, minimum_tls_version="TLSv1.2")
+
+    def test_session_resumption(self):
+        for _ in range(3):
+            response = self.client.request(HTTPRequest(self.url + "/close"))
+            self.assertEqual(response.body, "bye")
+
+        self.assertEqual(self.client.tls_stats["handshakes"], 3)
+        self.assertEqual(self.client.tls_stats["resumed_handshakes"], 2)
+
+    def test_keep_alive_single_handshake(self):
+        for _ in range(3):
+            self.client.request(HTTPRequest(self.url + "/"))
+        self.assertEqual(self.client.tls_stats["handshakes"], 1)
+
+
+class HTTPCacheTest(LocalServerTestCase):
+    def test_fresh_hit(self):
+        with HTTPClient(cache=HTTPCache()) as client:
+            statuses = [client.request(HTTPRequest(self.url + "/max-age")).cache_status for _ in range(3)]
+        self.assertEqual(statuses, ["miss", "hit", "hit"])
+
+    def test_conditional_revalidation(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                HTTPClient(cache=HTTPCache(FileCacheStorage(directory))) as client:
+            first = client.request(HTTPRequest(self.url + "/etag"))
+            second = client.request(HTTPRequest(self.url + "/etag"))
+            self.assertEqual((first.cache_status, second.cache_status), ("miss", "revalidated"))
+            self.assertEqual(second.body, "tagged")
+
+            # The cache's validator is sent instead of the caller's, whose request keeps its own.
+            request = HTTPRequest(self.url + "/etag", request_headers={"If-None-Match": '"mine"'})
+            self.assertEqual(client.request(request).cache_status, "revalidated")
+            self.assertEqual(request.request_headers["If-None-Match"], '"mine"')
+
+    def test_file_storage_clear(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, "nested"))
+            with open(os.path.join(directory, "notes.txt"), "w") as file:
+                file.write("unrelated")
+            storage = FileCacheStorage(directory)
+            with HTTPClient(cache=HTTPCache(storage)) as client:
+                client.request(HTTPRequest(self.url + "/max-age"))
+            self.assertEqual(len(os.listdir(directory)), 4)
+
+            storage.clear()
+            self.assertEqual(sorted(os.listdir(directory)), ["nested", "notes.txt"])
+
+    def test_decoded_response_with_vary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for storage in (MemoryCacheStorage(), FileCacheStorage(directory)):
+                self.server.counts.clear()
+                with HTTPClient(cache=HTTPCache(storage)) as client:
+                    responses = [client.request(HTTPRequest(self.url + "/gzip-vary")) for _ in range(3)]
+                self.assertEqual([response.cache_status for response in responses], ["miss", "hit", "hit"])
+                self.assertEqual(self.server.counts["/gzip-vary"], 1)
+                for response in responses:
+                    self.assertEqual(response.content, b"varied " * 1000)
+                # The stored content is decoded, so hits describe it without Content-Encoding.
+                self.assertNotIn("Content-Encoding", responses[1].headers)
+                self.assertEqual(responses[1].headers["Content-Length"], str(len(b"varied " * 1000)))
+            self.assertEqual(sorted(os.path.splitext(name)[1] for name in os.listdir(directory)), [".body", ".json"])
+
+    def test_uncacheable_miss(self):
+        with HTTPClient(cache=HTTPCache()) as client:
+            statuses = [client.request(HTTPRequest(self.url + "/")).cache_status for _ in range(2)]
+        self.assertEqual(statuses, ["miss", "miss"])
+
+
+class ContentEncodingTest(LocalServerTestCase):
+    def test_gzip_response(self):
+        response = self.client.request(HTTPRequest(self.url + "/gzip"))
+        self.assertEqual(response.content, b"compressed " * 10000)
+
+    def test_gzip_chunked_stream(self):
+        response = self.client.request(HTTPRequest(self.url + "/gzip-chunked"), stream=True)
+        self.assertEqual(b"".join(response.iter_content(1000)).decode(), "привет мир" * 1000)
+        self.client.request(HTTPRequest(self.url + "/"))
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_decompression_limit(self):
+        with HTTPClient(max_decompressed_size=1000) as client, self.assertRaises(DecompressedSizeError):
+            client.request(HTTPRequest(self.url + "/gzip"))
+
+    def test_compressed_request_body(self):
+        request = HTTPRequest(self.url + "/", method="POST", body="payload " * 1000, compress_body=True)
+        self.assertIn(b"Content-Encoding: gzip", request.request_bytes)
+        self.assertEqual(self.client.request(request).body, "payload " * 1000)
+
+
+class RequestSerializationTest(LocalServerTestCase):
+    def test_binary_body_sent_without_concatenation(self):
+        body = bytearray(b"\x00\xff" * 2_000_000)
+        request = HTTPRequest(self.url + "/", method="PUT", body=memoryview(body))
+        self.assertIn(b"Content-Length: 4000000\r\n", request.head)
+        self.assertEqual(self.client.request(request).content, bytes(body))
+
+    def test_head_cached_until_changed(self):
+        request = HTTPRequest(self.url + "/", method="POST", body={"key": "значение"})
+        self.assertIs(request.head, request.head)
+        self.assertEqual(request.content_length, len(request.body_bytes))
+        request.set_header("X-Test", "1")
+        self.assertIn(b"X-Test: 1\r\n", request.head)
+
+
+class StreamingUploadTest(LocalServerTestCase):
+    def test_path_and_file_bodies(self):
+        data = os.urandom(3_000_000)
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(data)
+            file.flush()
+            file.seek(0)
+            path_request = HTTPRequest(self.url + "/", method="POST", body=Path(file.name))
+            self.assertIn(b"Content-Length: 3000000\r\n", path_request.head)
+            self.assertEqual(self.client.request(path_request).content, data)
+            self.assertEqual(self.client.request(HTTPRequest(self.url + "/", method="PUT", body=file)).content, data)
+
+    def test_generator_body_is_chunked(self):
+        request = HTTPRequest(self.url + "/", method="POST", body=(b"part%d," % index for index in range(1000)))
+        self.assertIn(b"Transfer-Encoding: chunked\r\n", request.head)
+        self.assertEqual(self.client.request(request).content, b"".join(b"part%d," % index for index in range(1000)))
+
+    def test_pipe_body_is_chunked(self):
+        data = os.urandom(300_000)
+        read_fd, write_fd = os.pipe()
+
+        def write():
+            with os.fdopen(write_fd, "wb") as writer:
+                writer.write(data)
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        with os.fdopen(read_fd, "rb") as reader:
+            request = HTTPRequest(self.url + "/", method="POST", body=reader)
+            self.assertIn(b"Transfer-Encoding: chunked\r\n", request.head)
+            self.assertEqual(self.client.request(request).content, data)
+        thread.join()
+
+    def test_empty_iterable_body(self):
+        request = HTTPRequest(self.url + "/", method="POST", body=[])
+        self.assertIn(b"Transfer-Encoding: chunked\r\n", request.head)
+        self.assertEqual(self.client.request(request).content, b"")
+        # The terminating chunk was framed, so the kept-alive connection still serves the next request.
+        self.assertEqual(self.client.request(HTTPRequest(self.url + "/")).body, "hello")
+        self.assertEqual(len(self.server.connections), 1)
+
+
+class MultipartUploadTest(LocalServerTestCase):
+    def test_fields_and_files(self):
+        with tempfile.NamedTemporaryFile(suffix=".bin") as file:
+            file.write(os.urandom(1_000_000))
+            file.flush()
+
+            form = MultipartForm({"title": "report"})
+            form.add_file("upload", Path(file.name))
+            form.add_field("note", "привет", content_type="text/plain; charset=utf-8")
+            request = HTTPRequest(self.url + "/", method="POST", body=form)
+            self.assertIn(f"Content-Length: {form.content_length}\r\n".encode(), request.head)
+
+            response = self.client.request(request)
+            self.assertEqual(json.loads(response.body), {"title": "report", "upload": 1_000_000, "note": "привет"})
+
+
+class PreparedRequestTest(LocalServerTestCase):
+    def test_template_renders_variable_parts(self):
+        template = RequestTemplate(self.url + "/", method="POST", request_headers={"X-Static": "1"})
+        for index in range(3):
+            request = template.prepare(query_string={"page": str(index)}, body={"id": index})
+            self.assertTrue(request.head.startswith(f"POST /?page={index} HTTP/1.1\r\n".encode()))
+            self.assertIn(b"X-Static: 1\r\n", request.head)
+            self.assertEqual(self.client.request(request).body, f'{{"id": {index}}}')
+
+    def test_variable_parts_replace_template(self):
+        template = RequestTemplate(self.url + "/", request_headers={"X-A": "1", "X-Static": "1", "Cookie": "a=1"})
+        request = template.prepare(request_headers={"x-static": "2"})
+        request.set_header("X-A", "2")
+        request.set_cookie("b", "2")
+        head = request.head
+        self.assertIn(b"X-A: 2\r\n", head)
+        self.assertIn(b"x-static: 2\r\n", head)
+        self.assertIn(b"Cookie: b=2\r\n", head)
+        self.assertNotIn(b": 1\r\n", head)
+
+        # Changing the start line through the inherited setters renders it again.
+        request.method = "POST"
+        request.url = f"http://localhost:{self.server.server_port}/echo/moved"
+        self.assertTrue(request.head.startswith(b"POST /echo/moved HTTP/1.1\r\nHost: localhost\r\n"))
+        request.method = "GET"
+        self.assertEqual(self.client.request(request).body, "moved")
+        self.assertTrue(template.prepare().head.startswith(b"GET / HTTP/1.1\r\n"))
+
+
+class MetricsTest(LocalServerTestCase):
+    def test_timings(self):
+        request = HTTPRequest(self.url + "/big")
+        first_response = self.client.request(request)
+        timings = first_response.timings
+        self.assertFalse(timings.connection_reused)
+        self.assertGreater(timings.connect_ns, 0)
+        self.assertEqual(timings.bytes_sent, len(request.head))
+        self.assertGreater(timings.bytes_received, 5_000_000)
+        self.assertEqual(timings.total_ns, timings.queue_ns + timings.dns_ns + timings.connect_ns + timings.tls_ns
+                         + timings.send_ns + timings.ttfb_ns + timings.download_ns)
+
+        second_response = self.client.request(HTTPRequest(self.url + "/"), stream=True)
+        self.assertTrue(second_response.timings.connection_reused)
+        self.assertEqual(second_response.timings.connect_ns, 0)
+        self.assertEqual(second_response.content, b"hello")
+        self.assertEqual(second_response.timings.bytes_received,
+                         len(second_response.response_headers) + len(b"\r\n\r\nhello"))
+
+    def test_hooks(self):
+        events = []
+        hooks = {event: partial(lambda event, *args: events.append(event), event)
+                 for event in (ClientEvents.REQUEST_START, ClientEvents.CONNECT, ClientEvents.HEADERS_RECEIVED,
+                               ClientEvents.BODY_COMPLETE, ClientEvents.REDIRECT, ClientEvents.ERROR)}
+        client = HTTPClient(hooks=hooks)
+        try:
+            client.request(HTTPRequest(self.url + "/redirect"))
+            self.assertEqual(events, ["request_start", "connect", "headers_received", "body_complete", "redirect",
+                                      "request_start", "headers_received", "body_complete"])
+
+            events.clear()
+            with self.assertRaises(OSError):
+                client.request(HTTPRequest("http://127.0.0.1:1/"))
+            self.assertEqual(events, ["request_start", "error"])
+            with self.assertRaises(ValueError):
+                client.add_hook("unknown", print)
+        finally:
+            client.close()
+
+    def test_aggregator(self):
+        metrics = MetricsAggregator()
+        client = HTTPClient(metrics=metrics)
+        try:
+            for path in ("/", "/", "/redirect"):
+                client.request(HTTPRequest(self.url + path))
+            host = f"http://127.0.0.1:{self.server.server_port}"
+            snapshot = metrics.snapshot()
+            host_metrics = snapshot["hosts"][host]
+            self.assertEqual(host_metrics["requests"], 4)
+            self.assertEqual(host_metrics["redirects"], 1)
+            self.assertEqual(host_metrics["connections_opened"], 1)
+            self.assertEqual(host_metrics["reused_connections"], 3)
+            self.assertEqual(host_metrics["status_codes"], {200: 3, 301: 1})
+            self.assertEqual(host_metrics["latency_ms"]["count"], 4)
+            self.assertEqual(snapshot["pool"]["idle_connections"], 1)
+
+            exposition = metrics.render_prometheus()
+            self.assertIn(f'pyhttp_requests_total{{host="{host}"}} 4', exposition)
+            self.assertIn(f'pyhttp_request_duration_milliseconds_bucket{{host="{host}",le="+Inf"}} 4', exposition)
+            self.assertIn("pyhttp_pool_idle_connections 1", exposition)
+        finally:
+            client.close()
+
+
+class AsyncHTTPClientTest(LocalServerTestCase):
+    def test_request_many(self):
+        async def run():
+            async with AsyncHTTPClient(max_connections_per_host=4) as client:
+                requests = [HTTPRequest(self.url + path) for path in ("/", "/chunked", "/redirect") * 20]
+                return await client.request_many(requests)
+
+        responses = asyncio.run(run())
+        self.assertEqual([response.body for response in responses[:3]], ["hello", "привет мир" * 100, "hello"])
+        self.assertLessEqual(len(self.server.connections), 4)
+
+    def test_decoding_and_file_upload(self):
+        data = os.urandom(1_000_000)
+
+        async def run():
+            async with AsyncHTTPClient() as client:
+                gzip_response = await client.request(HTTPRequest(self.url + "/gzip"))
+                upload_response = await client.request(HTTPRequest(self.url + "/", method="POST",
+                                                                   body=Path(file.name)))
+                return gzip_response, upload_response
+
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(data)
+            file.flush()
+            gzip_response, upload_response = asyncio.run(run())
+        # The same URL yields the same bytes as with HTTPClient.
+        self.assertEqual(gzip_response.content, self.client.request(HTTPRequest(self.url + "/gzip")).content)
+        self.assertEqual(gzip_response.content, b"compressed " * 10000)
+        self.assertEqual(upload_response.content, data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+from unittest import TestCase, main
+
+from PyHTTP.cookie_jar import CookieJar, StoredCookie, get_registrable_domain
+from PyHTTP.http_request import HTTPRequest
+from PyHTTP.http_response import HTTPResponse
+
+
+def create_response(*set_cookie_headers: str) -> HTTPResponse:
+    http_response = HTTPResponse(hand_init=True)
+    http_response.initialize_headers("HTTP/1.1 200 OK\r\n" + "\r\n".join(f"Set-Cookie: {header}"
+                                                                        for header in set_cookie_headers))
+    return http_response
+
+
+class CookieJarTest(TestCase):
+    def test_domain_and_path_matching(self):
+        jar = CookieJar()
+        jar.extract_cookies(HTTPRequest("https://www.example.com/account/login"),
+                            create_response("host=1", "shared=2; Domain=.example.com; Path=/",
+                                            "secure=3; Path=/account; Secure", "public=4; Domain=com"))
+
+        self.assertEqual(len(jar), 3)
+        self.assertEqual(get_registrable_domain("a.b.example.com"), "example.com")
+        self.assertEqual(jar.get_cookies(HTTPRequest("https://www.example.com/account/settings")),
+                         {"secure": "3", "host": "1", "shared": "2"})
+        self.assertEqual(jar.get_cookies(HTTPRequest("http://api.example.com/account")), {"shared": "2"})
+        self.assertEqual(jar.get_cookies(HTTPRequest("https://www.example.com/accounts")), {"shared": "2"})
+        self.assertEqual(jar.get_cookies(HTTPRequest("https://example.org/")), {})
+
+    def test_expiry(self):
+        jar = CookieJar()
+        http_request = HTTPRequest("http://example.com/")
+        jar.extract_cookies(http_request, create_response("short=1; Max-Age=60", "session=3",
+                                                          "old=2; Expires=Wed, 21 Oct 2015 07:28:00 GMT"))
+        self.assertEqual(set(jar.get_cookies(http_request)), {"short", "session"})
+
+        cookie = jar.get_cookie("example.com", "/", "short")
+        self.assertEqual(jar.remove_expired(cookie.expires_at + 1), 1)
+        self.assertEqual(len(jar), 1)
+
+        jar.extract_cookies(http_request, create_response("session=3; Max-Age=0"))
+        self.assertEqual(len(jar), 0)
+
+    def test_same_name_in_different_paths(self):
+        jar = CookieJar()
+        jar.extract_cookies(HTTPRequest("http://example.com/"), create_response("id=1; Path=/a", "id=2; Path=/b"))
+        self.assertEqual(len(jar), 2)
+        self.assertEqual(jar.get_cookies(HTTPRequest("http://example.com/a")), {"id": "1"})
+        self.assertEqual(jar.get_cookies(HTTPRequest("http://example.com/b")), {"id": "2"})
+
+    def test_refreshed_cookies_do_not_grow_expiry_heap(self):
+        jar = CookieJar()
+        http_request = HTTPRequest("http://example.com/")
+        for index in range(1000):
+            jar.extract_cookies(http_request, create_response(f"session={index}; Max-Age=3600"))
+        self.assertEqual(len(jar), 1)
+        self.assertLessEqual(len(jar._expiry_heap), 64)
+        cookie = jar.get_cookie("example.com", "/", "session")
+        self.assertEqual(cookie.value, "999")
+        self.assertEqual(jar.remove_expired(cookie.expires_at + 1), 1)
+
+    def test_cookie_header(self):
+        jar = CookieJar()
+        jar.set_cookie(StoredCookie("a", "1", "example.com"))
+        jar.set_cookie(StoredCookie("b", "2", "example.com", "/api"))
+
+        http_request = HTTPRequest("http://example.com/api/items", cookies={"c": "3"})
+        jar.add_cookie_header(http_request)
+        self.assertEqual(http_request.request_headers["Cookie"], "c=3; b=2; a=1")
+        self.assertIn(b"\r\nCookie: c=3; b=2; a=1\r\n", http_request.head)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "cookies.json")
+            jar = CookieJar(file_path)
+            jar.extract_cookies(HTTPRequest("http://example.com/"), create_response("a=1; Max-Age=3600", "b=2"))
+            jar.save()
+
+            loaded_jar = CookieJar(file_path)
+            self.assertEqual(loaded_jar.get_cookies(HTTPRequest("http://example.com/")), {"a": "1", "b": "2"})
+            self.assertEqual(loaded_jar.get_cookie("example.com", "/", "a").expires_at,
+                             jar.get_cookie("example.com", "/", "a").expires_at)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, main
+
+from PyHTTP import HTTPClient, HTTPRequest
+
+
+CONTENT = bytes(range(256)) * 4096
+ETAG = '"v1"'
+
+
+class DownloadHandler(BaseHTTPRequestHandler):
+    # /file supports ranges, /unadvertised supports them without saying so, /norange refuses HEAD and ranges
+    # and /chunked has no known size.
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(head=True)
+
+    def do_GET(self):
+        self._respond(head=False)
+
+    def _respond(self, head: bool):
+        if self.path == "/norange" and head:
+            self.send_response(405)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            if not head:
+                for index in range(0, len(CONTENT), 100_000):
+                    chunk = CONTENT[index:index + 100_000]
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+            return
+
+        range_header = self.headers.get("Range")
+        with self.server.lock:
+            self.server.ranges.append(range_header)
+        etag = self.server.etag
+        start = 0
+        if self.path in ("/file", "/unadvertised") and range_header and self.headers.get("If-Range", etag) == etag:
+            start, end = map(int, range_header[len("bytes="):].split("-"))
+            body = CONTENT[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(CONTENT)}")
+        else:
+            body = CONTENT
+            self.send_response(200)
+        if self.path == "/file":
+            self.send_header("Accept-Ranges", "bytes")
+        if self.path in ("/file", "/unadvertised"):
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if head:
+            return
+
+        if self.server.interrupt and (start or self.path != "/file"):
+            # Single streams and later segments break off halfway, as if the network went away.
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class DownloadServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class DownloadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = DownloadServer(("127.0.0.1", 0), DownloadHandler)
+        cls.server.lock = threading.Lock()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.ranges = []
+        self.server.interrupt = False
+        self.server.etag = ETAG
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "file.bin")
+        self.client = HTTPClient()
+
+    def tearDown(self):
+        self.client.close()
+        self.directory.cleanup()
+
+    def assertDownloaded(self):
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), CONTENT)
+        self.assertEqual(os.listdir(self.directory.name), ["file.bin"])
+
+    def test_segmented_download(self):
+        result = self.client.download(self.url + "/file", self.path, segments=4, min_segment_size=64 * 1024)
+        self.assertDownloaded()
+        self.assertEqual((result.size, result.segments_count, result.ranged, result.resumed_size),
+                         (len(CONTENT), 4, True, 0))
+        self.assertEqual(sorted(filter(None, self.server.ranges)),
+                         ["bytes=0-262143", "bytes=262144-524287", "bytes=524288-786431", "bytes=786432-1048575"])
+
+        # Small files are not split below the minimum segment size.
+        os.remove(self.path)
+        self.assertEqual(self.client.download(self.url + "/file", self.path, segments=4).segments_count, 1)
+        self.assertDownloaded()
+
+    def test_resume(self):
+        self.server.interrupt = True
+        with self.assertRaises(ConnectionError):
+            self.client.download(self.url + "/file", self.path, segments=4, min_segment_size=64 * 1024,
+                                 progress_interval=16 * 1024)
+        self.assertTrue(os.path.exists(self.path + ".progress"))
+        self.assertFalse(os.path.exists(self.path))
+
+        self.server.interrupt = False
+        self.server.ranges = []
+        result = self.client.download(self.url + "/file", self.path, segments=4, min_segment_size=64 * 1024)
+        self.assertDownloaded()
+        self.assertGreater(result.resumed_size, len(CONTENT) // 4)
+        self.assertNotIn("bytes=0-262143", self.server.ranges)
+
+    def test_changed_resource(self):
+        self.server.interrupt = True
+        with self.assertRaises(ConnectionError):
+            self.client.download(self.url + "/file", self.path, segments=4, min_segment_size=64 * 1024)
+
+        # A new ETag invalidates the saved progress, so the download starts over.
+        self.server.interrupt = False
+        self.server.etag = '"v2"'
+        result = self.client.download(self.url + "/file", self.path, segments=4, min_segment_size=64 * 1024)
+        self.assertDownloaded()
+        self.assertEqual(result.resumed_size, 0)
+
+    def test_single_stream_fallback(self):
+        for path in ("/norange", "/chunked"):
+            result = self.client.download(self.url + path, self.path, segments=4)
+            self.assertDownloaded()
+            self.assertEqual((result.size, result.segments_count, result.ranged), (len(CONTENT), 1, False))
+            os.remove(self.path)
+        self.assertEqual(self.server.ranges, [None])
+
+    def test_single_stream_resume(self):
+        self.server.interrupt = True
+        with self.assertRaises(ConnectionError):
+            self.client.download(self.url + "/unadvertised", self.path, progress_interval=16 * 1024)
+        self.assertTrue(os.path.exists(self.path + ".progress"))
+
+        self.server.interrupt = False
+        self.server.ranges = []
+        result = self.client.download(self.url + "/unadvertised", self.path)
+        self.assertDownloaded()
+        self.assertFalse(result.ranged)
+        self.assertGreater(result.resumed_size, 0)
+        self.assertEqual(self.server.ranges, [None, f"bytes={result.resumed_size}-{len(CONTENT) - 1}"])
+
+        # Without a validator the partial file cannot be matched to the resource, so the download starts over.
+        os.remove(self.path)
+        self.server.interrupt = True
+        with self.assertRaises(ConnectionError):
+            self.client.download(self.url + "/norange", self.path)
+        self.assertFalse(os.path.exists(self.path + ".progress"))
+
+        self.server.interrupt = False
+        self.server.ranges = []
+        result = self.client.download(self.url + "/norange", self.path)
+        self.assertDownloaded()
+        self.assertEqual(result.resumed_size, 0)
+        self.assertEqual(self.server.ranges, [None])
+
+    def test_head_request(self):
+        response = self.client.request(HTTPRequest(self.url + "/file", method="HEAD"))
+        self.assertEqual(response.headers["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(response.content, b"")
+        self.assertTrue(self.client.request(HTTPRequest(self.url + "/file", method="HEAD")).timings.connection_reused)
+
+        with self.assertRaises(ValueError):
+            self.client.download(self.url + "/file", self.path, segments=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+import socket
+import threading
+import time
+from unittest import SkipTest, TestCase, main
+
+from PyHTTP import HTTPClient, HTTPRequest
+from PyHTTP.exceptions import ConnectTimeoutError
+from PyHTTP.happy_eyeballs import HappyEyeballsConnector, interleave_addresses
+from PyHTTP.resolver import CachingResolver
+
+from .retry_tests import FaultInjectingHandler, FaultInjectingServer
+
+
+class BlackholeListener:
+    # A listener with a full accept queue drops new SYNs, so connecting to it hangs like a broken IPv6 route.
+    def __init__(self, family: int, address: str, port: int = 0):
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.bind((address, port))
+        self.sock.listen(0)
+        self.port = self.sock.getsockname()[1]
+        self.fillers = []
+        for _ in range(3):
+            filler = socket.socket(family, socket.SOCK_STREAM)
+            filler.setblocking(False)
+            filler.connect_ex((address, self.port))
+            self.fillers.append(filler)
+        time.sleep(0.1)
+
+    def close(self):
+        for filler in self.fillers:
+            filler.close()
+        self.sock.close()
+
+
+def get_addresses(port: int, *addresses: str):
+    return CachingResolver(hosts={"dual.test": list(addresses)}).resolve("dual.test", port)
+
+
+class HappyEyeballsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            socket.socket(socket.AF_INET6).close()
+            socket.getaddrinfo("::1", 80, flags=socket.AI_NUMERICHOST)
+        except OSError:
+            raise SkipTest("IPv6 loopback is not available")
+
+        cls.server = FaultInjectingServer(("127.0.0.1", 0), FaultInjectingHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.connections = set()
+        cls.server.counts = {}
+        cls.server.active_count = cls.server.max_active_count = 0
+        cls.port = cls.server.server_port
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.blackhole = BlackholeListener(socket.AF_INET6, "::1", cls.port)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.blackhole.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_interleave_addresses(self):
+        addresses = get_addresses(80, "::1", "::2", "127.0.0.1", "127.0.0.2")
+        self.assertEqual([address[4][0] for address in interleave_addresses(addresses)],
+                         ["::1", "127.0.0.1", "::2", "127.0.0.2"])
+        self.assertEqual([address[4][0] for address in interleave_addresses(addresses, socket.AF_INET)],
+                         ["127.0.0.1", "::1", "127.0.0.2", "::2"])
+
+    def test_fallback_and_family_memory(self):
+        connector = HappyEyeballsConnector(attempt_delay=0.05)
+        addresses = get_addresses(self.port, "::1", "127.0.0.1")
+        started_at = time.monotonic()
+        with connector.connect("dual.test", addresses) as sock:
+            self.assertEqual(sock.family, socket.AF_INET)
+            self.assertTrue(sock.getblocking())
+        self.assertLess(time.monotonic() - started_at, 0.5)
+        self.assertEqual(connector.stats["attempts"], 2)
+        self.assertEqual(connector.stats["fallbacks"], 1)
+        self.assertEqual(connector.get_preferred_family("dual.test"), socket.AF_INET)
+
+        # The remembered family goes first, so the broken IPv6 address is not tried again.
+        with connector.connect("dual.test", addresses) as sock:
+            self.assertEqual(sock.family, socket.AF_INET)
+        self.assertEqual(connector.stats["attempts"], 3)
+        self.assertEqual(connector.stats["fallbacks"], 1)
+
+    def test_ipv6_preferred(self):
+        listener = socket.create_server(("::1", 0), family=socket.AF_INET6)
+        port = listener.getsockname()[1]
+        try:
+            with HappyEyeballsConnector().connect("dual.test", get_addresses(port, "127.0.0.1", "::1")) as sock:
+                self.assertEqual(sock.family, socket.AF_INET6)
+        finally:
+            listener.close()
+
+    def test_connect_timeout(self):
+        connector = HappyEyeballsConnector(attempt_delay=0.05)
+        started_at = time.monotonic()
+        with self.assertRaises(ConnectTimeoutError):
+            connector.connect("dual.test", get_addresses(self.port, "::1"), timeout=0.2)
+        self.assertLess(time.monotonic() - started_at, 0.5)
+
+    def test_client(self):
+        resolver = CachingResolver(hosts={"dual.test": ["::1", "127.0.0.1"], "broken.test": "::1"})
+        with HTTPClient(resolver=resolver, happy_eyeballs_delay=0.05, connect_timeout=0.2) as client:
+            started_at = time.monotonic()
+            self.assertEqual(client.request(HTTPRequest(f"http://dual.test:{self.port}/")).body, "ok")
+            self.assertLess(time.monotonic() - started_at, 0.5)
+            self.assertEqual(client.connection_pool.tcp_connector.stats["fallbacks"], 1)
+
+            with self.assertRaises(ConnectTimeoutError):
+                client.request(HTTPRequest(f"http://broken.test:{self.port}/"))
+
+
+class TimeoutTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FaultInjectingServer(("127.0.0.1", 0), FaultInjectingHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.connections = set()
+        cls.server.counts = {}
+        cls.server.active_count = cls.server.max_active_count = 0
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_read_timeout(self):
+        with HTTPClient(read_timeout=0.1) as client:
+            with self.assertRaises(TimeoutError):
+                client.request(HTTPRequest(self.url + "/sleep/500"))
+            self.assertEqual(client.request(HTTPRequest(self.url + "/sleep/50")).body, "slept")
+
+    def test_total_timeout(self):
+        with HTTPClient(timeout=0.3) as client:
+            self.assertEqual(client.request(HTTPRequest(self.url + "/")).body, "ok")
+            started_at = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                client.request(HTTPRequest(self.url + "/sleep/1000"))
+            self.assertLess(time.monotonic() - started_at, 0.6)
+
+            # Reused connections drop the deadline of the previous request.
+            time.sleep(0.3)
+            self.assertEqual(client.request(HTTPRequest(self.url + "/")).body, "ok")
+            self.assertTrue(client.request(HTTPRequest(self.url + "/")).timings.connection_reused)
+
+    def test_connect_timeout(self):
+        blackhole = BlackholeListener(socket.AF_INET, "127.0.0.1")
+        try:
+            with HTTPClient(connect_timeout=0.2) as client:
+                started_at = time.monotonic()
+                with self.assertRaises(ConnectTimeoutError):
+                    client.request(HTTPRequest(f"http://127.0.0.1:{blackhole.port}/"))
+                self.assertLess(time.monotonic() - started_at, 0.5)
+        finally:
+            blackhole.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+import socket
+import threading
+import time
+from unittest import TestCase, main
+
+from PyHTTP import HTTPClient, HTTPRequest
+from PyHTTP.constants import HTTP2Flags, HTTP2FrameTypes, HTTP2Settings
+from PyHTTP.hpack import Decoder, Encoder, huffman_decode, huffman_encode
+from .happy_eyeballs_tests import BlackholeListener
+
+
+def create_frame(frame_type: int, flags: int, stream_id: int, payload: bytes = b"") -> bytes:
+    return len(payload).to_bytes(3, "big") + bytes((frame_type, flags)) + stream_id.to_bytes(4, "big") + payload
+
+
+class LocalHTTP2Connection:
+    # A minimal prior-knowledge h2c server that answers every stream from its own thread.
+    def __init__(self, server: "LocalHTTP2Server", sock: socket.socket):
+        self.server = server
+        self.sock = sock
+        self.file = sock.makefile("rb")
+        self.decoder = Decoder()
+        self.encoder = Encoder()
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.send_window = 65535
+        self.initial_window = 65535
+        self.stream_windows = {}
+        self.request_headers = {}
+        self.bodies = {}
+
+    def send(self, frame_type: int, flags: int, stream_id: int, payload: bytes = b""):
+        with self.write_lock:
+            self.sock.sendall(create_frame(frame_type, flags, stream_id, payload))
+
+    def run(self):
+        try:
+            assert self.file.read(24) == b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+            self.send(HTTP2FrameTypes.SETTINGS, 0, 0, HTTP2Settings.MAX_CONCURRENT_STREAMS.to_bytes(2, "big")
+                      + self.server.max_concurrent_streams.to_bytes(4, "big"))
+            while True:
+                header = self.file.read(9)
+                if len(header) < 9:
+                    return
+                length = int.from_bytes(header[:3], "big")
+                frame_type, flags = header[3], header[4]
+                stream_id = int.from_bytes(header[5:], "big")
+                self.process_frame(frame_type, flags, stream_id, self.file.read(length))
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.sock.close()
+
+    def process_frame(self, frame_type: int, flags: int, stream_id: int, payload: bytes):
+        if frame_type == HTTP2FrameTypes.SETTINGS and flags & HTTP2Flags.ACK:
+            self.server.settings_acks += 1
+        elif frame_type == HTTP2FrameTypes.SETTINGS:
+            for position in range(0, len(payload), 6):
+                if int.from_bytes(payload[position:position + 2], "big") == HTTP2Settings.INITIAL_WINDOW_SIZE:
+                    self.initial_window = int.from_bytes(payload[position + 2:position + 6], "big")
+            self.send(HTTP2FrameTypes.SETTINGS, HTTP2Flags.ACK, 0)
+        elif frame_type == HTTP2FrameTypes.HEADERS:
+            with self.condition:
+                self.stream_windows[stream_id] = self.initial_window
+            self.request_headers[stream_id] = dict(self.decoder.decode(payload))
+            self.server.requests.append(self.request_headers[stream_id])
+            self.bodies[stream_id] = bytearray()
+            if flags & HTTP2Flags.END_STREAM:
+                self.respond(stream_id)
+        elif frame_type == HTTP2FrameTypes.DATA:
+            self.bodies[stream_id] += payload
+            if payload and self.server.window_updates:
+                increment = len(payload).to_bytes(4, "big")
+                self.send(HTTP2FrameTypes.WINDOW_UPDATE, 0, 0, increment)
+                self.send(HTTP2FrameTypes.WINDOW_UPDATE, 0, stream_id, increment)
+            if flags & HTTP2Flags.END_STREAM:
+                self.respond(stream_id)
+        elif frame_type == HTTP2FrameTypes.WINDOW_UPDATE:
+            with self.condition:
+                if stream_id:
+                    self.stream_windows[stream_id] = self.stream_windows.get(stream_id, 0) \
+                                                     + int.from_bytes(payload, "big")
+                else:
+                    self.send_window += int.from_bytes(payload, "big")
+                self.condition.notify_all()
+        elif frame_type == HTTP2FrameTypes.RST_STREAM:
+            with self.condition:
+                self.server.reset_streams.append(stream_id)
+                self.stream_windows.pop(stream_id, None)
+                self.condition.notify_all()
+
+    def respond(self, stream_id: int):
+        threading.Thread(target=self.send_response, args=(stream_id,), daemon=True).start()
+
+    def send_response(self, stream_id: int):
+        path = self.request_headers[stream_id][":path"]
+        if path == "/echo":
+            body = bytes(self.bodies[stream_id])
+        elif path == "/big":
+            body = b"x" * 3_000_000
+        elif path.startswith("/delay/"):
+            time.sleep(int(path[len("/delay/"):]) / 1000)
+            body = path.encode()
+        elif path == "/endless":
+            body = b"y" * 100_000_000
+        elif path == "/settings":
+            time.sleep(0.2)
+            self.send(HTTP2FrameTypes.SETTINGS, 0, 0,
+                      HTTP2Settings.HEADER_TABLE_SIZE.to_bytes(2, "big") + (0).to_bytes(4, "big"))
+            body = b"settings"
+        else:
+            body = b"hello"
+
+        with self.write_lock:
+            self.sock.sendall(create_frame(HTTP2FrameTypes.HEADERS, HTTP2Flags.END_HEADERS, stream_id,
+                                           self.encoder.encode([(":status", "200"), ("x-stream", str(stream_id))])))
+        view = memoryview(body)
+        try:
+            while view.nbytes:
+                with self.condition:
+                    while stream_id in self.stream_windows and min(self.send_window,
+                                                                   self.stream_windows[stream_id]) <= 0:
+                        self.condition.wait()
+                    if stream_id not in self.stream_windows:
+                        return
+                    size = min(16384, self.send_window, self.stream_windows[stream_id], view.nbytes)
+                    self.send_window -= size
+                    self.stream_windows[stream_id] -= size
+                chunk, view = view[:size], view[size:]
+                self.send(HTTP2FrameTypes.DATA, 0 if view.nbytes else HTTP2Flags.END_STREAM, stream_id, bytes(chunk))
+        except OSError:
+            pass
+
+
+class LocalHTTP2Server:
+    def __init__(self, max_concurrent_streams: int = 100):
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.max_concurrent_streams = max_concurrent_streams
+        self.window_updates = True
+        self.connections_count = 0
+        self.requests = []
+        self.reset_streams = []
+        self.settings_acks = 0
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        while True:
+            try:
+                sock, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections_count += 1
+            threading.Thread(target=LocalHTTP2Connection(self, sock).run, daemon=True).start()
+
+    def close(self):
+        self.sock.close()
+
+
+class HPACKTest(TestCase):
+    def test_rfc_examples(self):
+        # RFC 7541 C.4.1 and C.4.2: requests with Huffman coding sharing one dynamic table.
+        decoder = Decoder()
+        self.assertEqual(decoder.decode(bytes.fromhex("828684418cf1e3c2e5f23a6ba0ab90f4ff")),
+                         [(":method", "GET"), (":scheme", "http"), (":path", "/"), (":authority", "www.example.com")])
+        self.assertEqual(decoder.decode(bytes.fromhex("828684be5886a8eb10649cbf")),
+                         [(":method", "GET"), (":scheme", "http"), (":path", "/"), (":authority", "www.example.com"),
+                          ("cache-control", "no-cache")])
+        self.assertEqual(huffman_encode(b"www.example.com").hex(), "f1e3c2e5f23a6ba0ab90f4ff")
+        self.assertEqual(huffman_decode(huffman_encode(bytes(range(256)))), bytes(range(256)))
+
+    def test_dynamic_table(self):
+        encoder = Encoder()
+        decoder = Decoder()
+        headers = [(":method", "GET"), (":path", "/items"), ("user-agent", "PyHTTP"), ("authorization", "secret")]
+        first_block = encoder.encode(headers)
+        second_block = encoder.encode(headers)
+        self.assertEqual(decoder.decode(first_block), headers)
+        self.assertEqual(decoder.decode(second_block), headers)
+        self.assertLess(len(second_block), len(first_block))
+        self.assertNotIn(("authorization", "secret"), decoder.table._entries)
+
+
+class HTTP2ClientTest(TestCase):
+    def setUp(self):
+        self.server = LocalHTTP2Server()
+        self.url = f"http://127.0.0.1:{self.server.port}"
+        self.client = HTTPClient(http2_prior_knowledge=True)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def test_request(self):
+        response = self.client.request(HTTPRequest(self.url + "/", query_string={"page": "1"},
+                                                   request_headers={"Connection": "keep-alive"}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.http_version, "HTTP/2")
+        self.assertEqual(response.body, "hello")
+        self.assertEqual(self.server.requests[0][":path"], "/?page=1")
+        self.assertNotIn("connection", self.server.requests[0])
+
+    def test_flow_control(self):
+        response = self.client.request(HTTPRequest(self.url + "/big"))
+        self.assertEqual(response.content, b"x" * 3_000_000)
+        self.assertGreater(response.timings.bytes_received, 3_000_000)
+        self.assertFalse(response.timings.connection_reused)
+
+        body = bytes(range(256)) * 1000
+        response = self.client.request(HTTPRequest(self.url + "/echo", method="POST", body=body))
+        self.assertEqual(response.content, body)
+        self.assertGreater(response.timings.bytes_sent, len(body))
+        self.assertTrue(response.timings.connection_reused)
+        self.assertEqual(self.server.connections_count, 1)
+
+    def test_multiplexing(self):
+        delays = [300, 200, 100, 0] * 5
+        started_at = time.monotonic()
+        responses = list(self.client.request_many([HTTPRequest(f"{self.url}/delay/{delay}") for delay in delays],
+                                                  max_workers=len(delays)))
+        self.assertLess(time.monotonic() - started_at, 1.5)
+        self.assertEqual([response.body for response in responses], [f"/delay/{delay}" for delay in delays])
+        self.assertEqual(self.server.connections_count, 1)
+
+    def test_cancellation(self):
+        response = self.client.request(HTTPRequest(self.url + "/endless"), stream=True)
+        received_size = 0
+        for chunk in response.iter_content(16384):
+            received_size += len(chunk)
+            if received_size >= 100_000:
+                break
+        stream_id = int(response.headers["x-stream"])
+        response.close()
+
+        self.assertEqual(self.client.request(HTTPRequest(self.url + "/")).body, "hello")
+        self.assertIn(stream_id, self.server.reset_streams)
+        self.assertEqual(self.server.connections_count, 1)
+
+    def test_reader_does_not_wait_for_writers(self):
+        self.assertEqual(self.client.request(HTTPRequest(self.url + "/")).body, "hello")
+        http2_connection = next(iter(self.client._http2_connections.values()))
+        acks_count = self.server.settings_acks
+        responses = []
+        thread = threading.Thread(
+            target=lambda: responses.append(self.client.request(HTTPRequest(self.url + "/settings"))))
+        thread.start()
+        while len(self.server.requests) < 2:
+            time.sleep(0.01)
+        # A writer stuck on a full socket buffer holds the write lock, the server's SETTINGS must not stall the reader.
+        with http2_connection._write_lock:
+            thread.join(2)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(responses[0].body, "settings")
+
+        # The acknowledgement goes out with the next request, ahead of its table size update.
+        self.assertEqual(self.client.request(HTTPRequest(self.url + "/?after=settings")).body, "hello")
+        self.assertEqual(self.server.requests[-1][":path"], "/?after=settings")
+        self.assertEqual(self.server.settings_acks, acks_count + 1)
+        self.assertEqual(self.server.connections_count, 1)
+
+    def test_slow_origin_does_not_block_others(self):
+        blackhole = BlackholeListener(socket.AF_INET, "127.0.0.1")
+        errors = []
+
+        def request_blackhole():
+            try:
+                client.request(HTTPRequest(f"http://127.0.0.1:{blackhole.port}/"))
+            except TimeoutError as e:
+                errors.append(e)
+
+        try:
+            with HTTPClient(http2_prior_knowledge=True, connect_timeout=1) as client:
+                self.assertEqual(client.request(HTTPRequest(self.url + "/")).body, "hello")
+                thread = threading.Thread(target=request_blackhole)
+                thread.start()
+                time.sleep(0.1)
+                started_at = time.monotonic()
+                self.assertEqual(client.request(HTTPRequest(self.url + "/")).body, "hello")
+                self.assertLess(time.monotonic() - started_at, 0.5)
+                thread.join()
+        finally:
+            blackhole.close()
+        self.assertEqual(len(errors), 1)
+
+    def test_timeout_while_waiting_for_window(self):
+        # The server never opens the flow-control window, so the body cannot be sent in full.
+        self.server.window_updates = False
+        with HTTPClient(http2_prior_knowledge=True, timeout=0.3) as client:
+            started_at = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                client.request(HTTPRequest(self.url + "/echo", method="POST", body=b"x" * 100_000))
+            self.assertLess(time.monotonic() - started_at, 1)
+
+    def test_timeout_while_waiting_for_stream_slot(self):
+        server = LocalHTTP2Server(max_concurrent_streams=1)
+        url = f"http://127.0.0.1:{server.port}"
+        try:
+            with HTTPClient(http2_prior_knowledge=True, timeout=0.3) as client:
+                self.assertEqual(client.request(HTTPRequest(url + "/")).body, "hello")
+                response = client.request(HTTPRequest(url + "/endless"), stream=True)
+                started_at = time.monotonic()
+                with self.assertRaises(TimeoutError):
+                    client.request(HTTPRequest(url + "/"))
+                self.assertLess(time.monotonic() - started_at, 1)
+                response.close()
+        finally:
+            server.close()
+
+    def test_read_timeout(self):
+        with HTTPClient(http2_prior_knowledge=True, read_timeout=0.1) as client:
+            with self.assertRaises(TimeoutError):
+                client.request(HTTPRequest(self.url + "/delay/500"))
+            # Only the stream timed out, the connection keeps serving requests.
+            self.assertEqual(client.request(HTTPRequest(self.url + "/")).body, "hello")
+        self.assertEqual(self.server.connections_count, 1)
+        self.assertEqual(len(self.server.reset_streams), 1)
+
+
+if __name__ == '__main__':
+    main()
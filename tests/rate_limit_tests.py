@@ -0,0 +1,148 @@
+import threading
+import time
+from unittest import TestCase, main
+
+from PyHTTP import HTTPClient, HTTPRequest, MetricsAggregator, RateLimiter
+
+from .retry_tests import FaultInjectingHandler, FaultInjectingServer
+
+
+class RateLimiterTest(TestCase):
+    def test_token_bucket(self):
+        limiter = RateLimiter(rate=20, burst=2)
+        started_at = time.monotonic()
+        for _ in range(6):
+            limiter.acquire("Example.com").release()
+        # Two requests use the burst, the other four wait 50ms each.
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.18)
+
+        stats = limiter.stats["example.com"]
+        self.assertEqual(stats["requests"], 6)
+        self.assertEqual(stats["delayed_requests"], 4)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertGreater(stats["queued_ms_total"], 150)
+        self.assertEqual(stats["queued_ms"]["count"], 6)
+
+    def test_max_in_flight(self):
+        limiter = RateLimiter(max_in_flight=1, host_limits={"other.com": {"max_in_flight": 2}})
+        permit = limiter.acquire("example.com")
+        limiter.acquire("other.com")
+        limiter.acquire("other.com")
+
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (limiter.acquire("example.com"), acquired.set()))
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        permit.release()
+        permit.release()
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+        self.assertEqual(limiter.stats["example.com"]["in_flight"], 1)
+
+    def test_deadline(self):
+        limiter = RateLimiter(rate=1, burst=1)
+        limiter.acquire("example.com").release()
+        started_at = time.monotonic()
+        # The next token comes in a second, after the deadline, so the limiter does not wait for it.
+        with self.assertRaises(TimeoutError):
+            limiter.acquire("example.com", time.monotonic() + 0.5)
+        self.assertLess(time.monotonic() - started_at, 0.1)
+
+        limiter = RateLimiter(max_in_flight=1)
+        permit = limiter.acquire("example.com")
+        started_at = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            limiter.acquire("example.com", time.monotonic() + 0.2)
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.15)
+        permit.release()
+
+        stats = limiter.stats["example.com"]
+        self.assertEqual(stats["timed_out_requests"], 1)
+        self.assertEqual(stats["waiting"], 0)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(rate=0)
+        with self.assertRaises(ValueError):
+            RateLimiter(max_in_flight=0)
+
+
+class RateLimitClientTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FaultInjectingServer(("127.0.0.1", 0), FaultInjectingHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.connections = set()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.counts = {}
+        self.server.active_count = self.server.max_active_count = 0
+
+    def test_max_in_flight_across_threads(self):
+        limiter = RateLimiter(max_in_flight=2)
+        metrics = MetricsAggregator()
+        with HTTPClient(rate_limiter=limiter, metrics=metrics) as client:
+            responses = list(client.request_many([HTTPRequest(self.url + "/sleep/100") for _ in range(6)],
+                                                 max_workers=6))
+        self.assertEqual([response.body for response in responses], ["slept"] * 6)
+        self.assertEqual(self.server.max_active_count, 2)
+        self.assertGreater(max(response.timings.throttle_ns for response in responses), 150_000_000)
+
+        stats = limiter.stats["127.0.0.1"]
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["delayed_requests"], 4)
+        self.assertEqual(metrics.snapshot()["hosts"][self.url]["throttle_ms"]["count"], 6)
+        self.assertIn("pyhttp_rate_limit_wait_milliseconds_bucket", metrics.render_prometheus())
+
+    def test_slow_down_on_throttling(self):
+        limiter = RateLimiter(rate=100, burst=1)
+        with HTTPClient(rate_limiter=limiter) as client:
+            self.assertEqual(client.request(HTTPRequest(self.url + "/fail/1/429/1")).status_code, 429)
+            self.assertEqual(limiter.stats["127.0.0.1"]["rate"], 50)
+
+            started_at = time.monotonic()
+            response = client.request(HTTPRequest(self.url + "/fail/1/429/1"))
+            self.assertEqual(response.status_code, 200)
+            self.assertGreaterEqual(time.monotonic() - started_at, 0.9)
+            self.assertGreaterEqual(response.timings.throttle_ns, 900_000_000)
+            self.assertLess(response.timings.queue_ns, 100_000_000)
+
+            stats = limiter.stats["127.0.0.1"]
+            self.assertEqual(stats["throttled_responses"], 1)
+            self.assertEqual(stats["rate"], 55)
+            self.assertEqual(stats["in_flight"], 0)
+
+    def test_total_timeout_bounds_throttling(self):
+        limiter = RateLimiter(max_in_flight=1)
+        with HTTPClient(rate_limiter=limiter, timeout=0.3) as client:
+            response = client.request(HTTPRequest(self.url + "/sleep/0"), stream=True)
+            started_at = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                client.request(HTTPRequest(self.url + "/sleep/0"))
+            self.assertLess(time.monotonic() - started_at, 1)
+            response.close()
+            self.assertEqual(client.request(HTTPRequest(self.url + "/sleep/0")).body, "slept")
+
+    def test_release_on_error(self):
+        limiter = RateLimiter(max_in_flight=1)
+        with HTTPClient(rate_limiter=limiter) as client:
+            with self.assertRaises(ConnectionError):
+                client.request(HTTPRequest(self.url + "/drop/5"))
+            self.assertEqual(limiter.stats["127.0.0.1"]["in_flight"], 0)
+
+            response = client.request(HTTPRequest(self.url + "/sleep/0"), stream=True)
+            self.assertEqual(limiter.stats["127.0.0.1"]["in_flight"], 1)
+            response.close()
+            self.assertEqual(limiter.stats["127.0.0.1"]["in_flight"], 0)
+
+
+if __name__ == '__main__':
+    main()
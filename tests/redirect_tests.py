@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, main
+
+from PyHTTP import HTTPClient, HTTPRequest, RedirectCache
+from PyHTTP.exceptions import TooManyRedirectsError
+
+
+class RedirectHandler(BaseHTTPRequestHandler):
+    # /moved/<status>[/<max-age>|/no-store] redirects to the relative /echo, which describes the request it received.
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.counts[self.path] = self.server.counts.get(self.path, 0) + 1
+
+        route, *arguments = self.path.strip("/").split("/")
+        if route == "moved":
+            headers = {"Location": "/echo?from=" + arguments[0]}
+            if len(arguments) > 1:
+                headers["Cache-Control"] = "no-store" if arguments[1] == "no-store" else f"max-age={arguments[1]}"
+            self._send(int(arguments[0]), b"moved", headers)
+        elif route == "cross":
+            self._send(302, b"", {"Location": f"http://localhost:{self.server.server_port}/echo#fragment"})
+        elif route == "loop":
+            self._send(301, b"", {"Location": "/loop/b" if arguments[0] == "a" else "/loop/a"})
+        else:
+            self._send(200, json.dumps({
+                "method": self.command,
+                "path": self.path,
+                "body": body.decode(),
+                "authorization": self.headers.get("Authorization"),
+                "content_type": self.headers.get("Content-Type"),
+            }).encode())
+
+    do_POST = do_PUT = do_GET
+
+
+class RedirectServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class RedirectTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = RedirectServer(("127.0.0.1", 0), RedirectHandler)
+        cls.server.lock = threading.Lock()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.counts = {}
+        self.redirect_cache = RedirectCache(max_entries=3)
+        self.client = HTTPClient(redirect_cache=self.redirect_cache)
+
+    def tearDown(self):
+        self.client.close()
+
+    def request(self, path: str, method: str = "GET", **kwargs) -> dict:
+        response = self.client.request(HTTPRequest(self.url + path, method=method, **kwargs))
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.body)
+
+    def test_method_semantics(self):
+        expected_requests = [("POST", 301, "GET", ""), ("POST", 302, "GET", ""), ("PUT", 303, "GET", ""),
+                             ("PUT", 302, "PUT", "data"), ("POST", 307, "POST", "data"), ("PUT", 308, "PUT", "data")]
+        for method, status_code, expected_method, expected_body in expected_requests:
+            echo = self.request(f"/moved/{status_code}", method, body="data")
+            self.assertEqual((echo["method"], echo["body"]), (expected_method, expected_body), status_code)
+            self.assertEqual(echo["path"], f"/echo?from={status_code}")
+            self.assertEqual(echo["content_type"] is not None, bool(expected_body))
+
+    def test_credentials(self):
+        headers = {"Authorization": "Bearer secret"}
+        self.assertEqual(self.request("/moved/302", request_headers=headers)["authorization"], "Bearer secret")
+        echo = self.request("/cross", request_headers=headers)
+        self.assertIsNone(echo["authorization"])
+        self.assertEqual(echo["path"], "/echo")
+
+    def test_too_many_redirects(self):
+        for _ in range(2):
+            with self.assertRaises(TooManyRedirectsError):
+                self.client.request(HTTPRequest(self.url + "/loop/a"))
+        self.assertEqual(self.server.counts["/loop/a"], 1)
+
+    def test_redirect_cache(self):
+        for _ in range(3):
+            response = self.client.request(HTTPRequest(self.url + "/moved/301"))
+            self.assertEqual(response.http_request.absolute_url, self.url + "/echo?from=301")
+        self.assertEqual(self.server.counts["/moved/301"], 1)
+        self.assertEqual(self.server.counts["/echo?from=301"], 3)
+        self.assertEqual(self.redirect_cache.stats["avoided_round_trips"], 2)
+
+        # Temporary redirects are cached only with explicit freshness, and the cache is keyed by method.
+        for path in ("/moved/302", "/moved/307/60", "/moved/308/no-store", "/moved/302/0"):
+            self.request(path)
+            self.request(path)
+        self.request("/moved/307/60", "POST", body="data")
+        self.assertEqual([self.server.counts[path] for path in ("/moved/302", "/moved/307/60",
+                                                                 "/moved/308/no-store", "/moved/302/0")],
+                         [2, 2, 2, 2])
+        self.assertEqual(len(self.redirect_cache), 3)
+
+        # The least recently used redirect is evicted first.
+        self.request("/moved/308")
+        self.request("/moved/301")
+        self.assertEqual(self.server.counts["/moved/301"], 2)
+        self.assertEqual(self.redirect_cache.stats["evictions"], 2)
+
+    def test_redirect_cache_expiry(self):
+        self.request("/moved/302/60")
+        entry = self.redirect_cache.lookup(HTTPRequest(self.url + "/moved/302/60"))
+        entry.expires_at = time.monotonic() - 1
+        self.request("/moved/302/60")
+        self.assertEqual(self.server.counts["/moved/302/60"], 2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import socket
+import time
+from unittest import TestCase, main
+
+from PyHTTP.resolver import BaseResolver, CachingResolver
+
+
+class CountingResolver(BaseResolver):
+    def __init__(self, addresses: list[str] | None = None):
+        self.addresses = addresses
+        self.calls_count = 0
+
+    def resolve(self, hostname: str, port: int):
+        self.calls_count += 1
+        if self.addresses is None:
+            raise socket.gaierror("Name or service not known")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in self.addresses]
+
+
+class CachingResolverTest(TestCase):
+    def test_positive_cache_and_round_robin(self):
+        upstream = CountingResolver(["10.0.0.1", "10.0.0.2"])
+        resolver = CachingResolver(upstream)
+        first = resolver.resolve("example.com", 80)
+        second = resolver.resolve("example.com", 80)
+        self.assertEqual(upstream.calls_count, 1)
+        self.assertEqual(first[0][4][0], "10.0.0.1")
+        self.assertEqual(second[0][4][0], "10.0.0.2")
+        self.assertEqual(resolver.stats["hits"], 1)
+        self.assertEqual(resolver.stats["misses"], 1)
+
+    def test_negative_cache(self):
+        upstream = CountingResolver()
+        resolver = CachingResolver(upstream, negative_ttl=60)
+        errors = []
+        for _ in range(2):
+            with self.assertRaises(socket.gaierror) as context:
+                resolver.resolve("missing.example", 80)
+            errors.append(context.exception)
+        self.assertEqual(upstream.calls_count, 1)
+        self.assertEqual(resolver.stats["negative_hits"], 1)
+        # Each hit raises its own exception, so tracebacks do not pile up on a cached instance.
+        self.assertIsNot(errors[0], errors[1])
+        self.assertEqual(errors[0].args, errors[1].args)
+
+    def test_max_entries(self):
+        upstream = CountingResolver(["10.0.0.1"])
+        resolver = CachingResolver(upstream, max_entries=2)
+        for hostname in ("a.example", "b.example", "a.example", "c.example", "a.example", "b.example"):
+            resolver.resolve(hostname, 80)
+        # The least recently used host is evicted first, so only b.example is resolved again.
+        self.assertEqual(upstream.calls_count, 4)
+        self.assertEqual(resolver.stats["entries"], 2)
+        self.assertEqual(resolver.stats["evictions"], 2)
+
+    def test_stale_while_revalidate(self):
+        upstream = CountingResolver(["10.0.0.1"])
+        resolver = CachingResolver(upstream, ttl=0)
+        resolver.resolve("example.com", 80)
+        upstream.addresses = ["10.0.0.9"]
+        self.assertEqual(resolver.resolve("example.com", 80)[0][4][0], "10.0.0.1")
+        for _ in range(100):
+            if resolver.stats["refreshes"]:
+                break
+            time.sleep(0.01)
+        self.assertEqual(upstream.calls_count, 2)
+        self.assertEqual(resolver.stats["stale_hits"], 1)
+
+    def test_hosts_override(self):
+        upstream = CountingResolver()
+        resolver = CachingResolver(upstream, hosts={"service.local": "127.0.0.1"})
+        self.assertEqual(resolver.resolve("service.local", 8080)[0][4], ("127.0.0.1", 8080))
+        self.assertEqual(upstream.calls_count, 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, main
+
+from PyHTTP import AsyncHTTPClient, HTTPClient, HTTPRequest, RetryBudget, RetryPolicy
+from PyHTTP.exceptions import EmptyResponseError, RetryError
+
+
+class FaultInjectingHandler(BaseHTTPRequestHandler):
+    # /fail/<count>/<status> answers <status> to the first <count> requests, /slow/<ms> delays only the first one
+    # and /sleep/<ms> delays every request while tracking how many are handled at once.
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count_request(self) -> int:
+        with self.server.lock:
+            self.server.counts[self.path] = self.server.counts.get(self.path, 0) + 1
+            self.server.connections.add(self.client_address)
+            return self.server.counts[self.path]
+
+    def do_GET(self):
+        request_number = self._count_request()
+        route, *arguments = self.path.strip("/").split("/")
+        if route == "fail" and request_number <= int(arguments[0]):
+            self._send(int(arguments[1]), b"unavailable", {"Retry-After": arguments[2]} if len(arguments) > 2 else {})
+        elif route == "drop" and request_number <= int(arguments[0]):
+            self.close_connection = True
+        elif route == "slow" and request_number == 1:
+            time.sleep(int(arguments[0]) / 1000)
+            self._send(200, b"slow")
+        elif route == "sleep":
+            with self.server.lock:
+                self.server.active_count += 1
+                self.server.max_active_count = max(self.server.max_active_count, self.server.active_count)
+            time.sleep(int(arguments[0]) / 1000)
+            with self.server.lock:
+                self.server.active_count -= 1
+            self._send(200, b"slept")
+        else:
+            self._send(200, b"ok")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+
+class FaultInjectingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class RetryPolicyTest(TestCase):
+    def test_decisions(self):
+        policy = RetryPolicy(backoff_base=0.1, backoff_max=0.5, jitter=0)
+        self.assertEqual([policy.get_backoff(attempt) for attempt in range(1, 6)], [0.1, 0.2, 0.4, 0.5, 0.5])
+        self.assertTrue(0 <= RetryPolicy(backoff_base=1).get_backoff(1) <= 1)
+
+        get_request = HTTPRequest("http://127.0.0.1/")
+        post_request = HTTPRequest("http://127.0.0.1/", method="POST", body=b"data")
+        self.assertTrue(policy.should_retry_exception(get_request, ConnectionResetError()))
+        self.assertFalse(policy.should_retry_exception(post_request, ConnectionResetError()))
+        self.assertTrue(policy.should_retry_exception(post_request, ConnectionRefusedError()))
+        self.assertFalse(policy.should_retry_exception(post_request, EmptyResponseError()))
+        self.assertFalse(policy.should_retry_exception(get_request, ValueError()))
+        self.assertFalse(policy.should_hedge(get_request))
+        self.assertTrue(RetryPolicy(hedge_after=0.1).should_hedge(get_request))
+        self.assertFalse(RetryPolicy(hedge_after=0.1).should_hedge(post_request))
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, min_retries_per_second=0, max_tokens=2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+
+class RetryClientTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FaultInjectingServer(("127.0.0.1", 0), FaultInjectingHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.connections = set()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.counts = {}
+        self.server.connections.clear()
+        self.policy = RetryPolicy(max_attempts=3, backoff_base=0.01, jitter=0.5)
+        self.client = HTTPClient(retry_policy=self.policy)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_retry_status(self):
+        response = self.client.request(HTTPRequest(self.url + "/fail/2/503"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.policy.retries_count, 2)
+
+        response = self.client.request(HTTPRequest(self.url + "/fail/5/502"))
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(self.server.counts["/fail/5/502"], 3)
+
+    def test_non_idempotent_methods(self):
+        response = self.client.request(HTTPRequest(self.url + "/fail/1/502", method="POST", body=b"data"))
+        self.assertEqual(response.status_code, 502)
+        response = self.client.request(HTTPRequest(self.url + "/fail/1/429/0", method="POST", body=b"data"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_retry_after(self):
+        started_at = time.monotonic()
+        response = self.client.request(HTTPRequest(self.url + "/fail/1/503/1"))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - started_at, 1)
+
+        response = self.client.request(HTTPRequest(self.url + "/fail/1/503/3600"))
+        self.assertEqual(response.status_code, 503)
+
+    def test_retry_exception(self):
+        response = self.client.request(HTTPRequest(self.url + "/drop/2"))
+        self.assertEqual(response.body, "ok")
+
+        with self.assertRaises(RetryError) as context:
+            self.client.request(HTTPRequest(self.url + "/drop/5"))
+        self.assertEqual(context.exception.attempts_count, 3)
+        self.assertIsInstance(context.exception.exception, EmptyResponseError)
+
+    def test_dropped_post_is_not_resent(self):
+        # The server reads the POST on a kept-alive connection and closes it without answering.
+        with HTTPClient() as client:
+            self.assertEqual(client.request(HTTPRequest(self.url + "/")).body, "ok")
+            with self.assertRaises(EmptyResponseError):
+                client.request(HTTPRequest(self.url + "/drop/5", method="POST", body=b"data"))
+        self.assertEqual(self.server.counts["/drop/5"], 1)
+
+        async def run():
+            async with AsyncHTTPClient() as async_client:
+                await async_client.request(HTTPRequest(self.url + "/"))
+                await async_client.request(HTTPRequest(self.url + "/drop/5", method="POST", body=b"data"))
+
+        with self.assertRaises(EmptyResponseError):
+            asyncio.run(run())
+        self.assertEqual(self.server.counts["/drop/5"], 2)
+
+        # The retry policy does not send it again either.
+        with self.assertRaises(EmptyResponseError):
+            self.client.request(HTTPRequest(self.url + "/drop/5", method="POST", body=b"data"))
+        self.assertEqual(self.server.counts["/drop/5"], 3)
+
+    def test_budget_limits_retries(self):
+        self.policy.budget = RetryBudget(ratio=0, min_retries_per_second=0, max_tokens=1)
+        self.assertEqual(self.client.request(HTTPRequest(self.url + "/fail/1/503")).status_code, 200)
+        self.assertEqual(self.client.request(HTTPRequest(self.url + "/fail/1/504")).status_code, 504)
+        self.assertEqual(self.policy.budget_exhausted_count, 1)
+
+    def test_hedging(self):
+        self.policy.hedge_after = 0.05
+        started_at = time.monotonic()
+        response = self.client.request(HTTPRequest(self.url + "/slow/1000"))
+        self.assertLess(time.monotonic() - started_at, 0.5)
+        self.assertEqual(response.body, "ok")
+        self.assertEqual(self.policy.stats["hedges"], 1)
+        self.assertEqual(self.policy.stats["hedge_wins"], 1)
+        self.assertEqual(len(self.server.connections), 2)
+
+        self.assertEqual(self.client.request(HTTPRequest(self.url + "/")).body, "ok")
+        self.assertEqual(self.policy.stats["hedges"], 1)
+
+    def test_hedged_attempts_use_own_requests(self):
+        self.policy.hedge_after = 0.05
+        http_request = HTTPRequest(self.url + "/slow/500", cookies={"session": "1"})
+        response = self.client.request(http_request)
+        self.assertEqual(response.body, "ok")
+        self.assertIsNot(response.http_request, http_request)
+        self.assertNotIn("Accept-Encoding", http_request.request_headers)
+        self.assertEqual(http_request.cookies, {"session": "1"})
+
+        # Closing the client waits for the slower attempt instead of leaving it running.
+        self.client.close()
+        self.assertEqual(self.server.counts["/slow/500"], 2)
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name.startswith("PyHTTP-hedge")])
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ from unittest import TestCase, main
 from datetime import datetime
 
 from PyHTTP.utils import *
+from PyHTTP.headers import Headers
 
 
 class URLParseTest(TestCase):
@@ -37,5 +38,46 @@ class ParseCookieTest(TestCase):
                                   'value': 'abc123'})
 
 
+class ParseCacheControlTest(TestCase):
+    def test_equals(self):
+        self.assertEqual(parse_cache_control(None), {})
+        self.assertEqual(parse_cache_control('max-age=60, No-Cache, private="Set-Cookie"'),
+                         {'max-age': '60', 'no-cache': True, 'private': 'Set-Cookie'})
+
+
+class ParseHeadersTest(TestCase):
+    def test_equals(self):
+        result = parse_headers("HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nSet-Cookie: a=1\r\n"
+                               "set-cookie: b=2\r\nContent-Length:5")
+        self.assertEqual(result["http_version"], "HTTP/1.1")
+        self.assertEqual(result["status_code"], 200)
+
+        headers = result["headers"]
+        self.assertEqual(headers["content-type"], "text/html")
+        self.assertEqual(headers.get("CONTENT-LENGTH"), "5")
+        self.assertEqual(headers.get_all("Set-Cookie"), ["a=1", "b=2"])
+        self.assertIsNone(headers.get("Location"))
+        self.assertEqual(list(headers), ["Content-Type", "Set-Cookie", "Content-Length"])
+        self.assertEqual(len(headers), 3)
+
+
+class HeadersTest(TestCase):
+    def test_equals(self):
+        headers = Headers({"Accept": "*/*", "Set-Cookie": ["a=1", "b=2"]})
+        headers.add("accept", "text/html")
+        self.assertEqual(headers["ACCEPT"], "*/*, text/html")
+
+        headers["Accept"] = "application/json"
+        self.assertEqual(headers.get_all("accept"), ["application/json"])
+
+        del headers["set-cookie"]
+        self.assertNotIn("Set-Cookie", headers)
+        self.assertEqual(headers.multi_items(), [("Accept", "application/json")])
+
+        raw_headers = Headers.from_raw(b"Accept: */*\r\nConnection: close")
+        raw_headers.add("Connection", "keep-alive")
+        self.assertEqual(raw_headers.raw, "Accept: */*\r\nConnection: close\r\nConnection: keep-alive")
+
+
 if __name__ == '__main__':
     main()